@@ -0,0 +1 @@
+# 🔹 Núcleo compartilhado pelos scripts de backtesting (sinais, indicadores, execução e dados)
@@ -0,0 +1,455 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core.download import API_URL, GRANULARIDADES_MS, buscar_pagina, criar_sessao, janelas_paginacao
+from backtesting_core.estrategias import ESTRATEGIAS
+from backtesting_core.execucao import (
+    LADO, ROTULOS_EVENTOS, TAMANHO, USD, coluna_tempo, contagem_trades, fechar_posicao, novo_estado,
+    processar_candles,
+)
+from backtesting_core.incrementais import IndicadoresIncrementais
+from backtesting_core.sinais import gerar_sinais
+
+# 🔹 Paper trading ao vivo: cada candle 1m fechado atualiza os indicadores incrementais, gera o sinal da estratégia
+# e passa por um passo do mesmo núcleo de execução do backtest (SL/TP/saída reversa idênticos).
+# Nada é baixado de novo nem recalculado sobre o histórico inteiro; o estado vai para um snapshot JSON de
+# tamanho fixo e as operações para um JSONL ao lado dele (só as novas são acrescentadas a cada gravação),
+# e a sessão continua do último candle depois de reiniciar.
+VERSAO_SNAPSHOT = 2
+COLUNAS_CANDLE = ("timestamp", "open", "high", "low", "close", "volume")
+
+# 🔹 Configurações equivalentes aos scripts (indicadores, parâmetros da estratégia e regras de saída)
+CONFIGURACOES = {
+    # backtesting_stoch.py
+    "estocastica": {
+        "estrategia": "estocastica",
+        "indicadores": [("estocastico", {"periodo": 14})],
+        "regras": {"saida_reversa": True},
+        "initial_balance": 1000,
+        "tamanho_ordem": 0.001,
+    },
+    # backtesting_TRIX.py: alvo de 2% e sem fechamento forçado
+    "trix": {
+        "estrategia": "trix",
+        "indicadores": [("trix", {"periodo": 14})],
+        "regras": {"saida_reversa": True, "take_profit_long": 1.02, "take_profit_short": 0.98},
+        "fechamento_forcado": False,
+        "initial_balance": 1000,
+        "tamanho_ordem": 0.001,
+    },
+    # backtesting_ADX+TRIX+STOCH_v02.py
+    "trix_estocastico": {
+        "estrategia": "trix_estocastico",
+        "indicadores": [("trix", {"periodo": 18}), ("estocastico", {"periodo": 14}), ("adx", {"periodo": 14})],
+        "params": {"adx_minimo": 20},
+        "initial_balance": 10000,
+        "tamanho_ordem": 0.005,
+    },
+}
+
+
+def _ms(valor):
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    return int(pd.Timestamp(valor).value // 1_000_000)
+
+
+# 🔹 Sessão de paper trading: estado da conta, dos indicadores e das operações
+class SessaoPapel:
+    def __init__(self, estrategia, indicadores, params=None, regras=None, initial_balance=1000, tamanho_ordem=0.001,
+                 fechamento_forcado=True, janela_sinais=64, ao_evento=None, jit=None):
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"estratégia desconhecida: {estrategia!r} (disponíveis: {', '.join(sorted(ESTRATEGIAS))})")
+        self.estrategia = estrategia
+        self.especificacao = [(nome, dict(p)) for nome, p in indicadores]
+        self.params = dict(params or {})
+        self.regras = dict(regras or {})
+        self.initial_balance = initial_balance
+        self.tamanho_ordem = tamanho_ordem
+        self.fechamento_forcado = fechamento_forcado
+        self.ao_evento = ao_evento
+        self.jit = jit
+        self.indicadores = IndicadoresIncrementais(self.especificacao)
+        # últimos candles com os indicadores: a estratégia vetorizada roda só sobre eles
+        # (precisa ser maior que o aquecimento das estratégias, 14 candles)
+        self.janela = deque(maxlen=janela_sinais)
+        self.estado, self.contadores = novo_estado(initial_balance)
+        self.operacoes = []
+        self.operacoes_gravadas = 0  # quantas já estão no JSONL de operações
+        self.indice = 0
+        self.ultimo_timestamp = None
+        self.latencias_ns = deque(maxlen=100_000)
+
+    @classmethod
+    def de_configuracao(cls, nome, **opcoes):
+        configuracao = {**CONFIGURACOES[nome], **opcoes}
+        return cls(**configuracao)
+
+    # 🔹 Alimenta o histórico (ex.: o DataFrame do cache local) só nos indicadores, sem operar
+    def aquecer(self, df):
+        tempo = df[coluna_tempo(df)]
+        tempos = tempo.to_numpy().astype("datetime64[ms]").astype(np.int64) if tempo.dtype.kind == "M" else tempo.to_numpy()
+        colunas = {nome: df[nome].to_numpy(dtype=np.float64).tolist() for nome in COLUNAS_CANDLE[1:] if nome in df}
+        for i, ts in enumerate(tempos.tolist()):
+            candle = {nome: valores[i] for nome, valores in colunas.items()}
+            candle["timestamp"] = int(ts)
+            self._atualizar_indicadores(candle)
+            self.indice += 1
+            self.ultimo_timestamp = int(ts)
+
+    def _atualizar_indicadores(self, candle):
+        valores = self.indicadores.atualizar(candle["high"], candle["low"], candle["close"],
+                                             candle.get("volume", float("nan")))
+        linha = {nome: candle.get(nome, float("nan")) for nome in COLUNAS_CANDLE}
+        linha.update(valores)
+        self.janela.append(linha)
+
+    def _sinal(self):
+        df = pd.DataFrame(list(self.janela))
+        return int(gerar_sinais(df, ESTRATEGIAS[self.estrategia], **self.params)[-1])
+
+    def _registrar(self, eventos, timestamp):
+        ev_codigo, ev_preco, _, n_ev = eventos
+        novas = [(ROTULOS_EVENTOS[codigo], preco, timestamp)
+                 for codigo, preco in zip(ev_codigo[:n_ev].tolist(), ev_preco[:n_ev].tolist())]
+        self.operacoes.extend(novas)
+        if self.ao_evento is not None:
+            for operacao in novas:
+                self.ao_evento(*operacao)
+        return novas
+
+    # 🔹 Processa um candle fechado; devolve as operações geradas (candles repetidos ou atrasados são ignorados)
+    def processar(self, candle):
+        timestamp = _ms(candle["timestamp"])
+        if self.ultimo_timestamp is not None and timestamp <= self.ultimo_timestamp:
+            return []
+        inicio = time.perf_counter_ns()
+        candle = {**candle, "timestamp": timestamp}
+        self._atualizar_indicadores(candle)
+        sinal = self._sinal()
+        novas = []
+        if self.indice > 0:  # como no backtest, o primeiro candle só alimenta os indicadores
+            eventos = processar_candles(
+                np.array([candle["close"]], dtype=np.float64), np.array([candle["high"]], dtype=np.float64),
+                np.array([candle["low"]], dtype=np.float64), np.array([sinal], dtype=np.int8),
+                self.estado, self.contadores, self.tamanho_ordem, inicio=0, jit=self.jit, **self.regras,
+            )
+            novas = self._registrar(eventos, timestamp)
+        self.indice += 1
+        self.ultimo_timestamp = timestamp
+        self.latencias_ns.append(time.perf_counter_ns() - inicio)
+        return novas
+
+    # 🔹 Encerra a sessão: fecha a posição pelo último close quando a configuração pede fechamento forçado
+    def finalizar(self):
+        if not self.fechamento_forcado or not self.janela or self.estado[LADO] == 0.0:
+            return []
+        ultimo = self.janela[-1]
+        vazio = (np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64), 0)
+        eventos = fechar_posicao(self.estado, ultimo["close"], 0, vazio)
+        return self._registrar(eventos, ultimo["timestamp"])
+
+    def latencias(self):
+        if not self.latencias_ns:
+            return {"candles": 0}
+        micro = np.asarray(self.latencias_ns, dtype=np.float64) / 1000.0
+        return {
+            "candles": len(micro),
+            "media_us": float(micro.mean()),
+            "p50_us": float(np.percentile(micro, 50)),
+            "p95_us": float(np.percentile(micro, 95)),
+            "p99_us": float(np.percentile(micro, 99)),
+            "max_us": float(micro.max()),
+        }
+
+    def resumo(self):
+        lado = self.estado[LADO]
+        return {
+            "estrategia": self.estrategia,
+            "candles": self.indice,
+            "ultimo_timestamp": self.ultimo_timestamp,
+            "saldo_usd": float(self.estado[USD]),
+            "posicao": "long" if lado > 0 else "short" if lado < 0 else None,
+            "operacoes": len(self.operacoes),
+            **contagem_trades(self.contadores),
+            "latencia": self.latencias(),
+        }
+
+    def operacoes_dataframe(self):
+        df = pd.DataFrame(self.operacoes, columns=["operacao", "preco", "timestamp"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+    # 🔹 Snapshot em JSON, gravado em arquivo temporário e renomeado (nunca fica pela metade).
+    # O snapshot guarda só quantas operações existem; elas ficam no JSONL de arquivo_operacoes(caminho).
+    def snapshot(self):
+        return {
+            "versao": VERSAO_SNAPSHOT,
+            "configuracao": {
+                "estrategia": self.estrategia,
+                "indicadores": self.especificacao,
+                "params": self.params,
+                "regras": self.regras,
+                "initial_balance": self.initial_balance,
+                "tamanho_ordem": self.tamanho_ordem,
+                "fechamento_forcado": self.fechamento_forcado,
+                "janela_sinais": self.janela.maxlen,
+            },
+            "indicadores": self.indicadores.estado(),
+            "janela": list(self.janela),
+            "estado": self.estado.tolist(),
+            "contadores": self.contadores.tolist(),
+            "operacoes": len(self.operacoes),
+            "indice": self.indice,
+            "ultimo_timestamp": self.ultimo_timestamp,
+        }
+
+    def salvar(self, caminho):
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        # As operações vão antes do snapshot: se o processo cair entre os dois, carregar descarta as linhas a mais
+        with open(arquivo_operacoes(caminho), "a" if self.operacoes_gravadas else "w", encoding="utf-8") as arquivo:
+            for operacao in self.operacoes[self.operacoes_gravadas:]:
+                arquivo.write(json.dumps(operacao) + "\n")
+        self.operacoes_gravadas = len(self.operacoes)
+        temporario = f"{caminho}.tmp-{os.getpid()}"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(self.snapshot(), arquivo)
+        os.replace(temporario, caminho)
+
+    # `operacoes` são as linhas do JSONL (a versão 1 do snapshot trazia a lista inteira dentro dele)
+    @classmethod
+    def restaurar(cls, snapshot, operacoes=(), ao_evento=None, jit=None):
+        if snapshot.get("versao") not in (1, VERSAO_SNAPSHOT):
+            raise ValueError(f"versão de snapshot não suportada: {snapshot.get('versao')!r}")
+        sessao = cls(**snapshot["configuracao"], ao_evento=ao_evento, jit=jit)
+        sessao.indicadores = IndicadoresIncrementais.restaurar(snapshot["indicadores"])
+        sessao.janela.extend(snapshot["janela"])
+        estado = snapshot["estado"]
+        sessao.estado[:len(estado)] = estado
+        if len(estado) <= TAMANHO and sessao.estado[LADO] != 0.0:
+            sessao.estado[TAMANHO] = sessao.tamanho_ordem  # snapshot anterior ao tamanho guardado na entrada
+        sessao.contadores[:] = snapshot["contadores"]
+        if snapshot["versao"] == 1:
+            operacoes = snapshot["operacoes"]
+        else:
+            sessao.operacoes_gravadas = snapshot["operacoes"]
+        sessao.operacoes = [tuple(operacao) for operacao in operacoes]
+        sessao.indice = snapshot["indice"]
+        sessao.ultimo_timestamp = snapshot["ultimo_timestamp"]
+        return sessao
+
+    @classmethod
+    def carregar(cls, caminho, ao_evento=None, jit=None):
+        with open(caminho, encoding="utf-8") as arquivo:
+            snapshot = json.load(arquivo)
+        operacoes = []
+        if snapshot.get("versao") == VERSAO_SNAPSHOT and snapshot["operacoes"]:
+            with open(arquivo_operacoes(caminho), "rb+") as arquivo:
+                for linha in iter(arquivo.readline, b""):
+                    operacoes.append(json.loads(linha))
+                    if len(operacoes) == snapshot["operacoes"]:
+                        arquivo.truncate(arquivo.tell())  # linhas gravadas depois do último snapshot
+                        break
+            if len(operacoes) < snapshot["operacoes"]:
+                raise ValueError(f"{arquivo_operacoes(caminho)} tem {len(operacoes)} operações; o snapshot espera "
+                                 f"{snapshot['operacoes']}")
+        return cls.restaurar(snapshot, operacoes, ao_evento=ao_evento, jit=jit)
+
+
+# 🔹 JSONL com as operações da sessão gravada em `caminho` (ao_vivo.json -> ao_vivo.operacoes.jsonl)
+def arquivo_operacoes(caminho):
+    return f"{os.path.splitext(caminho)[0]}.operacoes.jsonl"
+
+
+# 🔹 Feeds: qualquer objeto com candles(desde) que gera dicts {timestamp (ms), open, high, low, close, volume}
+# só de candles já fechados e com timestamp maior que `desde`.
+
+# Reproduz candles já guardados (DataFrame do cache ou da planilha): substituto local do feed ao vivo
+class FeedReplay:
+    def __init__(self, df, atraso=0.0):
+        self.df = df
+        self.atraso = atraso
+
+    def candles(self, desde=None):
+        tempo = self.df[coluna_tempo(self.df)]
+        tempos = tempo.to_numpy().astype("datetime64[ms]").astype(np.int64) if tempo.dtype.kind == "M" else tempo.to_numpy()
+        colunas = {nome: self.df[nome].to_numpy(dtype=np.float64).tolist()
+                   for nome in COLUNAS_CANDLE[1:] if nome in self.df}
+        for i, ts in enumerate(tempos.tolist()):
+            if desde is not None and ts <= desde:
+                continue
+            if self.atraso:
+                time.sleep(self.atraso)
+            candle = {nome: valores[i] for nome, valores in colunas.items()}
+            candle["timestamp"] = int(ts)
+            yield candle
+
+
+def _candle_api(linha):
+    return {
+        "timestamp": int(linha[0]),
+        "open": float(linha[1]),
+        "high": float(linha[2]),
+        "low": float(linha[3]),
+        "close": float(linha[4]),
+        "volume": float(linha[5]),
+    }
+
+
+# Consulta a API REST a cada `intervalo` segundos pedindo só os candles fechados depois do último recebido.
+# Depois de uma parada longa, pagina a lacuna inteira antes de voltar ao ritmo normal.
+class FeedPolling:
+    def __init__(self, symbol, product_type="susdt-futures", granularity="1m", url=API_URL, intervalo=5.0,
+                 sessao=None, tentativas=5, relogio=time.time):
+        self.symbol = symbol
+        self.product_type = product_type
+        self.granularity = granularity
+        self.url = url
+        self.intervalo = intervalo
+        self.sessao = sessao
+        self.tentativas = tentativas
+        self.relogio = relogio
+        self.parar = threading.Event()
+
+    def candles(self, desde=None):
+        passo = GRANULARIDADES_MS[self.granularity]
+        sessao = self.sessao or criar_sessao(1)
+        ultimo = desde
+        try:
+            while not self.parar.is_set():
+                agora = int(self.relogio() * 1000)
+                fechado_ate = agora - agora % passo  # candles que começam antes disso já fecharam
+                inicio = ultimo + passo if ultimo is not None else fechado_ate - passo
+                for janela in janelas_paginacao(inicio, fechado_ate, self.granularity) if inicio < fechado_ate else []:
+                    params = {
+                        "symbol": self.symbol,
+                        "productType": self.product_type,
+                        "granularity": self.granularity,
+                        "startTime": str(janela[0]),
+                        "endTime": str(janela[1]),
+                        "limit": "200",
+                    }
+                    linhas = buscar_pagina(sessao, self.url, params, tentativas=self.tentativas)
+                    for linha in sorted(linhas, key=lambda linha: int(linha[0])):
+                        ts = int(linha[0])
+                        if ts < fechado_ate and (ultimo is None or ts > ultimo):
+                            ultimo = ts
+                            yield _candle_api(linha)
+                self.parar.wait(self.intervalo)
+        finally:
+            if self.sessao is None:
+                sessao.close()
+
+
+# Canal público de candles via websocket (precisa do pacote opcional websocket-client).
+# Um candle só é entregue quando chega o primeiro update do candle seguinte, ou seja, depois de fechado;
+# lacunas por queda de conexão não são preenchidas aqui (use FeedPolling para retomar depois de uma parada).
+class FeedWebsocket:
+    URL = "wss://ws.bitget.com/v2/ws/public"
+
+    def __init__(self, symbol, product_type="susdt-futures", granularity="1m", url=URL, ping=25.0):
+        self.symbol = symbol
+        self.product_type = product_type
+        self.granularity = granularity
+        self.url = url
+        self.ping = ping
+        self.parar = threading.Event()
+
+    def candles(self, desde=None):
+        try:
+            import websocket
+        except ImportError as erro:
+            raise RuntimeError("FeedWebsocket precisa do pacote websocket-client (pip install websocket-client)") from erro
+
+        conexao = websocket.create_connection(self.url, timeout=self.ping)
+        assinatura = {"instType": self.product_type.upper(), "channel": f"candle{self.granularity}", "instId": self.symbol}
+        conexao.send(json.dumps({"op": "subscribe", "args": [assinatura]}))
+        aberto = None
+        try:
+            while not self.parar.is_set():
+                try:
+                    mensagem = conexao.recv()
+                except websocket.WebSocketTimeoutException:
+                    conexao.send("ping")
+                    continue
+                if mensagem == "pong":
+                    continue
+                for linha in sorted(json.loads(mensagem).get("data") or [], key=lambda linha: int(linha[0])):
+                    if aberto is not None and int(linha[0]) > int(aberto[0]):
+                        if desde is None or int(aberto[0]) > desde:
+                            yield _candle_api(aberto)
+                    if aberto is None or int(linha[0]) >= int(aberto[0]):
+                        aberto = linha
+        finally:
+            conexao.close()
+
+
+# 🔹 Laço principal: consome o feed, grava o snapshot a cada `snapshot_a_cada` candles e também ao sair
+def executar(sessao, feed, snapshot=None, snapshot_a_cada=1, limite=None, finalizar=False):
+    processados = 0
+    try:
+        for candle in feed.candles(desde=sessao.ultimo_timestamp):
+            sessao.processar(candle)
+            processados += 1
+            if snapshot is not None and processados % snapshot_a_cada == 0:
+                sessao.salvar(snapshot)
+            if limite is not None and processados >= limite:
+                break
+        if finalizar:
+            sessao.finalizar()
+    finally:
+        if snapshot is not None:
+            sessao.salvar(snapshot)
+    return sessao.resumo()
+
+
+# 🔹 Retoma do snapshot quando ele existe; senão cria a sessão da configuração e aquece com o histórico dado
+def iniciar_sessao(configuracao, snapshot=None, historico=None, ao_evento=None, **opcoes):
+    if snapshot is not None and os.path.exists(snapshot):
+        return SessaoPapel.carregar(snapshot, ao_evento=ao_evento)
+    sessao = SessaoPapel.de_configuracao(configuracao, ao_evento=ao_evento, **opcoes)
+    if historico is not None:
+        sessao.aquecer(historico)
+    return sessao
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from backtesting_core.cache_candles import obter_dataframe
+
+    parser = argparse.ArgumentParser(description="Paper trading ao vivo com as regras do backtest")
+    parser.add_argument("configuracao", choices=sorted(CONFIGURACOES))
+    parser.add_argument("--symbol", default="SBTCSUSDT")
+    parser.add_argument("--product-type", default="susdt-futures")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--intervalo", type=float, default=5.0)
+    parser.add_argument("--snapshot", default="ao_vivo.json")
+    parser.add_argument("--pasta-dados", default="dados")
+    parser.add_argument("--aquecimento", type=int, default=500, help="candles do cache usados para aquecer os indicadores")
+    args = parser.parse_args()
+
+    def imprimir(operacao, preco, timestamp):
+        print(f"{operacao} | Preço: {preco:.2f} | Data: {pd.Timestamp(timestamp, unit='ms')}", flush=True)
+
+    historico = None
+    if not os.path.exists(args.snapshot) and args.aquecimento:
+        passo = GRANULARIDADES_MS["1m"]
+        agora = int(time.time() * 1000)
+        fim = agora - agora % passo
+        historico = obter_dataframe(args.pasta_dados, args.symbol, fim - args.aquecimento * passo, fim,
+                                    product_type=args.product_type, granularity="1m", url=args.url)
+    sessao = iniciar_sessao(args.configuracao, args.snapshot, historico, ao_evento=imprimir)
+    feed = FeedPolling(args.symbol, args.product_type, "1m", args.url, args.intervalo)
+    try:
+        executar(sessao, feed, snapshot=args.snapshot)
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(sessao.resumo(), indent=2, default=str))
@@ -0,0 +1,243 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core import perfil
+from backtesting_core.download import GRANULARIDADES_MS, para_ms
+
+# 🔹 Armazenamento local de candles em colunas: <raiz>/<symbol>/<granularity>/<coluna>.npy
+# Cada coluna é um .npy aberto com memória mapeada (sem cópia) e o "timestamp" (int64, epoch em ms)
+# fica ordenado, então um recorte por data é só uma busca binária.
+# Atualizações entram como segmentos em <pasta>/segmentos/<n>/ e o meta.json guarda os intervalos
+# [inicio, fim) já cobertos; compactar_candles junta os segmentos de volta na base.
+COLUNAS_PRECO = ("open", "high", "low", "close", "volume", "quote_volume")
+ARQUIVO_META = "meta.json"
+PASTA_SEGMENTOS = "segmentos"
+
+
+def pasta_candles(raiz, symbol, granularity):
+    return os.path.join(raiz, symbol, granularity)
+
+
+def existe_candles(raiz, symbol, granularity):
+    return os.path.exists(os.path.join(pasta_candles(raiz, symbol, granularity), ARQUIVO_META))
+
+
+# 🔹 Padroniza qualquer DataFrame de candles: coluna "time" vira "timestamp" (int64 em ms),
+# preços viram float64 e as linhas ficam ordenadas e sem timestamps repetidos (vale a última)
+def normalizar_candles(df):
+    if "timestamp" not in df.columns and "time" in df.columns:
+        df = df.rename(columns={"time": "timestamp"})
+    tempo = df["timestamp"]
+    if pd.api.types.is_numeric_dtype(tempo):
+        ms = tempo.to_numpy(dtype=np.int64)
+    else:
+        datas = pd.to_datetime(tempo, utc=True).dt.tz_localize(None)
+        ms = datas.to_numpy().astype("datetime64[ms]").astype(np.int64)
+    colunas = {"timestamp": ms}
+    for nome in COLUNAS_PRECO:
+        if nome in df.columns:
+            colunas[nome] = df[nome].to_numpy(dtype=np.float64)
+    return _mesclar([colunas])
+
+
+# 🔹 Junta várias partes (a última tem prioridade em timestamps repetidos) em colunas ordenadas
+def _mesclar(partes):
+    nomes = [nome for nome in partes[0] if all(nome in parte for parte in partes)]
+    ms = np.concatenate([np.asarray(parte["timestamp"]) for parte in partes])
+    ordem = np.argsort(ms, kind="stable")
+    ms = ms[ordem]
+    ultimos = np.ones(len(ms), dtype=bool)
+    ultimos[:-1] = ms[1:] != ms[:-1]
+    selecao = ordem[ultimos]
+    candles = {"timestamp": ms[ultimos]}
+    for nome in nomes[1:]:
+        candles[nome] = np.concatenate([np.asarray(parte[nome]) for parte in partes])[selecao]
+    return candles
+
+
+# 🔹 Une intervalos [inicio, fim) que se tocam ou se sobrepõem
+def mesclar_intervalos(intervalos):
+    unidos = []
+    for inicio, fim in sorted(intervalos):
+        if unidos and inicio <= unidos[-1][1]:
+            unidos[-1][1] = max(unidos[-1][1], fim)
+        else:
+            unidos.append([inicio, fim])
+    return unidos
+
+
+def _cobertura_padrao(candles, granularity):
+    timestamps = candles["timestamp"]
+    if not len(timestamps):
+        return []
+    return [[int(timestamps[0]), int(timestamps[-1]) + GRANULARIDADES_MS.get(granularity, 1)]]
+
+
+def _gravar_colunas(pasta, candles):
+    os.makedirs(pasta)
+    for nome, valores in candles.items():
+        np.save(os.path.join(pasta, f"{nome}.npy"), np.ascontiguousarray(valores))
+
+
+# 🔹 O meta.json é sempre trocado de uma vez: é o ponto em que uma gravação passa a valer
+def _gravar_meta(pasta, meta):
+    temporario = os.path.join(pasta, f"{ARQUIVO_META}.tmp-{os.getpid()}")
+    with open(temporario, "w") as arquivo:
+        json.dump(meta, arquivo)
+    os.replace(temporario, os.path.join(pasta, ARQUIVO_META))
+
+
+# 🔹 Grava as colunas em uma pasta temporária e troca pela definitiva, para nunca deixar dados pela metade
+def salvar_candles(raiz, symbol, granularity, candles, cobertura=None):
+    pasta = pasta_candles(raiz, symbol, granularity)
+    temporaria = f"{pasta}.tmp-{os.getpid()}"
+    antiga = f"{pasta}.old-{os.getpid()}"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    _gravar_colunas(temporaria, candles)
+
+    timestamps = candles["timestamp"]
+    meta = {
+        "symbol": symbol,
+        "granularity": granularity,
+        "linhas": int(len(timestamps)),
+        "inicio": int(timestamps[0]) if len(timestamps) else None,
+        "fim": int(timestamps[-1]) if len(timestamps) else None,
+        "colunas": list(candles),
+        "cobertura": mesclar_intervalos(cobertura if cobertura is not None else _cobertura_padrao(candles, granularity)),
+        "segmentos": [],
+    }
+    _gravar_meta(temporaria, meta)
+
+    if os.path.exists(pasta):
+        os.replace(pasta, antiga)
+    os.replace(temporaria, pasta)
+    shutil.rmtree(antiga, ignore_errors=True)
+    return meta
+
+
+# 🔹 Acrescenta candles novos como um segmento, sem reescrever o que já está gravado
+def anexar_candles(raiz, symbol, granularity, candles, cobertura=None):
+    if not existe_candles(raiz, symbol, granularity):
+        return salvar_candles(raiz, symbol, granularity, candles, cobertura)
+
+    pasta = pasta_candles(raiz, symbol, granularity)
+    meta = ler_meta(raiz, symbol, granularity)
+    cobertura = cobertura if cobertura is not None else _cobertura_padrao(candles, granularity)
+    if len(candles["timestamp"]):
+        candles = {nome: valores for nome, valores in candles.items() if nome in meta["colunas"]}
+        numero = max((int(nome) for nome in meta["segmentos"]), default=0) + 1
+        nome_segmento = f"{numero:06d}"
+        destino = os.path.join(pasta, PASTA_SEGMENTOS, nome_segmento)
+        temporaria = f"{destino}.tmp-{os.getpid()}"
+        shutil.rmtree(temporaria, ignore_errors=True)
+        _gravar_colunas(temporaria, candles)
+        os.replace(temporaria, destino)
+
+        timestamps = candles["timestamp"]
+        meta["segmentos"].append(nome_segmento)
+        meta["linhas"] += int(len(timestamps))  # aproximado até a compactação remover repetidos
+        meta["inicio"] = int(min(timestamps[0], meta["inicio"] if meta["inicio"] is not None else timestamps[0]))
+        meta["fim"] = int(max(timestamps[-1], meta["fim"] if meta["fim"] is not None else timestamps[-1]))
+    meta["cobertura"] = mesclar_intervalos(meta["cobertura"] + [list(intervalo) for intervalo in cobertura])
+    _gravar_meta(pasta, meta)
+    return meta
+
+
+def ler_meta(raiz, symbol, granularity):
+    with open(os.path.join(pasta_candles(raiz, symbol, granularity), ARQUIVO_META)) as arquivo:
+        return json.load(arquivo)
+
+
+# 🔹 Importação única a partir de DataFrame, planilha, CSV ou da API da Bitget
+def importar_dataframe(df, raiz, symbol, granularity="1m"):
+    return salvar_candles(raiz, symbol, granularity, normalizar_candles(df))
+
+
+def importar_arquivo(caminho, raiz, symbol, granularity="1m"):
+    if caminho.lower().endswith(".csv"):
+        df = pd.read_csv(caminho)
+    else:
+        df = pd.read_excel(caminho)
+    return importar_dataframe(df, raiz, symbol, granularity)
+
+
+def importar_api(raiz, symbol, inicio, fim=None, product_type="susdt-futures", granularity="1m", **opcoes):
+    from backtesting_core.download import baixar_historico
+
+    df = baixar_historico(symbol, inicio, fim, product_type=product_type, granularity=granularity, **opcoes)
+    return importar_dataframe(df, raiz, symbol, granularity)
+
+
+# 🔹 Índices [i, j) dos candles com inicio <= timestamp < fim (busca binária no índice ordenado)
+def recorte(timestamps, inicio=None, fim=None):
+    i = 0 if inicio is None else int(np.searchsorted(timestamps, para_ms(inicio), side="left"))
+    j = len(timestamps) if fim is None else int(np.searchsorted(timestamps, para_ms(fim), side="left"))
+    return i, j
+
+
+# 🔹 Só as linhas com timestamp dentro de algum dos intervalos [inicio, fim) em ms; sobre colunas mapeadas,
+# apenas as páginas dessas linhas são lidas do disco
+def recortar_intervalos(candles, intervalos):
+    timestamps = candles["timestamp"]
+    intervalos = mesclar_intervalos([[int(inicio), int(fim)] for inicio, fim in intervalos])
+    inicios = np.searchsorted(timestamps, [inicio for inicio, _ in intervalos], side="left").astype(np.int64)
+    fins = np.searchsorted(timestamps, [fim for _, fim in intervalos], side="left").astype(np.int64)
+    tamanhos = fins - inicios
+    indices = np.repeat(inicios - np.cumsum(tamanhos) + tamanhos, tamanhos) + np.arange(tamanhos.sum())
+    return {nome: np.asarray(valores)[indices] for nome, valores in candles.items()}
+
+
+def _abrir_pasta(pasta, nomes, inicio, fim):
+    timestamps = np.load(os.path.join(pasta, "timestamp.npy"), mmap_mode="r")
+    i, j = recorte(timestamps, inicio, fim)
+    candles = {"timestamp": timestamps[i:j]}
+    for nome in nomes[1:]:
+        candles[nome] = np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r")[i:j]
+    return candles
+
+
+# 🔹 Abre as colunas com memória mapeada (sem cópia) já recortadas no período pedido.
+# Com segmentos ainda não compactados as partes são juntadas em memória (aí há cópia).
+def abrir_candles(raiz, symbol, granularity="1m", inicio=None, fim=None, colunas=None):
+    pasta = pasta_candles(raiz, symbol, granularity)
+    meta = ler_meta(raiz, symbol, granularity)
+    nomes = meta["colunas"] if colunas is None else ["timestamp", *[c for c in colunas if c != "timestamp"]]
+    candles = _abrir_pasta(pasta, nomes, inicio, fim)
+    if not meta["segmentos"]:
+        return candles
+    partes = [candles] + [
+        _abrir_pasta(os.path.join(pasta, PASTA_SEGMENTOS, segmento), nomes, inicio, fim)
+        for segmento in meta["segmentos"]
+    ]
+    return _mesclar(partes)
+
+
+# 🔹 Junta base e segmentos em uma única base ordenada (volta a abrir sem cópia)
+def compactar_candles(raiz, symbol, granularity="1m"):
+    meta = ler_meta(raiz, symbol, granularity)
+    if not meta["segmentos"]:
+        return meta
+    candles = {nome: np.array(valores) for nome, valores in abrir_candles(raiz, symbol, granularity).items()}
+    return salvar_candles(raiz, symbol, granularity, candles, meta["cobertura"])
+
+
+# 🔹 DataFrame no formato dos scripts ("timestamp" como data); este passo copia as colunas
+@perfil.cronometrar("dataframe")
+def para_dataframe(candles):
+    df = pd.DataFrame({nome: np.asarray(valores) for nome, valores in candles.items()})
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+# 🔹 Carrega o período do armazenamento; na primeira vez importa o arquivo de origem (xlsx/csv)
+@perfil.cronometrar("carregar")
+def carregar_dataframe(raiz, symbol, granularity="1m", inicio=None, fim=None, origem=None):
+    if not existe_candles(raiz, symbol, granularity):
+        if origem is None:
+            raise FileNotFoundError(f"Sem candles de {symbol} {granularity} em {raiz}; importe os dados primeiro")
+        importar_arquivo(origem, raiz, symbol, granularity)
+    return para_dataframe(abrir_candles(raiz, symbol, granularity, inicio, fim))
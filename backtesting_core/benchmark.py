@@ -0,0 +1,342 @@
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from backtesting_core import armazenamento
+
+# 🔹 Benchmark dos estágios de cada script sobre candles 1m sintéticos (1e3 a 1e8 candles):
+# carregar (armazenamento -> DataFrame), indicadores, sinais e execução (SL/TP).
+# Cada caso roda num processo novo, mede tempo, candles/s e pico de memória (RSS) por estágio,
+# e a comparação com uma baseline gravada falha quando algum estágio piora além da tolerância.
+ESTAGIOS = ("carregar", "indicadores", "sinais", "execucao")
+BLOCO_GERACAO = 1 << 22
+INICIO_SINTETICO = 1_704_067_200_000  # 2024-01-01 00:00 UTC
+PASSO_1M = 60_000
+
+# 🔹 Um caso por script: indicadores, estratégia e regras de execução iguais às do script
+CASOS = {
+    "padrao": {
+        "script": "Backtesting_padrao.py",
+        "estrategia": "exemplo",
+        "indicadores": [],
+    },
+    "estocastica": {
+        "script": "backtesting_stoch.py",
+        "estrategia": "estocastica",
+        "indicadores": [("estocastico", {"periodo": 14})],
+        "regras": {"saida_reversa": True},
+    },
+    "trix": {
+        "script": "backtesting_TRIX.py",
+        "estrategia": "trix",
+        "indicadores": [("trix", {"periodo": 14})],
+        "regras": {"saida_reversa": True, "take_profit_long": 1.02, "take_profit_short": 0.98,
+                   "fechamento_forcado": False},
+    },
+    "trix_estocastico": {
+        "script": "backtesting_stoch+TRIX.py",
+        "estrategia": "trix_estocastico",
+        "indicadores": [("trix", {"periodo": 14}), ("estocastico", {"periodo": 14})],
+    },
+    "trix_estocastico_adx": {
+        "script": "backtesting_stoch+TRIX+ADX.py",
+        "estrategia": "trix_estocastico",
+        "indicadores": [("trix", {"periodo": 14}), ("estocastico", {"periodo": 14}), ("adx", {"periodo": 14})],
+        "params": {"adx_minimo": 20},
+    },
+    "trix_estocastico_delta": {
+        "script": "backtesting_ADX+TRIX+STOCH.py",
+        "estrategia": "trix_estocastico",
+        "indicadores": [("trix", {"periodo": 18}), ("estocastico", {"periodo": 14}), ("adx", {"periodo": 14})],
+        "params": {"adx_minimo": 20, "trix_delta_negativo": True},
+    },
+    "trix_estocastico_v02": {
+        "script": "backtesting_ADX+TRIX+STOCH_v02.py",
+        "estrategia": "trix_estocastico",
+        "indicadores": [("trix", {"periodo": 18}), ("estocastico", {"periodo": 14}), ("adx", {"periodo": 14})],
+        "params": {"adx_minimo": 20},
+    },
+    "trix_adx": {
+        "script": "backtesting_ADX+TRIX.py",
+        "estrategia": "trix_adx",
+        "indicadores": [("trix", {"periodo": 18}), ("adx", {"periodo": 14})],
+    },
+    "sma_trix_adx": {
+        "script": "backtesting_MM+TRIX+ADX.py",
+        "estrategia": "sma_trix_adx",
+        "indicadores": [("sma", {"periodo": 14}), ("trix", {"periodo": 14}), ("adx", {"periodo": 14})],
+        "saida_com_adx_abaixo": 20,  # SL/TP só são verificados com ADX < 20
+    },
+    "mme_adx_obv": {
+        "script": "backtesting_v03.py",
+        "estrategia": "mme_adx_obv",
+        "indicadores": [("mme", {"periodo": 9}), ("mme", {"periodo": 21}), ("rsi", {"periodo": 14}), ("obv", {}),
+                        ("adx", {"periodo": 14, "variante": "true_range"})],
+    },
+}
+
+
+# 🔹 Candles 1m sintéticos: passeio aleatório log-normal, com open = close anterior e sombras aleatórias.
+# Cada coluna aleatória tem o seu fluxo (filhos da semente via SeedSequence.spawn) e os blocos começam sempre em
+# múltiplos de `bloco`, a partir do último close: para a mesma semente e o mesmo `bloco`, os primeiros k candles
+# saem iguais qualquer que seja o tamanho pedido.
+def _geradores(semente):
+    filhos = np.random.SeedSequence(semente).spawn(4)
+    return dict(zip(("retornos", "high", "low", "volume"), (np.random.default_rng(filho) for filho in filhos)))
+
+
+def _bloco_sintetico(geradores, inicio, n, close_anterior, volatilidade):
+    retornos = geradores["retornos"].normal(0.0, volatilidade, n)
+    close = close_anterior * np.exp(np.cumsum(retornos))
+    open_ = np.empty(n)
+    open_[0] = close_anterior
+    open_[1:] = close[:-1]
+    topo = np.maximum(open_, close)
+    fundo = np.minimum(open_, close)
+    high = topo * (1.0 + np.abs(geradores["high"].normal(0.0, volatilidade / 2, n)))
+    low = fundo * (1.0 - np.abs(geradores["low"].normal(0.0, volatilidade / 2, n)))
+    volume = geradores["volume"].exponential(10.0, n)
+    candles = {
+        "timestamp": INICIO_SINTETICO + PASSO_1M * np.arange(inicio, inicio + n, dtype=np.int64),
+        "open": np.round(open_, 1),
+        "high": np.round(high, 1),
+        "low": np.round(low, 1),
+        "close": np.round(close, 1),
+        "volume": np.round(volume, 4),
+    }
+    candles["quote_volume"] = np.round(candles["volume"] * candles["close"], 2)
+    return candles, float(close[-1])
+
+
+def gerar_ohlcv(n, semente=0, preco_inicial=30000.0, volatilidade=0.0008, bloco=BLOCO_GERACAO):
+    geradores = _geradores(semente)
+    close = preco_inicial
+    blocos = []
+    for inicio in range(0, n, bloco):
+        candles, close = _bloco_sintetico(geradores, inicio, min(bloco, n - inicio), close, volatilidade)
+        blocos.append(candles)
+    return {nome: np.concatenate([candles[nome] for candles in blocos]) for nome in blocos[0]}
+
+
+# 🔹 Grava `n` candles sintéticos direto no armazenamento colunar, bloco a bloco em .npy mapeados
+# (1e8 candles não precisam caber na memória). Reaproveita o que já foi gerado com o mesmo tamanho/semente.
+def gravar_sinteticos(raiz, n, semente=0, preco_inicial=30000.0, volatilidade=0.0008, bloco=BLOCO_GERACAO):
+    symbol = f"SINTETICO{n}S{semente}"
+    if armazenamento.existe_candles(raiz, symbol, "1m"):
+        return symbol
+    pasta = armazenamento.pasta_candles(raiz, symbol, "1m")
+    temporaria = f"{pasta}.tmp-{os.getpid()}"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+    tipos = {"timestamp": np.int64}
+    colunas = {
+        nome: np.lib.format.open_memmap(os.path.join(temporaria, f"{nome}.npy"), mode="w+",
+                                        dtype=tipos.get(nome, np.float64), shape=(n,))
+        for nome in ("timestamp", *armazenamento.COLUNAS_PRECO)
+    }
+    geradores = _geradores(semente)
+    close = preco_inicial
+    for inicio in range(0, n, bloco):
+        candles, close = _bloco_sintetico(geradores, inicio, min(bloco, n - inicio), close, volatilidade)
+        for nome, valores in candles.items():
+            colunas[nome][inicio:inicio + len(valores)] = valores
+    for valores in colunas.values():
+        valores.flush()
+    fim = INICIO_SINTETICO + PASSO_1M * n
+    armazenamento._gravar_meta(temporaria, {
+        "symbol": symbol,
+        "granularity": "1m",
+        "linhas": n,
+        "inicio": INICIO_SINTETICO,
+        "fim": fim - PASSO_1M,
+        "colunas": list(colunas),
+        "cobertura": [[INICIO_SINTETICO, fim]],
+        "segmentos": [],
+    })
+    del colunas
+    os.replace(temporaria, pasta)
+    return symbol
+
+
+# 🔹 Pico de RSS por estágio: no Linux o pico do processo (VmHWM) pode ser zerado escrevendo em clear_refs;
+# onde isso não existe, cai no pico do processo inteiro (ru_maxrss), que só cresce.
+def _zerar_pico_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as arquivo:
+            arquivo.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _pico_rss_mb():
+    try:
+        with open("/proc/self/status") as arquivo:
+            for linha in arquivo:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _medir(funcao, n):
+    _zerar_pico_rss()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    segundos = time.perf_counter() - inicio
+    return resultado, {
+        "segundos": segundos,
+        "barras_por_s": n / segundos if segundos > 0 else float("inf"),
+        "pico_rss_mb": _pico_rss_mb(),
+    }
+
+
+def _estagios(caso, raiz, symbol, n):
+    # imports aqui: o processo do caso mede também o custo de carregar cada parte só quando ela é usada
+    from backtesting_core.estrategias import ESTRATEGIAS
+    from backtesting_core.execucao import executar_sinais
+    from backtesting_core.indicadores import calcular_indicadores
+    from backtesting_core.sinais import gerar_sinais
+
+    config = CASOS[caso]
+    regras = dict(config.get("regras", {}))
+    medidas = {}
+    df, medidas["carregar"] = _medir(lambda: armazenamento.carregar_dataframe(raiz, symbol, "1m"), n)
+    df, medidas["indicadores"] = _medir(lambda: calcular_indicadores(df, config["indicadores"]), n)
+    sinais, medidas["sinais"] = _medir(
+        lambda: gerar_sinais(df, ESTRATEGIAS[config["estrategia"]], **config.get("params", {})), n)
+    if "saida_com_adx_abaixo" in config:
+        regras["verificar_saida"] = df["ADX"].to_numpy() < config["saida_com_adx_abaixo"]
+    _, medidas["execucao"] = _medir(lambda: executar_sinais(df, sinais, 10000, 0.001, **regras), n)
+    return medidas
+
+
+# 🔹 Roda um caso (no processo filho): aquece numba/imports com 1000 candles e fica com a melhor de `repeticoes`
+def rodar_caso(caso, raiz, n, repeticoes=3, semente=0):
+    _estagios(caso, raiz, gravar_sinteticos(raiz, min(n, 1000), semente), min(n, 1000))
+    symbol = gravar_sinteticos(raiz, n, semente)
+    melhores = {}
+    for _ in range(repeticoes):
+        for estagio, medida in _estagios(caso, raiz, symbol, n).items():
+            atual = melhores.get(estagio)
+            if atual is None:
+                melhores[estagio] = medida
+                continue
+            pico = max(atual["pico_rss_mb"], medida["pico_rss_mb"])
+            if medida["segundos"] < atual["segundos"]:
+                melhores[estagio] = medida
+            melhores[estagio]["pico_rss_mb"] = pico
+    return melhores
+
+
+def chave(caso, n, estagio):
+    return f"{caso}/{n}/{estagio}"
+
+
+def executar_benchmark(casos=None, tamanhos=(1_000, 10_000, 100_000, 1_000_000), raiz=None, repeticoes=3, semente=0,
+                       ao_terminar=None):
+    casos = list(CASOS) if casos is None else list(casos)
+    desconhecidos = [caso for caso in casos if caso not in CASOS]
+    if desconhecidos:
+        raise ValueError(f"casos desconhecidos: {', '.join(desconhecidos)} (disponíveis: {', '.join(CASOS)})")
+    raiz = raiz or os.path.join(os.getcwd(), "dados_benchmark")
+    for n in tamanhos:
+        gravar_sinteticos(raiz, n, semente)  # fora da medição: gerar não é estágio de script
+    resultados = {}
+    contexto = get_context("spawn")  # processo limpo por caso: pico de memória e caches não vazam entre casos
+    for n in tamanhos:
+        for caso in casos:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                medidas = executor.submit(rodar_caso, caso, raiz, n, repeticoes, semente).result()
+            for estagio, medida in medidas.items():
+                resultados[chave(caso, n, estagio)] = medida
+            if ao_terminar is not None:
+                ao_terminar(caso, n, medidas)
+    return resultados
+
+
+# 🔹 Compara com a baseline: piora de tempo acima de `tolerancia` (e de pelo menos `folga_s`, para não falhar
+# por ruído em estágios de milissegundos) ou de memória acima de `tolerancia_rss` conta como regressão
+def comparar(resultados, baseline, tolerancia=0.25, folga_s=0.005, tolerancia_rss=0.25, folga_rss_mb=16.0):
+    regressoes = []
+    for nome, atual in resultados.items():
+        antes = baseline.get(nome)
+        if antes is None:
+            continue
+        limite = max(antes["segundos"] * (1 + tolerancia), antes["segundos"] + folga_s)
+        if atual["segundos"] > limite:
+            regressoes.append(f"{nome}: {atual['segundos']:.4f}s > {limite:.4f}s (baseline {antes['segundos']:.4f}s)")
+        if not (math.isnan(atual["pico_rss_mb"]) or math.isnan(antes["pico_rss_mb"])):
+            limite_rss = max(antes["pico_rss_mb"] * (1 + tolerancia_rss), antes["pico_rss_mb"] + folga_rss_mb)
+            if atual["pico_rss_mb"] > limite_rss:
+                regressoes.append(f"{nome}: pico RSS {atual['pico_rss_mb']:.1f} MB > {limite_rss:.1f} MB "
+                                  f"(baseline {antes['pico_rss_mb']:.1f} MB)")
+    return regressoes
+
+
+def _imprimir(caso, n, medidas):
+    for estagio in ESTAGIOS:
+        medida = medidas[estagio]
+        print(f"{caso:<24} {n:>11,} {estagio:<12} {medida['segundos']:>10.4f}s "
+              f"{medida['barras_por_s']:>14,.0f} candles/s {medida['pico_rss_mb']:>9.1f} MB", flush=True)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark dos estágios dos backtests com candles sintéticos")
+    parser.add_argument("--bars", nargs="+", type=float, default=[1e3, 1e4, 1e5, 1e6],
+                        help="tamanhos em candles (ex.: 1e3 1e6 1e8)")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=None)
+    parser.add_argument("--pasta", default="dados_benchmark", help="onde ficam os candles sintéticos")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="piora relativa aceita no tempo")
+    parser.add_argument("--tolerancia-rss", type=float, default=0.25, help="piora relativa aceita no pico de RSS")
+    parser.add_argument("--saida", help="grava os resultados desta execução em JSON")
+    args = parser.parse_args(argv)
+
+    tamanhos = [int(n) for n in args.bars]
+    resultados = executar_benchmark(args.casos, tamanhos, args.pasta, args.repeticoes, args.semente, _imprimir)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, indent=2)
+    if args.salvar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(resultados)
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(baseline, arquivo, indent=2, sort_keys=True)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"Sem baseline em {args.baseline}; rode com --salvar-baseline para criar uma")
+        return 0
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        regressoes = comparar(resultados, json.load(arquivo), args.tolerancia, tolerancia_rss=args.tolerancia_rss)
+    for regressao in regressoes:
+        print(f"❌ {regressao}")
+    if not regressoes:
+        print("✅ Nenhum estágio piorou em relação à baseline")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
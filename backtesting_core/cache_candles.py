@@ -0,0 +1,104 @@
+import os
+import time
+
+import numpy as np
+
+from backtesting_core import armazenamento, perfil
+from backtesting_core.download import (
+    GRANULARIDADES_MS, LIMITE_POR_PAGINA, baixar_historico, baixar_intervalos, para_ms,
+)
+
+# 🔹 Cache incremental na frente do downloader: <raiz>/<productType>/<symbol>/<granularity>/.
+# Só os pedaços de [inicio, fim) que ainda não estão cobertos são baixados e entram como segmentos novos.
+SEGMENTOS_PARA_COMPACTAR = 8
+
+
+# 🔹 Partes de [inicio, fim) que não estão na cobertura (lista de [inicio, fim) já unidos e ordenados)
+def lacunas(cobertura, inicio, fim):
+    faltando = []
+    cursor = inicio
+    for coberto_inicio, coberto_fim in cobertura:
+        if coberto_fim <= cursor:
+            continue
+        if coberto_inicio >= fim:
+            break
+        if coberto_inicio > cursor:
+            faltando.append((cursor, coberto_inicio))
+        cursor = max(cursor, coberto_fim)
+        if cursor >= fim:
+            break
+    if cursor < fim:
+        faltando.append((cursor, fim))
+    return faltando
+
+
+# 🔹 Devolve os candles de [inicio, fim) baixando apenas as lacunas; sem `fim`, vai até o último candle fechado
+# e sem `inicio` pega os últimos 200 candles (o mesmo período da antiga chamada única à API)
+@perfil.cronometrar("carregar")
+def obter_candles(raiz, symbol, inicio=None, fim=None, product_type="susdt-futures", granularity="1m",
+                  baixar=baixar_historico, compactar_apos=SEGMENTOS_PARA_COMPACTAR, **opcoes):
+    passo = GRANULARIDADES_MS[granularity]
+    agora_fechado = int(time.time() * 1000) // passo * passo  # o candle que começa agora ainda está aberto
+    fim_ms = min(para_ms(fim), agora_fechado) if fim is not None else agora_fechado
+    inicio_ms = para_ms(inicio) // passo * passo if inicio is not None else fim_ms - passo * LIMITE_POR_PAGINA
+    raiz_produto = os.path.join(raiz, product_type)
+
+    cobertura = []
+    if armazenamento.existe_candles(raiz_produto, symbol, granularity):
+        cobertura = armazenamento.ler_meta(raiz_produto, symbol, granularity)["cobertura"]
+
+    faltando = lacunas(cobertura, inicio_ms, fim_ms)
+    perfil.contar("carregar", "cache_falhas" if faltando else "cache_acertos")
+    perfil.contar("carregar", "lacunas_baixadas", len(faltando))
+    for lacuna_inicio, lacuna_fim in faltando:
+        df = baixar(symbol, lacuna_inicio, lacuna_fim, product_type=product_type, granularity=granularity, **opcoes)
+        candles = armazenamento.normalizar_candles(df)
+        armazenamento.anexar_candles(raiz_produto, symbol, granularity, candles, [[lacuna_inicio, lacuna_fim]])
+
+    if not armazenamento.existe_candles(raiz_produto, symbol, granularity):
+        return {"timestamp": np.empty(0, dtype=np.int64)}
+    if len(armazenamento.ler_meta(raiz_produto, symbol, granularity)["segmentos"]) >= compactar_apos:
+        armazenamento.compactar_candles(raiz_produto, symbol, granularity)
+    return armazenamento.abrir_candles(raiz_produto, symbol, granularity, inicio_ms, fim_ms)
+
+
+# 🔹 Vários intervalos [inicio, fim) em ms de uma vez (ex.: candles finos de barras espalhadas pelo histórico):
+# as lacunas de todos são baixadas num único lote e entram no armazenamento como um único segmento
+@perfil.cronometrar("carregar")
+def obter_intervalos(raiz, symbol, intervalos, product_type="susdt-futures", granularity="1m",
+                     baixar=baixar_intervalos, compactar_apos=SEGMENTOS_PARA_COMPACTAR, **opcoes):
+    intervalos = armazenamento.mesclar_intervalos([[int(inicio), int(fim)] for inicio, fim in intervalos])
+    raiz_produto = os.path.join(raiz, product_type)
+
+    cobertura = []
+    if armazenamento.existe_candles(raiz_produto, symbol, granularity):
+        cobertura = armazenamento.ler_meta(raiz_produto, symbol, granularity)["cobertura"]
+    faltando = [lacuna for inicio, fim in intervalos for lacuna in lacunas(cobertura, inicio, fim)]
+    perfil.contar("carregar", "cache_falhas" if faltando else "cache_acertos")
+    perfil.contar("carregar", "lacunas_baixadas", len(faltando))
+    if faltando:
+        df = baixar(symbol, faltando, product_type=product_type, granularity=granularity, **opcoes)
+        candles = armazenamento.normalizar_candles(df)
+        armazenamento.anexar_candles(raiz_produto, symbol, granularity, candles, [list(lacuna) for lacuna in faltando])
+
+    if not armazenamento.existe_candles(raiz_produto, symbol, granularity):
+        return {"timestamp": np.empty(0, dtype=np.int64)}
+    if len(armazenamento.ler_meta(raiz_produto, symbol, granularity)["segmentos"]) >= compactar_apos:
+        armazenamento.compactar_candles(raiz_produto, symbol, granularity)
+    candles = armazenamento.abrir_candles(raiz_produto, symbol, granularity)
+    return armazenamento.recortar_intervalos(candles, intervalos)
+
+
+# 🔹 Versão em DataFrame, no formato de get_historical_data. Com `timeframe` (ex.: "15m", "1H") os candles são
+# baixados/atualizados na `granularity` e reamostrados a partir dela, sem um download separado por timeframe.
+def obter_dataframe(raiz, symbol, inicio=None, fim=None, product_type="susdt-futures", granularity="1m",
+                    timeframe=None, **opcoes):
+    candles = obter_candles(raiz, symbol, inicio, fim, product_type, granularity, **opcoes)
+    if timeframe is None or timeframe == granularity or not len(candles["timestamp"]):
+        return armazenamento.para_dataframe(candles)
+    from backtesting_core.reamostragem import carregar_reamostrado, inicio_candle
+
+    timestamps = candles["timestamp"]
+    inicio_ms = int(inicio_candle(timestamps[:1], timeframe)[0])
+    fim_ms = int(timestamps[-1]) + GRANULARIDADES_MS[granularity]
+    return carregar_reamostrado(os.path.join(raiz, product_type), symbol, timeframe, inicio_ms, fim_ms, granularity)
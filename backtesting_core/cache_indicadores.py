@@ -0,0 +1,216 @@
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from backtesting_core import perfil
+
+# 🔹 Memoização de indicadores: a chave é (impressão digital dos dados, período, indicador, parâmetros).
+# Primeiro nível em memória (LRU com limite de bytes) e segundo nível opcional em disco (.npy por coluna),
+# que pode ser compartilhado entre execuções e entre os processos de uma varredura.
+COLUNAS_BASE = ("timestamp", "time", "open", "high", "low", "close", "volume", "quote_volume")
+LIMITE_PADRAO = 512 * 1024 * 1024
+
+# Impressões digitais de buffers somente leitura (memmap do armazenamento, memória compartilhada):
+# como ninguém pode alterá-los, o hash é calculado uma única vez enquanto o objeto dono da memória existir.
+# A chave leva o id desse dono (e não só o endereço, que um bloco novo pode reaproveitar depois que o antigo é
+# liberado) e a entrada sai do dicionário quando o dono é coletado ou com esquecer_buffers().
+_DIGITAIS_BUFFERS = {}
+
+
+# Objeto dono da memória de um array somente leitura (mmap, memoryview ou o próprio array); None se gravável
+def _dono_imutavel(valores):
+    while isinstance(valores, np.ndarray):
+        if valores.flags.writeable:
+            return None
+        if valores.base is None:
+            return valores
+        valores = valores.base
+    return valores
+
+
+def _hash(valores):
+    # sha256 costuma ter aceleração por hardware e sai mais rápido que blake2b em buffers grandes
+    return hashlib.sha256(np.ascontiguousarray(valores).view(np.uint8)).hexdigest()[:32]
+
+
+def _digital_coluna(valores):
+    dono = _dono_imutavel(valores)
+    if dono is None or getattr(dono, "closed", False):
+        return _hash(valores)
+    chave = (id(dono), valores.__array_interface__["data"][0], valores.shape, valores.strides, valores.dtype.str)
+    digital = _DIGITAIS_BUFFERS.get(chave)
+    if digital is None:
+        digital = _hash(valores)
+        try:
+            weakref.finalize(dono, _DIGITAIS_BUFFERS.pop, chave, None)
+        except TypeError:  # dono sem weakref (bytes): sem como saber quando a memória some, não memoriza
+            return digital
+        _DIGITAIS_BUFFERS[chave] = digital
+    return digital
+
+
+# 🔹 Descarta as impressões digitais guardadas para a memória destes arrays (chamado ao fechar um conjunto
+# compartilhado, antes que o bloco seja liberado e o endereço possa ser reaproveitado)
+def esquecer_buffers(arrays):
+    donos = {id(dono) for dono in map(_dono_imutavel, arrays) if dono is not None}
+    for chave in [chave for chave in list(_DIGITAIS_BUFFERS) if chave[0] in donos]:
+        _DIGITAIS_BUFFERS.pop(chave, None)
+
+
+# 🔹 Impressão digital do conjunto de dados: hash das colunas OHLC/tempo presentes
+def impressao_digital(df):
+    partes = []
+    for nome in COLUNAS_BASE:
+        if nome in df:
+            valores = df[nome].to_numpy() if hasattr(df[nome], "to_numpy") else np.asarray(df[nome])
+            if valores.dtype == object:
+                valores = valores.astype(str).astype("U")
+            partes.append(f"{nome}:{_digital_coluna(valores)}")
+    return hashlib.blake2b("|".join(partes).encode(), digest_size=16).hexdigest()
+
+
+def _periodo(df):
+    for nome in ("timestamp", "time"):
+        if nome in df and len(df[nome]):
+            valores = np.asarray(df[nome])
+            return str(valores[0]), str(valores[-1]), len(valores)
+    return None, None, len(df["close"])
+
+
+class CacheIndicadores:
+    def __init__(self, limite_bytes=LIMITE_PADRAO, pasta=None):
+        self.limite_bytes = limite_bytes
+        self.pasta = pasta
+        self.entradas = OrderedDict()
+        self.bytes = 0
+        self.acertos = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.trava = threading.Lock()
+
+    def chave(self, df, nome, params):
+        parametros = ",".join(f"{k}={params[k]!r}" for k in sorted(params))
+        texto = f"{impressao_digital(df)}|{_periodo(df)}|{nome}|{parametros}"
+        return hashlib.blake2b(texto.encode(), digest_size=20).hexdigest()
+
+    def obter(self, chave):
+        with self.trava:
+            colunas = self.entradas.get(chave)
+            if colunas is not None:
+                self.entradas.move_to_end(chave)
+                self.acertos += 1
+                perfil.contar("indicadores", "cache_acertos")
+                return colunas
+        colunas = self._ler_disco(chave)
+        with self.trava:
+            if colunas is None:
+                self.falhas += 1
+                perfil.contar("indicadores", "cache_falhas")
+                return None
+            self.acertos_disco += 1
+            perfil.contar("indicadores", "cache_acertos_disco")
+        self._guardar_memoria(chave, colunas)
+        return colunas
+
+    def guardar(self, chave, colunas):
+        colunas = {nome: np.asarray(valores) for nome, valores in colunas.items()}
+        for valores in colunas.values():
+            valores.flags.writeable = False  # quem recebe do cache não pode alterar a entrada compartilhada
+        self._guardar_memoria(chave, colunas)
+        self._gravar_disco(chave, colunas)
+
+    def _guardar_memoria(self, chave, colunas):
+        tamanho = sum(valores.nbytes for valores in colunas.values())
+        if tamanho > self.limite_bytes:
+            return
+        with self.trava:
+            if chave in self.entradas:
+                return
+            self.entradas[chave] = colunas
+            self.bytes += tamanho
+            while self.bytes > self.limite_bytes:
+                _, removidas = self.entradas.popitem(last=False)
+                self.bytes -= sum(valores.nbytes for valores in removidas.values())
+
+    def _ler_disco(self, chave):
+        if self.pasta is None:
+            return None
+        pasta = os.path.join(self.pasta, chave)
+        if not os.path.isdir(pasta):
+            return None
+        return {
+            arquivo[:-4]: np.load(os.path.join(pasta, arquivo), mmap_mode="r")
+            for arquivo in sorted(os.listdir(pasta)) if arquivo.endswith(".npy")
+        }
+
+    def _gravar_disco(self, chave, colunas):
+        if self.pasta is None:
+            return
+        destino = os.path.join(self.pasta, chave)
+        if os.path.isdir(destino):
+            return
+        temporaria = f"{destino}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(temporaria, exist_ok=True)
+        for nome, valores in colunas.items():
+            np.save(os.path.join(temporaria, f"{nome}.npy"), valores)
+        try:
+            os.replace(temporaria, destino)
+        except OSError:  # outro processo gravou a mesma entrada primeiro
+            shutil.rmtree(temporaria, ignore_errors=True)
+
+    def limpar(self):
+        with self.trava:
+            self.entradas.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        return {
+            "acertos": self.acertos,
+            "acertos_disco": self.acertos_disco,
+            "falhas": self.falhas,
+            "entradas": len(self.entradas),
+            "bytes": self.bytes,
+        }
+
+
+CACHE_PADRAO = CacheIndicadores()
+
+
+# 🔹 Calcula (ou recupera do cache) as colunas que `func(df, **params)` acrescenta ao DataFrame.
+# O indicador roda sobre uma cópia só das colunas base, então colunas antigas do df não entram na chave.
+def calcular(df, func, cache=None, nome=None, **params):
+    cache = CACHE_PADRAO if cache is None else cache
+    nome = nome or f"{func.__module__}.{func.__qualname__}"
+    chave = cache.chave(df, nome, params)
+    colunas = cache.obter(chave)
+    if colunas is None:
+        base = df[[coluna for coluna in df.columns if coluna in COLUNAS_BASE]].copy()
+        resultado = func(base, **params)
+        colunas = {coluna: resultado[coluna].to_numpy() for coluna in resultado.columns if coluna not in COLUNAS_BASE}
+        cache.guardar(chave, colunas)
+    for coluna, valores in colunas.items():
+        df[coluna] = valores
+    return df
+
+
+# 🔹 Decorador: calcular_trix = memorizar(calcular_trix) passa a consultar o cache antes de recalcular
+def memorizar(func=None, cache=None):
+    if func is None:
+        return functools.partial(memorizar, cache=cache)
+    assinatura = inspect.signature(func)
+
+    @functools.wraps(func)
+    def memorizada(df, *args, **kwargs):
+        argumentos = assinatura.bind(df, *args, **kwargs)
+        argumentos.apply_defaults()
+        params = dict(list(argumentos.arguments.items())[1:])
+        return calcular(df, func, cache=cache, **params)
+
+    return memorizada
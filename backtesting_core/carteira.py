@@ -0,0 +1,336 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core import armazenamento
+from backtesting_core.estrategias import ESTRATEGIAS
+from backtesting_core.execucao import (
+    ALVO, BTC, ENTRADA, EVENTO_BUY, EVENTO_FECHAMENTO, EVENTO_LOSS_SL, EVENTO_SELL, EVENTO_WIN_REVERSE,
+    EVENTO_WIN_TP, LADO, LONG, LOSS_LONG, LOSS_SHORT, ROTULOS_EVENTOS, SHORT, STOP, USD, WIN_LONG, WIN_REVERSE,
+    WIN_SHORT, contagem_trades, tempos_ms,
+)
+from backtesting_core.indicadores import calcular_indicadores
+from backtesting_core.sinais import COMPRA, VENDA, gerar_sinais
+
+try:
+    from numba import njit
+except ImportError:  # numba é opcional: sem ele o mesmo núcleo roda em Python puro
+    njit = None
+
+# 🔹 Backtest de carteira: vários símbolos operando sobre um único saldo em USDT.
+# Os candles de todos os símbolos são alinhados numa grade de tempo comum; a cada instante os símbolos são
+# processados na ordem da lista (quem vem primeiro usa o caixa primeiro) com as mesmas regras de SL/TP/saída
+# reversa do núcleo de execução. Cada símbolo tem sua posição e o patrimônio da carteira é marcado a mercado
+# a cada instante. Carregar os candles e calcular os indicadores roda em paralelo por símbolo (threads: os
+# núcleos dos indicadores liberam o GIL), então o tempo total fica perto do símbolo mais lento.
+# Nas linhas da matriz de posições, a coluna USD guarda o resultado realizado do símbolo.
+BLOCO_PYTHON = 1 << 16
+
+
+# 🔹 Núcleo da carteira: `close`/`high`/`low`/`sinais`/`presente` vêm achatados no formato [tempo * n_simbolos + s].
+# Escrito só com operações escalares para poder ser compilado pelo numba sem alterações.
+def _processar_carteira(close, high, low, sinais, presente, verificar_saida, n_simbolos, deslocamento, caixa,
+                        posicoes, contadores, ultimo_close, tamanhos, fracao, sl_long, tp_long, sl_short, tp_short,
+                        saida_reversa, patrimonio, ev_codigo, ev_preco, ev_indice, ev_simbolo, n_ev):
+    usd = caixa[0]
+    sempre_verificar = len(verificar_saida) == 0
+
+    for t in range(len(close) // n_simbolos):
+        if n_ev + 2 * n_simbolos > ev_codigo.shape[0]:
+            capacidade = max(2 * ev_codigo.shape[0], 64 + 2 * n_simbolos)
+            novo_codigo = np.empty(capacidade, dtype=np.int8)
+            novo_preco = np.empty(capacidade, dtype=np.float64)
+            novo_indice = np.empty(capacidade, dtype=np.int64)
+            novo_simbolo = np.empty(capacidade, dtype=np.int32)
+            novo_codigo[:n_ev] = ev_codigo[:n_ev]
+            novo_preco[:n_ev] = ev_preco[:n_ev]
+            novo_indice[:n_ev] = ev_indice[:n_ev]
+            novo_simbolo[:n_ev] = ev_simbolo[:n_ev]
+            ev_codigo = novo_codigo
+            ev_preco = novo_preco
+            ev_indice = novo_indice
+            ev_simbolo = novo_simbolo
+
+        for s in range(n_simbolos):
+            k = t * n_simbolos + s
+            if not presente[k]:
+                continue
+            price = close[k]
+            ordem = sinais[k]
+            ultimo_close[s] = price
+            lado = posicoes[s, LADO]
+            entrada = posicoes[s, ENTRADA]
+            codigo = 0
+            saida = 0.0
+
+            # Verifica se há posição aberta e aplica Stop Loss ou Take Profit
+            if lado != 0.0 and (sempre_verificar or verificar_saida[k]):
+                if saida_reversa and ((lado == LONG and ordem == VENDA) or (lado == SHORT and ordem == COMPRA)):
+                    codigo = EVENTO_WIN_REVERSE
+                    saida = price
+                elif lado == LONG:
+                    if high[k] >= posicoes[s, ALVO]:
+                        codigo = EVENTO_WIN_TP
+                        saida = posicoes[s, ALVO]
+                    elif low[k] <= posicoes[s, STOP]:
+                        codigo = EVENTO_LOSS_SL
+                        saida = posicoes[s, STOP]
+                elif lado == SHORT:
+                    if low[k] <= posicoes[s, ALVO]:
+                        codigo = EVENTO_WIN_TP
+                        saida = posicoes[s, ALVO]
+                    elif high[k] >= posicoes[s, STOP]:
+                        codigo = EVENTO_LOSS_SL
+                        saida = posicoes[s, STOP]
+
+            if codigo != 0:
+                if lado == LONG:
+                    recebido = posicoes[s, BTC] * saida
+                    usd += recebido
+                    posicoes[s, USD] += recebido - posicoes[s, BTC] * entrada
+                    contadores[s, LOSS_LONG if codigo == EVENTO_LOSS_SL else WIN_LONG] += 1
+                else:
+                    resultado = (entrada - saida) * tamanhos[s]
+                    usd += resultado
+                    posicoes[s, USD] += resultado
+                    contadores[s, LOSS_SHORT if codigo == EVENTO_LOSS_SL else WIN_SHORT] += 1
+                if codigo == EVENTO_WIN_REVERSE:
+                    contadores[s, WIN_REVERSE] += 1
+                posicoes[s, BTC] = 0.0
+                posicoes[s, LADO] = 0.0
+                lado = 0.0
+                ev_codigo[n_ev] = codigo
+                ev_preco[n_ev] = saida
+                ev_indice[n_ev] = deslocamento + t
+                ev_simbolo[n_ev] = s
+                n_ev += 1
+
+            # Executa novas ordens se não houver posição aberta; a compra usa `fracao` do caixa livre
+            if lado == 0.0:
+                if ordem == COMPRA and usd > 0.0:
+                    valor = usd * fracao
+                    posicoes[s, BTC] = valor / price
+                    usd -= valor
+                    posicoes[s, ENTRADA] = price
+                    posicoes[s, STOP] = price * sl_long
+                    posicoes[s, ALVO] = price * tp_long
+                    posicoes[s, LADO] = LONG
+                    ev_codigo[n_ev] = EVENTO_BUY
+                    ev_preco[n_ev] = price
+                    ev_indice[n_ev] = deslocamento + t
+                    ev_simbolo[n_ev] = s
+                    n_ev += 1
+                elif ordem == VENDA:
+                    posicoes[s, ENTRADA] = price
+                    posicoes[s, STOP] = price * sl_short
+                    posicoes[s, ALVO] = price * tp_short
+                    posicoes[s, LADO] = SHORT
+                    ev_codigo[n_ev] = EVENTO_SELL
+                    ev_preco[n_ev] = price
+                    ev_indice[n_ev] = deslocamento + t
+                    ev_simbolo[n_ev] = s
+                    n_ev += 1
+
+        # Patrimônio marcado a mercado pelo último close conhecido de cada símbolo
+        valor_total = usd
+        for s in range(n_simbolos):
+            if posicoes[s, LADO] == LONG:
+                valor_total += posicoes[s, BTC] * ultimo_close[s]
+            elif posicoes[s, LADO] == SHORT:
+                valor_total += (posicoes[s, ENTRADA] - ultimo_close[s]) * tamanhos[s]
+        patrimonio[deslocamento + t] = valor_total
+
+    caixa[0] = usd
+    return ev_codigo, ev_preco, ev_indice, ev_simbolo, n_ev
+
+
+_processar_carteira_jit = njit(cache=True, nogil=True)(_processar_carteira) if njit is not None else None
+
+
+# 🔹 Alinha os símbolos numa grade de tempo comum (união dos timestamps).
+# Devolve os timestamps e, para cada coluna, uma matriz [tempo, símbolo]; onde o símbolo não tem candle
+# o valor é NaN (0 nos sinais) e `presente` é False.
+def alinhar(dfs, sinais=None, colunas=("close", "high", "low")):
+    symbols = list(dfs)
+    tempos = [tempos_ms(dfs[symbol]) for symbol in symbols]
+    grade = np.unique(np.concatenate(tempos)) if tempos else np.empty(0, dtype=np.int64)
+    presente = np.zeros((len(grade), len(symbols)), dtype=np.bool_)
+    matrizes = {nome: np.full((len(grade), len(symbols)), np.nan) for nome in colunas}
+    matriz_sinais = np.zeros((len(grade), len(symbols)), dtype=np.int8)
+    for s, (symbol, tempo) in enumerate(zip(symbols, tempos)):
+        linhas = np.searchsorted(grade, tempo)
+        presente[linhas, s] = True
+        for nome in colunas:
+            matrizes[nome][linhas, s] = dfs[symbol][nome].to_numpy(dtype=np.float64)
+        if sinais is not None:
+            matriz_sinais[linhas, s] = sinais[symbol]
+    return grade, matrizes, matriz_sinais, presente
+
+
+# 🔹 Carrega um símbolo e calcula os indicadores; `carregar(symbol)` devolve o DataFrame de candles
+def _preparar_simbolo(symbol, carregar, indicadores):
+    df = carregar(symbol)
+    if indicadores:
+        df = calcular_indicadores(df, indicadores)
+    return df
+
+
+# 🔹 Carrega e calcula os indicadores de todos os símbolos em paralelo. Sem `carregar`, lê do armazenamento local
+# (`raiz`); para baixar só o que falta use por exemplo
+# carregar=lambda symbol: cache_candles.obter_dataframe(raiz, symbol, inicio, fim).
+def carregar_carteira(symbols, indicadores=(), raiz="dados", granularity="1m", inicio=None, fim=None,
+                      carregar=None, threads=None):
+    if carregar is None:
+        def carregar(symbol):
+            return armazenamento.carregar_dataframe(raiz, symbol, granularity, inicio, fim)
+    threads = threads or min(len(symbols), os.cpu_count() or 1) or 1
+    if threads == 1:
+        return {symbol: _preparar_simbolo(symbol, carregar, indicadores) for symbol in symbols}
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        tarefas = {symbol: executor.submit(_preparar_simbolo, symbol, carregar, indicadores) for symbol in symbols}
+        return {symbol: tarefa.result() for symbol, tarefa in tarefas.items()}
+
+
+# 🔹 Roda a carteira sobre DataFrames já com indicadores ({symbol: df}).
+# `tamanho_ordem` (short) pode ser um número ou {symbol: tamanho}; `fracao` é a parte do caixa livre usada em cada
+# compra (padrão 1/número de símbolos). `verificar_saida(df)` devolve a máscara de candles em que SL/TP valem.
+def executar_carteira(dfs, estrategia, params=None, initial_balance=10000, tamanho_ordem=0.001, fracao=None,
+                      stop_loss_long=0.995, take_profit_long=1.01, stop_loss_short=1.005, take_profit_short=0.99,
+                      saida_reversa=False, fechamento_forcado=True, verificar_saida=None, jit=None):
+    estrategia = ESTRATEGIAS[estrategia] if isinstance(estrategia, str) else estrategia
+    symbols = list(dfs)
+    n_simbolos = len(symbols)
+    if not n_simbolos:
+        raise ValueError("a carteira precisa de pelo menos um símbolo")
+    sinais = {symbol: gerar_sinais(df, estrategia, **(params or {})) for symbol, df in dfs.items()}
+    grade, matrizes, matriz_sinais, presente = alinhar(dfs, sinais)
+    gate = np.empty(0, dtype=np.bool_)
+    if verificar_saida is not None:
+        gate = alinhar(dfs, {s: np.asarray(verificar_saida(df), dtype=np.int8) for s, df in dfs.items()}, ())[2]
+        gate = gate.astype(np.bool_).ravel()
+
+    # O primeiro candle de cada símbolo não opera, como no backtest de um símbolo (o loop começa em 1)
+    for s in range(n_simbolos):
+        linhas = np.flatnonzero(presente[:, s])
+        if len(linhas):
+            matriz_sinais[linhas[0], s] = 0
+
+    tamanhos = np.array([tamanho_ordem.get(symbol, 0.001) if isinstance(tamanho_ordem, dict) else tamanho_ordem
+                         for symbol in symbols], dtype=np.float64)
+    fracao = 1.0 / n_simbolos if fracao is None else fracao
+    caixa = np.array([initial_balance], dtype=np.float64)
+    posicoes = np.zeros((n_simbolos, 6), dtype=np.float64)
+    contadores = np.zeros((n_simbolos, 5), dtype=np.int64)
+    ultimo_close = np.full(n_simbolos, np.nan)
+    patrimonio = np.empty(len(grade), dtype=np.float64)
+    eventos = (np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64),
+               np.empty(0, dtype=np.int32), 0)
+    parametros = (tamanhos, fracao, stop_loss_long, take_profit_long, stop_loss_short, take_profit_short,
+                  bool(saida_reversa), patrimonio)
+    close, high, low = (matrizes[nome].ravel() for nome in ("close", "high", "low"))
+    sinais_planos = matriz_sinais.ravel()
+    presente_plano = presente.ravel()
+
+    usar_jit = _processar_carteira_jit is not None if jit is None else jit
+    if usar_jit:
+        if _processar_carteira_jit is None:
+            raise RuntimeError("numba não está instalado; use jit=False")
+        eventos = _processar_carteira_jit(close, high, low, sinais_planos, presente_plano, gate, n_simbolos, 0, caixa,
+                                          posicoes, contadores, ultimo_close, *parametros, *eventos)
+    else:
+        # Sem numba: blocos de listas Python, bem mais rápidas de indexar escalar a escalar do que arrays NumPy
+        passo = max(1, BLOCO_PYTHON // n_simbolos)
+        for bloco in range(0, len(grade), passo):
+            i, j = bloco * n_simbolos, min(bloco + passo, len(grade)) * n_simbolos
+            eventos = _processar_carteira(
+                close[i:j].tolist(), high[i:j].tolist(), low[i:j].tolist(), sinais_planos[i:j].tolist(),
+                presente_plano[i:j].tolist(), gate[i:j].tolist() if len(gate) else [], n_simbolos, bloco, caixa,
+                posicoes, contadores, ultimo_close, *parametros, *eventos,
+            )
+
+    ev_codigo, ev_preco, ev_indice, ev_simbolo, n_ev = eventos
+    ev_codigo, ev_preco, ev_indice, ev_simbolo = (ev[:n_ev] for ev in (ev_codigo, ev_preco, ev_indice, ev_simbolo))
+    if fechamento_forcado and len(grade):
+        fechamentos = []
+        for s in range(n_simbolos):
+            if posicoes[s, LADO] == 0.0:
+                continue
+            preco = ultimo_close[s]
+            if posicoes[s, LADO] == LONG:
+                recebido = posicoes[s, BTC] * preco
+                caixa[0] += recebido
+                posicoes[s, USD] += recebido - posicoes[s, BTC] * posicoes[s, ENTRADA]
+            else:
+                resultado = (posicoes[s, ENTRADA] - preco) * tamanhos[s]
+                caixa[0] += resultado
+                posicoes[s, USD] += resultado
+            posicoes[s, BTC] = 0.0
+            posicoes[s, LADO] = 0.0
+            fechamentos.append((EVENTO_FECHAMENTO, preco, np.flatnonzero(presente[:, s])[-1], s))
+        if fechamentos:
+            codigos, precos, indices, simbolos = zip(*fechamentos)
+            ev_codigo = np.append(ev_codigo, np.array(codigos, dtype=np.int8))
+            ev_preco = np.append(ev_preco, precos)
+            ev_indice = np.append(ev_indice, np.array(indices, dtype=np.int64))
+            ev_simbolo = np.append(ev_simbolo, np.array(simbolos, dtype=np.int32))
+            patrimonio[-1] = caixa[0]
+
+    datas = pd.to_datetime(grade, unit="ms")
+    operacoes = pd.DataFrame({
+        "symbol": np.array(symbols, dtype=object)[ev_simbolo],
+        "evento": [ROTULOS_EVENTOS[codigo] for codigo in ev_codigo.tolist()],
+        "preco": ev_preco,
+        "timestamp": datas[ev_indice],
+    })
+    por_simbolo = pd.DataFrame(
+        [{"symbol": symbol, "resultado": posicoes[s, USD], **contagem_trades(contadores[s])}
+         for s, symbol in enumerate(symbols)]
+    ).set_index("symbol")
+    return {
+        "saldo_final": float(caixa[0]),
+        "patrimonio": pd.Series(patrimonio, index=datas, name="patrimonio"),
+        "operacoes": operacoes,
+        "por_simbolo": por_simbolo,
+    }
+
+
+# 🔹 Carrega os símbolos em paralelo e roda a carteira numa chamada só
+def backtest_carteira(symbols, estrategia, indicadores=(), params=None, raiz="dados", granularity="1m", inicio=None,
+                      fim=None, carregar=None, threads=None, **opcoes):
+    dfs = carregar_carteira(symbols, indicadores, raiz, granularity, inicio, fim, carregar, threads)
+    return executar_carteira(dfs, estrategia, params, **opcoes)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from backtesting_core.ao_vivo import CONFIGURACOES
+
+    parser = argparse.ArgumentParser(description="Backtest de carteira com saldo único em USDT")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--configuracao", choices=sorted(CONFIGURACOES), default="trix_estocastico")
+    parser.add_argument("--pasta", default="dados", help="armazenamento local dos candles")
+    parser.add_argument("--granularity", default="1m")
+    parser.add_argument("--inicio")
+    parser.add_argument("--fim")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--fracao", type=float, help="parte do caixa livre usada em cada compra")
+    args = parser.parse_args()
+
+    configuracao = CONFIGURACOES[args.configuracao]
+    resultado = backtest_carteira(
+        args.symbols, configuracao["estrategia"], configuracao["indicadores"], configuracao.get("params"),
+        raiz=args.pasta, granularity=args.granularity, inicio=args.inicio, fim=args.fim, threads=args.threads,
+        initial_balance=configuracao.get("initial_balance", 10000), tamanho_ordem=configuracao["tamanho_ordem"],
+        fracao=args.fracao,
+        fechamento_forcado=configuracao.get("fechamento_forcado", True), **configuracao.get("regras", {}),
+    )
+    patrimonio = resultado["patrimonio"]
+    print(f"\n📊 **Resultado da Carteira** 📊")
+    print(f"🔹 Saldo Final: ${resultado['saldo_final']:.2f}")
+    if len(patrimonio):
+        queda = (patrimonio / patrimonio.cummax() - 1).min() * 100
+        print(f"📉 Drawdown máximo: {queda:.2f}%")
+    print(resultado["por_simbolo"].to_string())
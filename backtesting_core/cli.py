@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# 🔹 Linha de comando: roda vários backtests (jobs) de um arquivo de configuração num único processo.
+# Cada fonte de dados é carregada uma vez e compartilhada pelos jobs que a usam; numpy/pandas e o resto do
+# pacote só são importados quando um job roda, então comandos simples (listar estratégias) respondem na hora.
+#   backtest estrategias
+#   backtest exemplo > jobs.json
+#   backtest rodar jobs.json [--jobs nome ...] [--saida resultados.json|.csv]
+# Arquivos .toml também são aceitos.
+ESTRATEGIAS = {
+    "exemplo": "compra quando o fechamento sobe e vende quando cai",
+    "estocastica": "%K e %D abaixo da sobrevenda compra, acima da sobrecompra vende",
+    "trix": "cruzamento da linha zero do TRIX",
+    "trix_estocastico": "TRIX + %K, com filtros opcionais de ADX e de TRIX perdendo força",
+    "trix_adx": "apenas short com TRIX negativo e ADX forte e crescente",
+    "sma_trix_adx": "SMA e TRIX na mesma direção com ADX acima do mínimo",
+    "mme_adx_obv": "cruzamento MME9/MME21 confirmado por ADX e OBV",
+    "expressoes": "regras de compra/venda em texto nos params, ex.: \"trix > 0 & %K < 30\"",
+}
+
+FONTE_BITGET = "bitget"  # API da Bitget com o cache local de candles (cache_candles.obter_dataframe)
+FONTE_ARQUIVO = "arquivo"  # armazenamento local, importando a planilha/CSV de `origem` na primeira vez
+FONTES = (FONTE_BITGET, FONTE_ARQUIVO)
+
+EXEMPLO = {
+    "dados": {
+        "bitget": {"fonte": FONTE_BITGET, "symbol": "SBTCSUSDT", "inicio": "2024-01-01", "fim": "2024-02-01",
+                   "granularity": "1m", "product_type": "susdt-futures", "pasta": "dados"},
+        "planilha": {"fonte": FONTE_ARQUIVO, "symbol": "SBTCSUSDT", "origem": "dados_backtesting.xlsx",
+                     "pasta": "dados"},
+    },
+    "padroes": {"dados": "bitget", "initial_balance": 10000, "tamanho_ordem": 0.001},
+    "jobs": [
+        {"nome": "estocastica", "estrategia": "estocastica", "indicadores": [["estocastico", {"periodo": 14}]],
+         "regras": {"saida_reversa": True}, "initial_balance": 1000},
+        {"nome": "trix", "estrategia": "trix", "indicadores": [["trix", {"periodo": 14}]],
+         "regras": {"saida_reversa": True, "take_profit_long": 1.02, "take_profit_short": 0.98,
+                    "fechamento_forcado": False}, "initial_balance": 1000},
+        {"nome": "trix_estocastico_adx", "configuracao": "trix_estocastico", "params": {"adx_minimo": 25}},
+        {"nome": "regras_trix_k", "estrategia": "expressoes",
+         "indicadores": [["trix", {"periodo": 18}], ["estocastico", {"periodo": 14}], ["adx", {"periodo": 14}]],
+         "params": {"compra": "trix > 0 & %K < 30 & ADX > adx_minimo", "venda": "trix < 0 & %K > 70 & ADX > adx_minimo",
+                    "adx_minimo": 20, "aquecimento": 14}},
+        {"nome": "mme_adx_obv", "estrategia": "mme_adx_obv", "dados": "planilha",
+         "indicadores": [["mme", {"periodo": 9}], ["mme", {"periodo": 21}], ["adx", {"periodo": 14}], ["obv", {}]]},
+    ],
+}
+
+METRICAS = ("saldo_final", "retorno_pct", "max_drawdown", "sharpe", "sortino", "fator_lucro", "exposicao", "trades",
+            "taxa_acerto_long", "taxa_acerto_short")
+
+
+def ler_configuracao(caminho):
+    if caminho.endswith(".toml"):
+        import tomllib
+        with open(caminho, "rb") as arquivo:
+            return tomllib.load(arquivo)
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+# 🔹 Carrega uma fonte de dados do arquivo de configuração
+def carregar_dados(especificacao):
+    fonte = especificacao.get("fonte", FONTE_BITGET)
+    pasta = especificacao.get("pasta", "dados")
+    symbol = especificacao.get("symbol", "SBTCSUSDT")
+    granularity = especificacao.get("granularity", "1m")
+    inicio = especificacao.get("inicio")
+    fim = especificacao.get("fim")
+    if fonte == FONTE_BITGET:
+        from backtesting_core.cache_candles import obter_dataframe
+        opcoes = {"url": especificacao["url"]} if "url" in especificacao else {}
+        return obter_dataframe(pasta, symbol, inicio, fim, especificacao.get("product_type", "susdt-futures"),
+                               granularity, timeframe=especificacao.get("timeframe"), **opcoes)
+    if fonte == FONTE_ARQUIVO:
+        from backtesting_core.armazenamento import carregar_dataframe
+        return carregar_dataframe(pasta, symbol, granularity, inicio, fim, origem=especificacao.get("origem"))
+    raise ValueError(f"fonte de dados desconhecida: {fonte!r} (use {' ou '.join(FONTES)})")
+
+
+# 🔹 Job com a configuração de ao_vivo.CONFIGURACOES nomeada em `configuracao` como base (tamanho da ordem,
+# saldo inicial, regras...); o que vier no próprio job tem precedência
+def com_configuracao(job):
+    if "configuracao" not in job:
+        return job
+    from backtesting_core.ao_vivo import CONFIGURACOES
+    base = CONFIGURACOES[job["configuracao"]]
+    job = {**base, **job, "regras": {**base.get("regras", {}), **job.get("regras", {})}}
+    del job["configuracao"]
+    return job
+
+
+# 🔹 Jobs com os padrões aplicados; a configuração base vale mais que os padrões do arquivo
+def montar_jobs(configuracao):
+    padroes = configuracao.get("padroes", {})
+    jobs = []
+    for numero, job in enumerate(configuracao.get("jobs", []), start=1):
+        job = {**padroes, **com_configuracao(job)}
+        job.setdefault("nome", f"job{numero}")
+        if job.get("estrategia") not in ESTRATEGIAS:
+            raise ValueError(f"{job['nome']}: estratégia desconhecida: {job.get('estrategia')!r} "
+                             f"(disponíveis: {', '.join(ESTRATEGIAS)})")
+        jobs.append(job)
+    return jobs
+
+
+# 🔹 Um job sobre o DataFrame já carregado: indicadores numa cópia rasa (as colunas base continuam compartilhadas).
+# `fechamento_forcado` pode vir no job, como em ao_vivo.CONFIGURACOES, ou dentro de `regras`.
+def executar_job(job, df):
+    import numpy as np
+
+    from backtesting_core.estrategias import ESTRATEGIAS as FUNCOES
+    from backtesting_core.execucao import executar_arrays
+    from backtesting_core.indicadores import calcular_indicadores
+    from backtesting_core.metricas import calcular_metricas
+    from backtesting_core.sinais import gerar_sinais
+
+    inicio = time.perf_counter()
+    job = com_configuracao(job)
+    df = calcular_indicadores(df.copy(deep=False), [(nome, dict(params)) for nome, params in job.get("indicadores", [])])
+    sinais = gerar_sinais(df, FUNCOES[job["estrategia"]], **job.get("params", {}))
+    close = df["close"].to_numpy(dtype=np.float64)
+    initial_balance = job.get("initial_balance", 10000)
+    tamanho_ordem = job.get("tamanho_ordem", 0.001)
+    regras = dict(job.get("regras", {}))
+    if "fechamento_forcado" in job:
+        regras.setdefault("fechamento_forcado", job["fechamento_forcado"])
+    eventos, _, contagem = executar_arrays(close, df["high"].to_numpy(dtype=np.float64),
+                                           df["low"].to_numpy(dtype=np.float64), sinais, initial_balance,
+                                           tamanho_ordem, **regras)
+    metricas = calcular_metricas(close, eventos, initial_balance, tamanho_ordem, job.get("granularity", "1m"))
+    return {
+        "nome": job["nome"],
+        "estrategia": job["estrategia"],
+        "candles": len(df),
+        **{nome: metricas[nome] for nome in METRICAS},
+        **contagem,
+        "segundos": round(time.perf_counter() - inicio, 4),
+    }
+
+
+def rodar(configuracao, nomes=None):
+    fontes = configuracao.get("dados", {})
+    jobs = montar_jobs(configuracao)
+    if nomes:
+        jobs = [job for job in jobs if job["nome"] in nomes]
+    dados = {}
+    resultados = []
+    for job in jobs:
+        chave = job.get("dados")
+        if chave not in fontes:
+            raise ValueError(f"{job['nome']}: fonte de dados {chave!r} não está em 'dados'")
+        if chave not in dados:
+            dados[chave] = carregar_dados(fontes[chave])
+        resultados.append(executar_job(job, dados[chave]))
+    return resultados
+
+
+def _formatar(valor):
+    return f"{valor:.4f}" if isinstance(valor, float) else str(valor)
+
+
+def _salvar(resultados, caminho):
+    if caminho.endswith(".csv"):
+        import pandas as pd
+        pd.DataFrame(resultados).to_csv(caminho, index=False)
+        return
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="backtest", description="Backtests em lote a partir de um arquivo de jobs")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("estrategias", help="lista as estratégias disponíveis")
+    comandos.add_parser("exemplo", help="imprime um arquivo de jobs de exemplo")
+    rodar_parser = comandos.add_parser("rodar", help="roda os jobs de um arquivo .json ou .toml")
+    rodar_parser.add_argument("configuracao")
+    rodar_parser.add_argument("--jobs", nargs="+", help="roda só os jobs com estes nomes")
+    rodar_parser.add_argument("--saida", help="grava os resultados em .json ou .csv")
+    args = parser.parse_args(argv)
+
+    if args.comando == "estrategias":
+        largura = max(map(len, ESTRATEGIAS))
+        for nome, descricao in ESTRATEGIAS.items():
+            print(f"{nome:<{largura}}  {descricao}")
+        return 0
+    if args.comando == "exemplo":
+        print(json.dumps(EXEMPLO, indent=2, ensure_ascii=False))
+        return 0
+
+    resultados = rodar(ler_configuracao(args.configuracao), args.jobs)
+    colunas = ("nome", "candles", "saldo_final", "retorno_pct", "max_drawdown", "sharpe", "trades", "segundos")
+    linhas = [colunas] + [tuple(_formatar(resultado[coluna]) for coluna in colunas) for resultado in resultados]
+    larguras = [max(len(linha[i]) for linha in linhas) for i in range(len(colunas))]
+    for linha in linhas:
+        print("  ".join(valor.rjust(largura) for valor, largura in zip(linha, larguras)))
+    if args.saida:
+        _salvar(resultados, os.fspath(args.saida))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import json
+import mmap
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core.cache_indicadores import esquecer_buffers
+
+# 🔹 Conjunto de dados publicado uma vez (OHLCV e indicadores já calculados) e lido por vários processos sem cópia.
+# As colunas vão para um único bloco de memória compartilhada (ou para um arquivo mapeado em memória, com `caminho`)
+# precedido de um cabeçalho com o layout, então um processo se liga só pelo nome: o anexo lê o cabeçalho e monta
+# views NumPy somente leitura sobre o bloco, sem copiar nada, e a memória não cresce com o número de processos.
+#   cabeçalho: 8 bytes com o tamanho do JSON {"colunas": [[nome, dtype, forma, inicio], ...], "meta": {...}} + o JSON
+# Quem publica é o dono do bloco e o apaga em fechar(). Processos de fora do pool também podem se ligar pelo nome,
+# mas no Python < 3.13 o resource_tracker deles apagaria o bloco ao sair; para esse caso use o arquivo (`caminho`).
+ALINHAMENTO = 64
+_TAMANHO = np.dtype("<u8")
+
+# Conjunto do processo filho, ligado por iniciar_processo
+_CONJUNTO = None
+
+
+def _alinhar(posicao):
+    return -(-posicao // ALINHAMENTO) * ALINHAMENTO
+
+
+def _layout(colunas, meta):
+    cabecalho = {"colunas": [], "meta": meta or {}}
+    posicao = 0
+    for nome, valores in colunas.items():
+        cabecalho["colunas"].append([nome, valores.dtype.str, list(valores.shape), posicao])
+        posicao = _alinhar(posicao + valores.nbytes)
+    texto = json.dumps(cabecalho).encode()
+    return texto, _alinhar(_TAMANHO.itemsize + len(texto)) + posicao
+
+
+def _ler(buffer, somente_leitura=True):
+    tamanho = int(np.frombuffer(buffer, dtype=_TAMANHO, count=1)[0])
+    cabecalho = json.loads(bytes(buffer[_TAMANHO.itemsize:_TAMANHO.itemsize + tamanho]))
+    inicio_dados = _alinhar(_TAMANHO.itemsize + tamanho)
+    colunas = {}
+    for nome, dtype, forma, inicio in cabecalho["colunas"]:
+        valores = np.ndarray(tuple(forma), dtype=dtype, buffer=buffer, offset=inicio_dados + inicio)
+        valores.flags.writeable = not somente_leitura
+        colunas[nome] = valores
+    return colunas, cabecalho["meta"]
+
+
+def _escrever(buffer, colunas, texto):
+    buffer[:_TAMANHO.itemsize] = np.array([len(texto)], dtype=_TAMANHO).tobytes()
+    buffer[_TAMANHO.itemsize:_TAMANHO.itemsize + len(texto)] = texto
+    destinos, _ = _ler(buffer, somente_leitura=False)
+    for nome, valores in colunas.items():
+        destinos[nome][...] = valores
+
+
+def _abrir_memoria(nome):
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)  # Python 3.13+
+    except TypeError:
+        # Os processos do pool usam o mesmo resource_tracker de quem criou o bloco, que é quem o apaga
+        return shared_memory.SharedMemory(name=nome)
+
+
+class ConjuntoCompartilhado:
+    def __init__(self, nome, colunas, meta, memoria=None, arquivo=None, dono=False):
+        self.nome = nome
+        self.colunas = colunas
+        self.meta = meta
+        self.dono = dono
+        self._memoria = memoria
+        self._arquivo = arquivo
+
+    # 🔹 Copia as colunas (arrays de mesmo tamanho ou não) para um bloco novo; `caminho` usa um arquivo mapeado
+    @classmethod
+    def publicar(cls, colunas, meta=None, nome=None, caminho=None):
+        colunas = {nome_coluna: np.ascontiguousarray(valores) for nome_coluna, valores in colunas.items()}
+        texto, tamanho = _layout(colunas, meta)
+        if caminho is not None:
+            # Grava num temporário e troca de uma vez, para nunca deixar um conjunto pela metade
+            caminho = os.fspath(caminho)
+            temporario = f"{caminho}.tmp-{os.getpid()}"
+            with open(temporario, "w+b") as arquivo:
+                arquivo.truncate(tamanho)
+                with mmap.mmap(arquivo.fileno(), tamanho) as mapa:
+                    buffer = memoryview(mapa)
+                    _escrever(buffer, colunas, texto)
+                    buffer.release()
+                    mapa.flush()
+            os.replace(temporario, caminho)
+            conjunto = cls.anexar(caminho)
+        else:
+            memoria = shared_memory.SharedMemory(name=nome or f"bt_{secrets.token_hex(6)}", create=True, size=tamanho)
+            _escrever(memoria.buf, colunas, texto)
+            conjunto = cls(memoria.name, *_ler(memoria.buf), memoria=memoria)
+        conjunto.dono = True
+        return conjunto
+
+    # 🔹 DataFrame -> conjunto; datas viram epoch em ms (int64) e colunas não numéricas ficam de fora
+    @classmethod
+    def publicar_dataframe(cls, df, colunas=None, meta=None, nome=None, caminho=None):
+        arrays = {}
+        for coluna in (df.columns if colunas is None else colunas):
+            valores = df[coluna].to_numpy()
+            if np.issubdtype(valores.dtype, np.datetime64):
+                valores = valores.astype("datetime64[ms]").astype(np.int64)
+            if valores.dtype.kind in "biuf":
+                arrays[str(coluna)] = valores
+        return cls.publicar(arrays, meta, nome, caminho)
+
+    # 🔹 Liga-se a um conjunto já publicado pelo nome do bloco (ou pelo caminho do arquivo); não copia nada
+    @classmethod
+    def anexar(cls, nome):
+        if os.path.isfile(nome):
+            with open(nome, "rb") as arquivo:
+                mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            colunas, meta = _ler(memoryview(mapa))
+            return cls(nome, colunas, meta, arquivo=mapa)
+        memoria = _abrir_memoria(nome)
+        colunas, meta = _ler(memoria.buf)
+        return cls(nome, colunas, meta, memoria=memoria)
+
+    def __getitem__(self, nome):
+        return self.colunas[nome]
+
+    def __contains__(self, nome):
+        return nome in self.colunas
+
+    def __iter__(self):
+        return iter(self.colunas)
+
+    def __len__(self):
+        return len(self.colunas)
+
+    def keys(self):
+        return self.colunas.keys()
+
+    def __repr__(self):
+        return f"ConjuntoCompartilhado({self.nome!r}, colunas={list(self.colunas)})"
+
+    @property
+    def nbytes(self):
+        return sum(valores.nbytes for valores in self.colunas.values())
+
+    # 🔹 DataFrame com as colunas do conjunto (somente leitura); `timestamp` volta a ser data
+    def dataframe(self, colunas=None, datas=False):
+        df = pd.DataFrame({nome: self.colunas[nome] for nome in (colunas or self.colunas)}, copy=False)
+        if datas and "timestamp" in df:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+    # 🔹 Pool de processos já ligados a este conjunto; nas tarefas, dados_processo() devolve o conjunto
+    def executor(self, processos=None, initializer=None, initargs=()):
+        return ProcessPoolExecutor(max_workers=processos or os.cpu_count() or 1, initializer=iniciar_processo,
+                                   initargs=(self.nome, initializer, initargs))
+
+    # 🔹 Solta as views; o dono também apaga o bloco (ou o arquivo). Views ainda vivas fora do conjunto mantêm o
+    # mapeamento até serem coletadas, mas o nome some na hora.
+    def fechar(self):
+        esquecer_buffers(self.colunas.values())
+        self.colunas = {}
+        if self._memoria is not None:
+            try:
+                self._memoria.close()
+            except BufferError:
+                pass
+            if self.dono:
+                self._memoria.unlink()
+            self._memoria = None
+        if self._arquivo is not None:
+            try:
+                self._arquivo.close()
+            except BufferError:
+                pass
+            self._arquivo = None
+            if self.dono:
+                os.remove(self.nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+def iniciar_processo(nome, initializer=None, initargs=()):
+    global _CONJUNTO
+    _CONJUNTO = ConjuntoCompartilhado.anexar(nome)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def dados_processo():
+    if _CONJUNTO is None:
+        raise RuntimeError("este processo não está ligado a um conjunto (use ConjuntoCompartilhado.executor)")
+    return _CONJUNTO
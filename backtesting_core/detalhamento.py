@@ -0,0 +1,132 @@
+import inspect
+
+import numpy as np
+
+from backtesting_core import armazenamento
+from backtesting_core.cache_candles import obter_intervalos
+from backtesting_core.execucao import (
+    EVENTO_BUY, EVENTO_LOSS_SL, EVENTO_WIN_TP, PRIMEIRO_ALVO, PRIMEIRO_STOP, executar_arrays, montar_operacoes,
+    tempos_ms,
+)
+
+# 🔹 Candles ambíguos: quando um mesmo candle toca o alvo e o stop, o núcleo decide pela ordem do código (alvo
+# primeiro), não pelo caminho do preço. Aqui só esses candles são detalhados: os candles de granularidade menor
+# de cada um vêm do armazenamento local ou da API (só as lacunas, num único lote) e dizem o que foi tocado primeiro.
+# Como decidir um candle muda o caminho a partir dali, o backtest roda de novo com as decisões até nada mudar;
+# candles finos já buscados não são buscados outra vez.
+MAX_RODADAS = 20
+NIVEIS = ("stop_loss_long", "take_profit_long", "stop_loss_short", "take_profit_short")
+_PADROES = {nome: p.default for nome, p in inspect.signature(executar_arrays).parameters.items() if nome in NIVEIS}
+
+
+# 🔹 Candles de saída (TP ou SL) em que alvo e stop foram tocados; a entrada de cada saída é o evento anterior.
+# Devolve os índices, se a posição era comprada, e os níveis de alvo e stop (calculados como no núcleo).
+def barras_ambiguas(high, low, eventos, stop_loss_long=0.995, take_profit_long=1.01, stop_loss_short=1.005,
+                    take_profit_short=0.99):
+    ev_codigo, ev_preco, ev_indice, n_ev = eventos
+    codigo = ev_codigo[:n_ev]
+    saidas = np.flatnonzero((codigo == EVENTO_WIN_TP) | (codigo == EVENTO_LOSS_SL))
+    saidas = saidas[saidas > 0]
+    comprado = codigo[saidas - 1] == EVENTO_BUY
+    entrada = ev_preco[saidas - 1]
+    alvo = np.where(comprado, entrada * take_profit_long, entrada * take_profit_short)
+    stop = np.where(comprado, entrada * stop_loss_long, entrada * stop_loss_short)
+    indices = ev_indice[saidas]
+    h = np.asarray(high)[indices]
+    l = np.asarray(low)[indices]
+    ambigua = np.where(comprado, h >= alvo, l <= alvo) & np.where(comprado, l <= stop, h >= stop)
+    return indices[ambigua], comprado[ambigua], alvo[ambigua], stop[ambigua]
+
+
+# 🔹 Decide todos os candles de uma vez pelos candles finos de [inicio, inicio + passo): o primeiro candle fino que
+# toca um dos níveis decide. Se o mesmo candle fino toca os dois (ou não há dados) fica 0 (ordem padrão).
+def decidir(finos, inicios, passo_ms, comprado, alvo, stop):
+    timestamps = np.asarray(finos["timestamp"])
+    primeiro = np.searchsorted(timestamps, inicios, side="left")
+    tamanhos = np.searchsorted(timestamps, inicios + passo_ms, side="left") - primeiro
+    candle = np.repeat(np.arange(len(inicios)), tamanhos)
+    posicao = np.arange(len(candle))
+    linhas = np.repeat(primeiro - np.cumsum(tamanhos) + tamanhos, tamanhos) + posicao
+    h = np.asarray(finos["high"])[linhas]
+    l = np.asarray(finos["low"])[linhas]
+    longo = comprado[candle]
+    toca_alvo = np.where(longo, h >= alvo[candle], l <= alvo[candle])
+    toca_stop = np.where(longo, l <= stop[candle], h >= stop[candle])
+
+    nenhum = len(candle)
+    primeiro_alvo = np.full(len(inicios), nenhum)
+    primeiro_stop = np.full(len(inicios), nenhum)
+    np.minimum.at(primeiro_alvo, candle[toca_alvo], posicao[toca_alvo])
+    np.minimum.at(primeiro_stop, candle[toca_stop], posicao[toca_stop])
+    decisao = np.zeros(len(inicios), dtype=np.int8)
+    decisao[primeiro_alvo < primeiro_stop] = PRIMEIRO_ALVO
+    decisao[primeiro_stop < primeiro_alvo] = PRIMEIRO_STOP
+    return decisao
+
+
+# 🔹 Fontes de candles finos: recebem a lista de intervalos [inicio, fim) em ms e devolvem colunas com
+# timestamp/high/low ordenadas. A do armazenamento lê só as páginas desses candles; a da API baixa só o que falta.
+def fonte_armazenamento(raiz, symbol, granularity="1m"):
+    def buscar(intervalos):
+        candles = armazenamento.abrir_candles(raiz, symbol, granularity, colunas=("high", "low"))
+        return armazenamento.recortar_intervalos(candles, intervalos)
+    return buscar
+
+
+def fonte_api(raiz, symbol, granularity="1m", product_type="susdt-futures", **opcoes):
+    def buscar(intervalos):
+        return obter_intervalos(raiz, symbol, intervalos, product_type, granularity, **opcoes)
+    return buscar
+
+
+# 🔹 Backtest como executar_sinais, mas com os candles ambíguos resolvidos pelos candles finos de `fonte`.
+# `passo_ms` é a duração do candle do df (padrão: o menor intervalo entre timestamps).
+# Devolve (operations, usd_balance, contagem, relatorio).
+def executar_detalhado(df, sinais, initial_balance, tamanho_ordem, fonte, passo_ms=None, max_rodadas=MAX_RODADAS,
+                       **regras):
+    close = df["close"].to_numpy(dtype=np.float64)
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    tempos = tempos_ms(df)
+    if passo_ms is None:
+        passo_ms = int(np.diff(tempos).min()) if len(tempos) > 1 else 60_000
+    niveis = {nome: regras.get(nome, padrao) for nome, padrao in _PADROES.items()}
+
+    finos = {"timestamp": np.empty(0, dtype=np.int64), "high": np.empty(0), "low": np.empty(0)}
+    buscadas = np.empty(0, dtype=np.int64)
+    resolucao = np.zeros(len(close), dtype=np.int8)
+    convergiu = False
+    for rodada in range(1, max_rodadas + 1):
+        usada = resolucao
+        eventos, usd_balance, contagem = executar_arrays(
+            close, high, low, sinais, initial_balance, tamanho_ordem, resolucao=usada, **regras,
+        )
+        indices, comprado, alvo, stop = barras_ambiguas(high, low, eventos, **niveis)
+
+        # Só os candles ainda não detalhados vão para a fonte, todos numa chamada
+        novas = np.setdiff1d(indices, buscadas)
+        if len(novas):
+            intervalos = [[inicio, inicio + passo_ms] for inicio in tempos[novas].tolist()]
+            lote = fonte(intervalos)
+            partes = [finos, {nome: np.asarray(lote[nome]) for nome in finos}]
+            ordem = np.argsort(np.concatenate([parte["timestamp"] for parte in partes]), kind="stable")
+            finos = {nome: np.concatenate([parte[nome] for parte in partes])[ordem] for nome in finos}
+            buscadas = np.union1d(buscadas, novas)
+
+        nova = np.zeros(len(close), dtype=np.int8)
+        nova[indices] = decidir(finos, tempos[indices], passo_ms, comprado, alvo, stop)
+        if np.array_equal(nova, resolucao):
+            convergiu = True
+            break
+        resolucao = nova
+
+    relatorio = {
+        "rodadas": rodada,
+        "convergiu": convergiu,
+        "ambiguas": int(len(indices)),
+        "resolvidas": int(np.count_nonzero(usada[indices])),
+        "stop_primeiro": int(np.count_nonzero(usada[indices] == PRIMEIRO_STOP)),
+        "candles_detalhados": int(len(buscadas)),
+        "candles_finos": int(len(finos["timestamp"])),
+    }
+    return montar_operacoes(df, eventos, initial_balance, tamanho_ordem), usd_balance, contagem, relatorio
@@ -0,0 +1,173 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from backtesting_core import perfil
+
+# 🔹 Configurações da Bitget
+API_URL = "https://api.bitget.com/api/v2/mix/market/history-candles"
+LIMITE_POR_PAGINA = 200  # Máximo de candles que a Bitget devolve por requisição
+COLUNAS = ["timestamp", "open", "high", "low", "close", "volume", "quote_volume"]
+
+# 🔹 Duração de cada granularidade em milissegundos
+GRANULARIDADES_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1H": 3_600_000,
+    "4H": 4 * 3_600_000,
+    "6H": 6 * 3_600_000,
+    "12H": 12 * 3_600_000,
+    "1D": 86_400_000,
+    "1W": 7 * 86_400_000,
+}
+
+# 🔹 Status que valem uma nova tentativa (limite de requisições e erros do servidor)
+STATUS_REPETIR = {429, 500, 502, 503, 504}
+
+
+# 🔹 Converte datas (str, datetime, pd.Timestamp ou epoch em ms) para epoch em milissegundos
+def para_ms(data):
+    if isinstance(data, (int, np.integer)):
+        return int(data)
+    return int(pd.Timestamp(data).value // 1_000_000)
+
+
+# 🔹 Limite de requisições por segundo compartilhado entre as threads (token bucket)
+class LimiteRequisicoes:
+    def __init__(self, por_segundo, rajada=None):
+        self.por_segundo = float(por_segundo)
+        self.capacidade = float(rajada if rajada is not None else max(1.0, por_segundo))
+        self.tokens = self.capacidade
+        self.ultimo = time.monotonic()
+        self.trava = threading.Lock()
+
+    def aguardar(self):
+        while True:
+            with self.trava:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.por_segundo)
+                self.ultimo = agora
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                espera = (1.0 - self.tokens) / self.por_segundo
+            time.sleep(espera)
+
+
+# 🔹 Sessão HTTP com keep-alive e pool de conexões do tamanho do número de threads
+def criar_sessao(conexoes=4):
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=conexoes, max_retries=0)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+
+# 🔹 Janelas [startTime, endTime] que cobrem o período, cada uma com no máximo `limit` candles
+def janelas_paginacao(inicio_ms, fim_ms, granularity="1m", limit=LIMITE_POR_PAGINA):
+    passo = GRANULARIDADES_MS[granularity]
+    pagina = passo * limit
+    inicio_ms -= inicio_ms % passo
+    return [(t, min(t + pagina, fim_ms) - 1) for t in range(inicio_ms, fim_ms, pagina)]
+
+
+# 🔹 Busca uma página de candles, repetindo com espera exponencial quando a API recusa ou falha
+def buscar_pagina(sessao, url, params, limite=None, tentativas=5, espera_inicial=0.5, timeout=10):
+    for tentativa in range(tentativas):
+        if limite is not None:
+            limite.aguardar()
+        try:
+            response = sessao.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if tentativa == tentativas - 1:
+                raise
+        else:
+            if response.status_code == 200:
+                if perfil.ativo():
+                    perfil.contar("download", "paginas")
+                    perfil.contar("download", "bytes_baixados", len(response.content))
+                return response.json()["data"] or []
+            if response.status_code not in STATUS_REPETIR or tentativa == tentativas - 1:
+                response.raise_for_status()
+                raise requests.HTTPError(f"Erro ao buscar histórico: {response.text}", response=response)
+        time.sleep(espera_inicial * (2 ** tentativa) * (1 + random.random() * 0.25))
+    return []
+
+
+# 🔹 Converte as linhas da API para o DataFrame usado pelos scripts, sem duplicatas e em ordem de tempo
+@perfil.cronometrar("dataframe")
+def candles_para_dataframe(linhas):
+    if not linhas:
+        df = pd.DataFrame(columns=COLUNAS)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+    dados = np.asarray(linhas, dtype=object)[:, :len(COLUNAS)]
+    timestamps = dados[:, 0].astype(np.int64)
+    _, unicos = np.unique(timestamps, return_index=True)  # np.unique já devolve os timestamps ordenados
+    df = pd.DataFrame(dados[unicos, 1:].astype(np.float64), columns=COLUNAS[1:])
+    df.insert(0, "timestamp", pd.to_datetime(timestamps[unicos], unit="ms"))
+    return df
+
+
+# 🔹 Baixa o histórico completo de [inicio, fim) paginando pela janela de tempo, com páginas em paralelo.
+# Sem `inicio`, baixa apenas a última página (o mesmo que a antiga chamada única com limit=200).
+def baixar_historico(symbol, inicio=None, fim=None, product_type="susdt-futures", granularity="1m",
+                     url=API_URL, threads=4, requisicoes_por_segundo=10, tentativas=5, espera_inicial=0.5,
+                     limit=LIMITE_POR_PAGINA, sessao=None):
+    passo = GRANULARIDADES_MS[granularity]
+    fim_ms = para_ms(fim) if fim is not None else int(time.time() * 1000)
+    inicio_ms = para_ms(inicio) if inicio is not None else fim_ms - passo * limit
+    return baixar_intervalos(symbol, [(inicio_ms, fim_ms)], product_type, granularity, url, threads,
+                             requisicoes_por_segundo, tentativas, espera_inicial, limit, sessao)
+
+
+# 🔹 Baixa vários intervalos [inicio, fim) em ms de uma vez: as páginas de todos entram no mesmo pool de threads
+@perfil.cronometrar("download")
+def baixar_intervalos(symbol, intervalos, product_type="susdt-futures", granularity="1m", url=API_URL, threads=4,
+                      requisicoes_por_segundo=10, tentativas=5, espera_inicial=0.5, limit=LIMITE_POR_PAGINA,
+                      sessao=None):
+    janelas = [janela for inicio_ms, fim_ms in intervalos
+               for janela in janelas_paginacao(inicio_ms, fim_ms, granularity, limit)]
+
+    limite = LimiteRequisicoes(requisicoes_por_segundo)
+    propria = sessao is None
+    sessao = criar_sessao(threads) if propria else sessao
+
+    def pagina(janela):
+        params = {
+            "symbol": symbol,
+            "productType": product_type,
+            "granularity": granularity,
+            "startTime": str(janela[0]),
+            "endTime": str(janela[1]),
+            "limit": str(limit),
+        }
+        return buscar_pagina(sessao, url, params, limite, tentativas, espera_inicial)
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            linhas = [linha for pagina_linhas in executor.map(pagina, janelas) for linha in pagina_linhas]
+    finally:
+        if propria:
+            sessao.close()
+
+    df = candles_para_dataframe(linhas)
+    tempo_ms = df["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+    if not intervalos:
+        return df.iloc[:0]
+    # Com os intervalos ordenados e o fim acumulado, cada candle só precisa ser comparado ao último início antes dele
+    ordenados = sorted(intervalos)
+    inicios = np.array([inicio_ms for inicio_ms, _ in ordenados], dtype=np.int64)
+    fins = np.maximum.accumulate(np.array([fim_ms for _, fim_ms in ordenados], dtype=np.int64))
+    posicao = np.searchsorted(inicios, tempo_ms, side="right") - 1
+    dentro = (posicao >= 0) & (tempo_ms < fins[np.maximum(posicao, 0)])
+    return df[dentro].reset_index(drop=True)
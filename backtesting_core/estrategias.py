@@ -0,0 +1,127 @@
+import numpy as np
+
+from backtesting_core.expressoes import avaliar_estrategias
+from backtesting_core.sinais import estrategia_vetorizada, montar_sinais
+
+
+def _coluna(df, nome):
+    return df[nome].to_numpy(dtype=np.float64)
+
+
+# Colunas de outro timeframe entram com sufixo (reamostragem.alinhar_timeframe): ADX_1H, trix_15m...
+def _nome(nome, timeframe=None):
+    return nome if timeframe is None else f"{nome}_{timeframe}"
+
+
+def _anterior(valores):
+    anterior = np.empty_like(valores)
+    anterior[:1] = np.nan
+    anterior[1:] = valores[:-1]
+    return anterior
+
+
+# 🔹 Exemplo genérico: compra quando o fechamento sobe e vende quando cai
+@estrategia_vetorizada
+def estrategia_exemplo(df):
+    close = _coluna(df, "close")
+    close_prev = _anterior(close)
+    return montar_sinais(close > close_prev, close < close_prev)
+
+
+# 🔹 Estocástico: sobrevenda (%K e %D abaixo de 20) compra, sobrecompra (acima de 80) vende
+@estrategia_vetorizada
+def estrategia_estocastica(df, sobrevenda=20, sobrecompra=80, aquecimento=14):
+    k = _coluna(df, "%K")
+    d = _coluna(df, "%D")
+    compra = (k < sobrevenda) & (d < sobrevenda)
+    venda = (k > sobrecompra) & (d > sobrecompra)
+    return montar_sinais(compra, venda, aquecimento)
+
+
+# 🔹 TRIX: cruzamento da linha zero
+@estrategia_vetorizada
+def estrategia_trix(df):
+    trix = _coluna(df, "trix")
+    trix_prev = _anterior(trix)
+    return montar_sinais((trix_prev < 0) & (trix > 0), (trix_prev > 0) & (trix < 0))
+
+
+# 🔹 TRIX + Estocástico, com filtros opcionais de ADX e de TRIX perdendo força (trix_delta < 0).
+# Com `timeframe_adx` (ex.: "1H") o filtro lê o ADX desse timeframe.
+@estrategia_vetorizada
+def estrategia_trix_estocastico(df, k_compra=30, k_venda=70, adx_minimo=None,
+                                trix_delta_negativo=False, aquecimento=14, timeframe_adx=None):
+    trix = _coluna(df, "trix")
+    k = _coluna(df, "%K")
+    compra = (trix > 0) & (k < k_compra)
+    venda = (trix < 0) & (k > k_venda)
+    if adx_minimo is not None:
+        adx_ok = _coluna(df, _nome("ADX", timeframe_adx)) > adx_minimo
+        compra &= adx_ok
+        venda &= adx_ok
+    if trix_delta_negativo:
+        delta_ok = _coluna(df, "trix_delta") < 0
+        compra &= delta_ok
+        venda &= delta_ok
+    return montar_sinais(compra, venda, aquecimento)
+
+
+# 🔹 TRIX + ADX: apenas short quando o TRIX está negativo e o ADX forte e crescente.
+# Com `timeframe_adx` (ex.: "1H") o ADX vem desse timeframe e o TRIX continua no timeframe do df.
+@estrategia_vetorizada
+def estrategia_trix_adx(df, adx_minimo=20, aquecimento=14, timeframe_adx=None):
+    venda = (
+        (_coluna(df, "trix") < 0)
+        & (_coluna(df, _nome("ADX", timeframe_adx)) > adx_minimo)
+        & (_coluna(df, _nome("adx_delta", timeframe_adx)) > 0)
+        & (_coluna(df, "trix_delta") > 0)
+    )
+    return montar_sinais(np.zeros(len(venda), dtype=bool), venda, aquecimento)
+
+
+# 🔹 SMA + TRIX + ADX: SMA e TRIX na mesma direção com ADX acima do mínimo
+@estrategia_vetorizada
+def estrategia_sma_trix_adx(df, adx_minimo=20, aquecimento=14):
+    sma = _coluna(df, "sma")
+    trix = _coluna(df, "trix")
+    sma_prev = _anterior(sma)
+    trix_prev = _anterior(trix)
+    adx_ok = _coluna(df, "ADX") > adx_minimo
+    compra = adx_ok & (sma > sma_prev) & (trix > trix_prev)
+    venda = adx_ok & (sma < sma_prev) & (trix < trix_prev)
+    return montar_sinais(compra, venda, aquecimento)
+
+
+# 🔹 Cruzamento MME9/MME21 confirmado por ADX e OBV (backtesting_v03.py)
+@estrategia_vetorizada
+def estrategia_mme_adx_obv(df, adx_minimo=15):
+    mme9 = _coluna(df, "MME9")
+    mme21 = _coluna(df, "MME21")
+    obv = _coluna(df, "OBV")
+    mme9_prev = _anterior(mme9)
+    mme21_prev = _anterior(mme21)
+    obv_prev = _anterior(obv)
+    adx_ok = _coluna(df, "ADX") > adx_minimo
+    compra = (mme9_prev < mme21_prev) & (mme9 > mme21) & adx_ok & (obv > obv_prev)
+    venda = (mme9_prev > mme21_prev) & (mme9 < mme21) & adx_ok & (obv < obv_prev)
+    return montar_sinais(compra, venda)
+
+
+# 🔹 Regras de compra e venda em texto (expressoes.py), ex.: compra="trix > 0 & %K < 30 & ADX > adx_minimo".
+# Os demais parâmetros substituem nomes nas regras.
+@estrategia_vetorizada
+def estrategia_expressoes(df, compra=None, venda=None, aquecimento=0, **params):
+    return avaliar_estrategias(df, {"regras": {"compra": compra, "venda": venda}}, aquecimento, **params)["regras"]
+
+
+# 🔹 Estratégias disponíveis por nome
+ESTRATEGIAS = {
+    "exemplo": estrategia_exemplo,
+    "estocastica": estrategia_estocastica,
+    "trix": estrategia_trix,
+    "trix_estocastico": estrategia_trix_estocastico,
+    "trix_adx": estrategia_trix_adx,
+    "sma_trix_adx": estrategia_sma_trix_adx,
+    "mme_adx_obv": estrategia_mme_adx_obv,
+    "expressoes": estrategia_expressoes,
+}
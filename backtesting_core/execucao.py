@@ -0,0 +1,408 @@
+from enum import IntEnum
+
+import numpy as np
+
+from backtesting_core import perfil
+from backtesting_core.sinais import COMPRA, VENDA
+
+try:
+    from numba import njit
+except ImportError:  # numba é opcional: sem ele o mesmo núcleo roda em Python puro
+    njit = None
+
+# 🔹 Códigos dos eventos registrados pelo núcleo de execução (inteiros simples para o numba; fora do núcleo use Evento)
+EVENTO_BUY = 1
+EVENTO_SELL = 2
+EVENTO_WIN_TP = 3
+EVENTO_LOSS_SL = 4
+EVENTO_WIN_REVERSE = 5
+EVENTO_FECHAMENTO = 6
+
+ROTULOS_EVENTOS = {
+    EVENTO_BUY: "BUY",
+    EVENTO_SELL: "SELL",
+    EVENTO_WIN_TP: "WIN (TP)",
+    EVENTO_LOSS_SL: "LOSS (SL)",
+    EVENTO_WIN_REVERSE: "WIN (REVERSE)",
+    EVENTO_FECHAMENTO: "FECHAMENTO FORÇADO",
+}
+
+
+class Evento(IntEnum):
+    BUY = EVENTO_BUY
+    SELL = EVENTO_SELL
+    WIN_TP = EVENTO_WIN_TP
+    LOSS_SL = EVENTO_LOSS_SL
+    WIN_REVERSE = EVENTO_WIN_REVERSE
+    FECHAMENTO = EVENTO_FECHAMENTO
+
+    @property
+    def rotulo(self):
+        return ROTULOS_EVENTOS[self]
+
+# 🔹 Posições do vetor de estado (float64) e do vetor de contadores (int64).
+# TAMANHO é o tamanho da ordem na entrada: um short é liquidado com ele mesmo que `tamanho_ordem` mude depois
+# (ex.: walk-forward com o tamanho na grade, em que a posição passa de uma janela para a seguinte).
+USD, BTC, LADO, ENTRADA, STOP, ALVO, TAMANHO = range(7)
+WIN_LONG, WIN_SHORT, LOSS_LONG, LOSS_SHORT, WIN_REVERSE = range(5)
+
+LONG = 1.0
+SHORT = -1.0
+
+# 🔹 Ordem dentro de um candle que toca alvo e stop ao mesmo tempo (sem resolução vale o alvo primeiro)
+PRIMEIRO_ALVO = 1
+PRIMEIRO_STOP = -1
+
+# 🔹 Tamanho dos blocos convertidos para listas quando o núcleo roda sem compilação
+BLOCO_PYTHON = 1 << 16
+
+
+# 🔹 Estado inicial: todo o saldo em USDT e nenhuma posição aberta
+def novo_estado(initial_balance):
+    estado = np.zeros(7, dtype=np.float64)
+    estado[USD] = initial_balance
+    return estado, np.zeros(5, dtype=np.int64)
+
+
+# 🔹 Núcleo da máquina de estados SL/TP: percorre os candles [0, len(close)) e atualiza estado/contadores.
+# Escrito só com operações escalares para poder ser compilado pelo numba sem alterações.
+def _processar_candles(close, high, low, sinais, verificar_saida, resolucao, deslocamento, estado, contadores,
+                       tamanho_ordem, sl_long, tp_long, sl_short, tp_short, saida_reversa, exigir_saldo,
+                       ev_codigo, ev_preco, ev_indice, n_ev):
+    usd = estado[USD]
+    btc = estado[BTC]
+    lado = estado[LADO]
+    entrada = estado[ENTRADA]
+    stop = estado[STOP]
+    alvo = estado[ALVO]
+    tamanho = estado[TAMANHO]
+    sempre_verificar = len(verificar_saida) == 0
+    com_resolucao = len(resolucao) > 0
+
+    for i in range(len(close)):
+        if n_ev + 2 > ev_codigo.shape[0]:
+            capacidade = max(2 * ev_codigo.shape[0], 64)
+            novo_codigo = np.empty(capacidade, dtype=np.int8)
+            novo_preco = np.empty(capacidade, dtype=np.float64)
+            novo_indice = np.empty(capacidade, dtype=np.int64)
+            novo_codigo[:n_ev] = ev_codigo[:n_ev]
+            novo_preco[:n_ev] = ev_preco[:n_ev]
+            novo_indice[:n_ev] = ev_indice[:n_ev]
+            ev_codigo = novo_codigo
+            ev_preco = novo_preco
+            ev_indice = novo_indice
+
+        price = close[i]
+        ordem = sinais[i]
+
+        # Verifica se há posição aberta e aplica Stop Loss ou Take Profit
+        if lado != 0.0 and (sempre_verificar or verificar_saida[i]):
+            if saida_reversa:
+                if lado == LONG and ordem == VENDA:
+                    usd = btc * price
+                    btc = 0.0
+                    contadores[WIN_LONG] += 1
+                    contadores[WIN_REVERSE] += 1
+                    ev_codigo[n_ev] = EVENTO_WIN_REVERSE
+                    ev_preco[n_ev] = price
+                    ev_indice[n_ev] = deslocamento + i
+                    n_ev += 1
+                    lado = 0.0
+                elif lado == SHORT and ordem == COMPRA:
+                    usd += (entrada - price) * tamanho
+                    btc = 0.0
+                    contadores[WIN_SHORT] += 1
+                    contadores[WIN_REVERSE] += 1
+                    ev_codigo[n_ev] = EVENTO_WIN_REVERSE
+                    ev_preco[n_ev] = price
+                    ev_indice[n_ev] = deslocamento + i
+                    n_ev += 1
+                    lado = 0.0
+
+            if lado == LONG:
+                if high[i] >= alvo and not (com_resolucao and resolucao[i] == PRIMEIRO_STOP and low[i] <= stop):
+                    usd = btc * alvo
+                    btc = 0.0
+                    contadores[WIN_LONG] += 1
+                    ev_codigo[n_ev] = EVENTO_WIN_TP
+                    ev_preco[n_ev] = alvo
+                    ev_indice[n_ev] = deslocamento + i
+                    n_ev += 1
+                    lado = 0.0
+                elif low[i] <= stop:
+                    usd = btc * stop
+                    btc = 0.0
+                    contadores[LOSS_LONG] += 1
+                    ev_codigo[n_ev] = EVENTO_LOSS_SL
+                    ev_preco[n_ev] = stop
+                    ev_indice[n_ev] = deslocamento + i
+                    n_ev += 1
+                    lado = 0.0
+            elif lado == SHORT:
+                if low[i] <= alvo and not (com_resolucao and resolucao[i] == PRIMEIRO_STOP and high[i] >= stop):
+                    usd += (entrada - alvo) * tamanho
+                    btc = 0.0
+                    contadores[WIN_SHORT] += 1
+                    ev_codigo[n_ev] = EVENTO_WIN_TP
+                    ev_preco[n_ev] = alvo
+                    ev_indice[n_ev] = deslocamento + i
+                    n_ev += 1
+                    lado = 0.0
+                elif high[i] >= stop:
+                    usd += (entrada - stop) * tamanho
+                    btc = 0.0
+                    contadores[LOSS_SHORT] += 1
+                    ev_codigo[n_ev] = EVENTO_LOSS_SL
+                    ev_preco[n_ev] = stop
+                    ev_indice[n_ev] = deslocamento + i
+                    n_ev += 1
+                    lado = 0.0
+
+        # Executa novas ordens se não houver posição aberta (com `exigir_saldo`, só com saldo em USDT positivo)
+        if lado == 0.0 and (not exigir_saldo or usd > 0.0):
+            if ordem == COMPRA:
+                btc = usd / price
+                usd = 0.0
+                entrada = price
+                stop = price * sl_long
+                alvo = price * tp_long
+                tamanho = tamanho_ordem
+                lado = LONG
+                ev_codigo[n_ev] = EVENTO_BUY
+                ev_preco[n_ev] = price
+                ev_indice[n_ev] = deslocamento + i
+                n_ev += 1
+            elif ordem == VENDA:
+                entrada = price
+                stop = price * sl_short
+                alvo = price * tp_short
+                tamanho = tamanho_ordem
+                lado = SHORT
+                ev_codigo[n_ev] = EVENTO_SELL
+                ev_preco[n_ev] = price
+                ev_indice[n_ev] = deslocamento + i
+                n_ev += 1
+
+    estado[USD] = usd
+    estado[BTC] = btc
+    estado[LADO] = lado
+    estado[ENTRADA] = entrada
+    estado[STOP] = stop
+    estado[ALVO] = alvo
+    estado[TAMANHO] = tamanho
+    return ev_codigo, ev_preco, ev_indice, n_ev
+
+
+_processar_candles_jit = njit(cache=True, nogil=True)(_processar_candles) if njit is not None else None
+
+
+# 🔹 Converte um array para float64/int8 contíguo sem copiar quando já estiver no formato certo
+def _contiguo(valores, dtype):
+    return np.ascontiguousarray(valores, dtype=dtype)
+
+
+# 🔹 Candles processados e trades abertos por uma chamada do núcleo (só com o perfil ligado)
+def _contar_execucao(eventos, n_antes, candles):
+    ev_codigo, _, _, n_ev = eventos
+    novos = ev_codigo[n_antes:n_ev]
+    perfil.contar("execucao", "candles", max(candles, 0))
+    perfil.contar("execucao", "trades_abertos", np.count_nonzero((novos == EVENTO_BUY) | (novos == EVENTO_SELL)))
+
+
+# 🔹 Roda o núcleo sobre os candles [inicio, fim), compilado quando possível e em blocos de listas quando não
+@perfil.cronometrar("execucao")
+def processar_candles(close, high, low, sinais, estado, contadores, tamanho_ordem,
+                      stop_loss_long=0.995, take_profit_long=1.01,
+                      stop_loss_short=1.005, take_profit_short=0.99,
+                      saida_reversa=False, verificar_saida=None, inicio=1, fim=None,
+                      eventos=None, resolucao=None, jit=None, exigir_saldo=False):
+    fim = len(close) if fim is None else fim
+    if eventos is None:
+        eventos = (np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64), 0)
+    ev_codigo, ev_preco, ev_indice, n_ev = eventos
+    n_antes = n_ev
+    close = _contiguo(close, np.float64)
+    high = _contiguo(high, np.float64)
+    low = _contiguo(low, np.float64)
+    sinais = _contiguo(sinais, np.int8)
+    gate = np.empty(0, dtype=np.bool_) if verificar_saida is None else _contiguo(verificar_saida, np.bool_)
+    ordem = np.empty(0, dtype=np.int8) if resolucao is None else _contiguo(resolucao, np.int8)
+    parametros = (tamanho_ordem, stop_loss_long, take_profit_long, stop_loss_short, take_profit_short,
+                  bool(saida_reversa), bool(exigir_saldo))
+
+    usar_jit = _processar_candles_jit is not None if jit is None else jit
+    if usar_jit:
+        if _processar_candles_jit is None:
+            raise RuntimeError("numba não está instalado; use jit=False")
+        eventos = _processar_candles_jit(
+            close[inicio:fim], high[inicio:fim], low[inicio:fim], sinais[inicio:fim],
+            gate[inicio:fim] if len(gate) else gate, ordem[inicio:fim] if len(ordem) else ordem, inicio,
+            estado, contadores, *parametros,
+            ev_codigo, ev_preco, ev_indice, n_ev,
+        )
+        if perfil.ativo():
+            _contar_execucao(eventos, n_antes, fim - inicio)
+        return eventos
+
+    # Sem numba: listas Python são bem mais rápidas de indexar escalar a escalar do que arrays NumPy
+    for bloco in range(inicio, fim, BLOCO_PYTHON):
+        ate = min(bloco + BLOCO_PYTHON, fim)
+        ev_codigo, ev_preco, ev_indice, n_ev = _processar_candles(
+            close[bloco:ate].tolist(), high[bloco:ate].tolist(), low[bloco:ate].tolist(),
+            sinais[bloco:ate].tolist(), gate[bloco:ate].tolist() if len(gate) else [],
+            ordem[bloco:ate].tolist() if len(ordem) else [], bloco, estado, contadores, *parametros, ev_codigo, ev_preco, ev_indice, n_ev,
+        )
+    if perfil.ativo():
+        _contar_execucao((ev_codigo, ev_preco, ev_indice, n_ev), n_antes, fim - inicio)
+    return ev_codigo, ev_preco, ev_indice, n_ev
+
+
+# 🔹 Fecha a posição aberta pelo preço de fechamento do último candle ("FECHAMENTO FORÇADO")
+def fechar_posicao(estado, preco, indice, eventos):
+    ev_codigo, ev_preco, ev_indice, n_ev = eventos
+    if estado[LADO] == 0.0:
+        return eventos
+    if estado[LADO] == LONG:
+        estado[USD] = estado[BTC] * preco
+    else:
+        estado[USD] += (estado[ENTRADA] - preco) * estado[TAMANHO]
+    estado[BTC] = 0.0
+    estado[LADO] = 0.0
+    ev_codigo = np.append(ev_codigo[:n_ev], np.int8(EVENTO_FECHAMENTO))
+    ev_preco = np.append(ev_preco[:n_ev], preco)
+    ev_indice = np.append(ev_indice[:n_ev], indice)
+    return ev_codigo, ev_preco, ev_indice, n_ev + 1
+
+
+# 🔹 Nome da coluna de tempo: os scripts da API usam "timestamp" e os de planilha usam "time"
+def coluna_tempo(df):
+    for nome in ("timestamp", "time"):
+        if nome in df.columns:
+            return nome
+    raise KeyError("O DataFrame não tem coluna 'timestamp' nem 'time'")
+
+
+# 🔹 Tempos do DataFrame como epoch em ms (int64), venham como datas ou já como números
+def tempos_ms(df):
+    tempo = df[coluna_tempo(df)].to_numpy()
+    if np.issubdtype(tempo.dtype, np.datetime64):
+        return tempo.astype("datetime64[ms]").astype(np.int64)
+    return tempo.astype(np.int64)
+
+
+# 🔹 Monta o registro de operações (registro.RegistroOperacoes), que itera como a lista (rótulo, preço, data)
+# que os scripts imprimem. Com `initial_balance` e `tamanho_ordem` o registro traz também o resultado de cada saída.
+def montar_operacoes(df, eventos, initial_balance=None, tamanho_ordem=None):
+    from backtesting_core.registro import RegistroOperacoes
+    return RegistroOperacoes.de_eventos(eventos, tempos_ms(df), initial_balance, tamanho_ordem)
+
+
+def contagem_trades(contadores):
+    return {
+        "win_long": int(contadores[WIN_LONG]),
+        "win_short": int(contadores[WIN_SHORT]),
+        "loss_long": int(contadores[LOSS_LONG]),
+        "loss_short": int(contadores[LOSS_SHORT]),
+        "win_reverse": int(contadores[WIN_REVERSE]),
+    }
+
+
+# 🔹 Estado (usd, btc, lado, entrada, tamanho) depois de cada evento, refeito com as mesmas contas do núcleo.
+# A posição 0 é o estado inicial e a posição k o estado depois do k-ésimo evento.
+# `tamanhos` tem um valor por candle, lido no índice da entrada (como o núcleo guarda o tamanho da posição).
+def estados_eventos(eventos, initial_balance, tamanhos):
+    ev_codigo, ev_preco, ev_indice, n_ev = eventos
+    usd = np.empty(n_ev + 1)
+    btc = np.zeros(n_ev + 1)
+    lado = np.zeros(n_ev + 1)
+    entrada = np.zeros(n_ev + 1)
+    tamanho = np.zeros(n_ev + 1)
+    usd[0] = initial_balance
+    for k, (codigo, preco, indice) in enumerate(zip(ev_codigo[:n_ev].tolist(), ev_preco[:n_ev].tolist(),
+                                                    ev_indice[:n_ev].tolist()), start=1):
+        for coluna in (usd, btc, lado, entrada, tamanho):
+            coluna[k] = coluna[k - 1]
+        if codigo == EVENTO_BUY:
+            btc[k] = usd[k] / preco
+            usd[k] = 0.0
+            entrada[k] = preco
+            tamanho[k] = tamanhos[indice]
+            lado[k] = LONG
+        elif codigo == EVENTO_SELL:
+            entrada[k] = preco
+            tamanho[k] = tamanhos[indice]
+            lado[k] = SHORT
+        else:
+            if lado[k] == LONG:
+                usd[k] = btc[k] * preco
+            else:
+                usd[k] += (entrada[k] - preco) * tamanho[k]
+            btc[k] = 0.0
+            lado[k] = 0.0
+    return usd, btc, lado, entrada, tamanho
+
+
+# 🔹 Resultado de cada saída (o quanto mudou o saldo desde antes da entrada), a partir do usd de estados_eventos.
+# Toda saída fecha a posição aberta pelo evento anterior. Devolve as posições das saídas nos eventos e os resultados.
+def resultados_saidas(eventos, usd):
+    ev_codigo, _, _, n_ev = eventos
+    codigo = ev_codigo[:n_ev]
+    saidas = np.flatnonzero((codigo != EVENTO_BUY) & (codigo != EVENTO_SELL))
+    saidas = saidas[saidas > 0]
+    # usd[k] é o saldo depois do k-ésimo evento: a saída s compara com o saldo antes da entrada s - 1
+    return saidas, usd[saidas + 1] - usd[saidas - 1]
+
+
+# 🔹 Aplica o estado depois de cada evento (estados_eventos) aos closes até o evento seguinte, sem loop por candle.
+# Devolve o patrimônio marcado a mercado e o lado da posição no fechamento de cada candle.
+def marcar_a_mercado(close, eventos, estados):
+    usd, btc, lado, entrada, tamanho = estados
+    _, _, ev_indice, n_ev = eventos
+    # Quantos eventos já aconteceram até cada candle (inclusive) = posição do estado daquele candle
+    estado = np.cumsum(np.bincount(ev_indice[:n_ev], minlength=len(close)))
+    lado_candle = lado[estado]
+    valor = np.where(lado_candle == LONG, btc[estado] * close, 0.0)
+    valor = np.where(lado_candle == SHORT, (entrada[estado] - close) * tamanho[estado], valor)
+    return usd[estado] + valor, lado_candle
+
+
+# 🔹 Patrimônio marcado a mercado em cada candle, reconstruído dos eventos.
+# `tamanho_ordem` pode ser um array por candle (ex.: parâmetros diferentes em cada janela do walk-forward).
+def curva_patrimonio(close, eventos, initial_balance, tamanho_ordem):
+    close = np.asarray(close, dtype=np.float64)
+    tamanhos = np.broadcast_to(np.asarray(tamanho_ordem, dtype=np.float64), close.shape)
+    estados = estados_eventos(eventos, initial_balance, tamanhos)
+    return marcar_a_mercado(close, eventos, estados)[0]
+
+
+# 🔹 Backtest completo direto sobre os arrays, sem montar a lista de operações
+def executar_arrays(close, high, low, sinais, initial_balance, tamanho_ordem, stop_loss_long=0.995,
+                    take_profit_long=1.01, stop_loss_short=1.005, take_profit_short=0.99, saida_reversa=False,
+                    fechamento_forcado=True, verificar_saida=None, resolucao=None, jit=None, observadores=None,
+                    exigir_saldo=False):
+    estado, contadores = novo_estado(initial_balance)
+    eventos = processar_candles(
+        close, high, low, sinais, estado, contadores, tamanho_ordem, stop_loss_long, take_profit_long,
+        stop_loss_short, take_profit_short, saida_reversa, verificar_saida, resolucao=resolucao, jit=jit,
+        exigir_saldo=exigir_saldo,
+    )
+    if fechamento_forcado and len(close):
+        eventos = fechar_posicao(estado, close[-1], len(close) - 1, eventos)
+    # Observadores (observadores.Observadores) recebem os eventos depois do loop: sem inscritos não custam nada
+    if observadores is not None and observadores.ativo():
+        observadores.publicar(eventos, sinais, close=close)
+    return eventos, float(estado[USD]), contagem_trades(contadores)
+
+
+# 🔹 Backtest completo sobre os arrays do DataFrame a partir de uma coluna de sinais já gerada.
+# Com `observadores` os registros trazem também o timestamp e, nos sinais, as colunas pedidas do df.
+def executar_sinais(df, sinais, initial_balance, tamanho_ordem, observadores=None, **opcoes):
+    close = df["close"].to_numpy(dtype=np.float64)
+    eventos, usd_balance, contagem = executar_arrays(
+        close, df["high"].to_numpy(dtype=np.float64), df["low"].to_numpy(dtype=np.float64), sinais,
+        initial_balance, tamanho_ordem, **opcoes,
+    )
+    if observadores is not None and observadores.ativo():
+        extras = {nome: df[nome].to_numpy() for nome in observadores.colunas}
+        observadores.publicar(eventos, sinais, tempos_ms(df), close, extras)
+    return montar_operacoes(df, eventos, initial_balance, tamanho_ordem), usd_balance, contagem
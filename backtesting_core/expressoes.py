@@ -0,0 +1,340 @@
+import functools
+import re
+
+import numpy as np
+
+from backtesting_core.sinais import montar_sinais
+
+# 🔹 Linguagem de regras de entrada compilada para máscaras NumPy, no lugar de uma função Python por ideia:
+#   trix > 0 & %K < 30 & ADX > adx_minimo & trix_delta < 0
+#   MME9 cruza_acima MME21 & ADX > 15 & OBV > anterior(OBV)
+# Nomes são colunas do df (%K, ADX_1H, trix_delta...) ou parâmetros passados na compilação; números, + - * /,
+# comparações (< <= > >= == !=), cruza_acima/cruza_abaixo, & (e), | (ou), ~ (não) e parênteses.
+# Diferente do Python, & e | ligam mais fraco que as comparações, então `trix > 0 & %K < 30` não precisa de parênteses.
+# Funções: anterior(x, n=1) (valor de n candles atrás, NaN no início) e abs(x).
+# `a cruza_acima b` é (anterior(a) < anterior(b)) & (a > b), como o cruzamento MME9/MME21 do backtesting_v03.py.
+# Cada regra vira uma árvore canônica de tuplas (comparações com > viram <, operandos de & e | ordenados, constantes
+# já calculadas); um lote de regras é compilado numa lista única de nós, então uma subexpressão repetida entre as
+# regras (a mesma coluna, o mesmo anterior(), a mesma comparação) é calculada uma vez por avaliação.
+_TOKEN = re.compile(
+    r"\s*(?:(?P<numero>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+    r"|(?P<nome>[%A-Za-z_][%\w]*)"
+    r"|(?P<op>>=|<=|==|!=|[-+*/()<>&|~,]))"
+)
+CRUZAMENTOS = ("cruza_acima", "cruza_abaixo")
+COMPARACOES = ("<", "<=", ">", ">=", "==", "!=")
+FUNCOES = {"anterior": (1, 2), "abs": (1, 1)}  # nome: (mínimo, máximo) de argumentos
+
+_NUMERICO = "numero"
+_BOOLEANO = "booleano"
+
+_OPERACOES = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "neg": np.negative,
+    "abs": np.abs,
+    "~": np.logical_not,
+}
+_TIPOS = {"+": _NUMERICO, "-": _NUMERICO, "*": _NUMERICO, "/": _NUMERICO, "neg": _NUMERICO, "abs": _NUMERICO,
+          "anterior": _NUMERICO, "coluna": _NUMERICO, "<": _BOOLEANO, "<=": _BOOLEANO, "==": _BOOLEANO,
+          "!=": _BOOLEANO, "~": _BOOLEANO, "&": _BOOLEANO, "|": _BOOLEANO}
+
+
+def _tipo(no):
+    if no[0] == "const":
+        return _BOOLEANO if isinstance(no[1], bool) else _NUMERICO
+    return _TIPOS[no[0]]
+
+
+def _anterior(valores, n):
+    valores = np.asarray(valores, dtype=np.float64)
+    if np.ndim(valores) == 0:
+        return valores
+    anterior = np.empty_like(valores)
+    anterior[:n] = np.nan
+    anterior[n:] = valores[:len(valores) - n]
+    return anterior
+
+
+# 🔹 Construção dos nós já na forma canônica
+def _no(op, *filhos):
+    if op == ">":
+        op, filhos = "<", filhos[::-1]
+    elif op == ">=":
+        op, filhos = "<=", filhos[::-1]
+    if op in ("&", "|"):
+        operandos = set()
+        for filho in filhos:
+            operandos.update(filho[1:] if filho[0] == op else (filho,))
+        constantes = [filho[1] for filho in operandos if filho[0] == "const"]
+        operandos = [filho for filho in operandos if filho[0] != "const"]
+        neutro = op == "&"
+        if any(valor != neutro for valor in constantes):
+            return ("const", not neutro)  # x & False, x | True
+        if not operandos:
+            return ("const", neutro)
+        if len(operandos) == 1:
+            return operandos[0]
+        return (op, *sorted(operandos, key=repr))
+    if op == "anterior" and filhos[0][0] == "const":
+        return filhos[0]
+    if op in ("==", "!=") or op in ("+", "*"):
+        filhos = tuple(sorted(filhos, key=repr))
+    if op in _OPERACOES and all(filho[0] == "const" for filho in filhos):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valor = _OPERACOES[op](*(filho[1] for filho in filhos))
+        return ("const", bool(valor) if _TIPOS[op] == _BOOLEANO else float(valor))
+    return (op, *filhos)
+
+
+class _Parser:
+    def __init__(self, texto, params):
+        self.texto = texto
+        self.params = params
+        self.tokens = []
+        posicao = 0
+        texto = texto.rstrip()
+        while posicao < len(texto):
+            achado = _TOKEN.match(texto, posicao)
+            if achado is None:
+                while texto[posicao].isspace():
+                    posicao += 1
+                self.erro(posicao, "caractere inesperado")
+            tipo = achado.lastgroup
+            self.tokens.append((tipo, achado.group(tipo), achado.start(tipo)))
+            posicao = achado.end()
+        self.tokens.append(("fim", "", len(texto)))
+        self.atual = 0
+
+    def erro(self, posicao, motivo):
+        raise ValueError(f"regra inválida na posição {posicao}: {motivo}\n  {self.texto}\n  {' ' * posicao}^")
+
+    def olhar(self):
+        return self.tokens[self.atual]
+
+    def aceitar(self, *valores):
+        tipo, valor, _ = self.tokens[self.atual]
+        if tipo in ("op", "nome") and valor in valores:
+            self.atual += 1
+            return valor
+        return None
+
+    def exigir(self, valor):
+        if self.aceitar(valor) is None:
+            self.erro(self.olhar()[2], f"esperava {valor!r}")
+
+    def checar(self, no, tipo, posicao):
+        if _tipo(no) != tipo:
+            self.erro(posicao, "esperava uma condição" if tipo == _BOOLEANO else "esperava um valor numérico")
+        return no
+
+    def regra(self):
+        posicao = self.olhar()[2]
+        no = self.checar(self.ou(), _BOOLEANO, posicao)
+        if self.olhar()[0] != "fim":
+            self.erro(self.olhar()[2], "sobrou texto depois da regra")
+        return no
+
+    def ou(self):
+        posicao = self.olhar()[2]
+        no = self.e()
+        while self.aceitar("|"):
+            direita = self.olhar()[2]
+            no = _no("|", self.checar(no, _BOOLEANO, posicao), self.checar(self.e(), _BOOLEANO, direita))
+        return no
+
+    def e(self):
+        posicao = self.olhar()[2]
+        no = self.nao()
+        while self.aceitar("&"):
+            direita = self.olhar()[2]
+            no = _no("&", self.checar(no, _BOOLEANO, posicao), self.checar(self.nao(), _BOOLEANO, direita))
+        return no
+
+    def nao(self):
+        if self.aceitar("~"):
+            posicao = self.olhar()[2]
+            return _no("~", self.checar(self.nao(), _BOOLEANO, posicao))
+        return self.comparacao()
+
+    def comparacao(self):
+        posicao = self.olhar()[2]
+        no = self.soma()
+        op = self.aceitar(*COMPARACOES, *CRUZAMENTOS)
+        if op is None:
+            return no
+        direita_posicao = self.olhar()[2]
+        esquerda = self.checar(no, _NUMERICO, posicao)
+        direita = self.checar(self.soma(), _NUMERICO, direita_posicao)
+        if op in CRUZAMENTOS:
+            antes, depois = ("<", ">") if op == "cruza_acima" else (">", "<")
+            return _no("&", _no(antes, _no("anterior", esquerda, 1), _no("anterior", direita, 1)),
+                       _no(depois, esquerda, direita))
+        return _no(op, esquerda, direita)
+
+    def soma(self):
+        posicao = self.olhar()[2]
+        no = self.produto()
+        while (op := self.aceitar("+", "-")) is not None:
+            direita = self.olhar()[2]
+            no = _no(op, self.checar(no, _NUMERICO, posicao), self.checar(self.produto(), _NUMERICO, direita))
+        return no
+
+    def produto(self):
+        posicao = self.olhar()[2]
+        no = self.unario()
+        while (op := self.aceitar("*", "/")) is not None:
+            direita = self.olhar()[2]
+            no = _no(op, self.checar(no, _NUMERICO, posicao), self.checar(self.unario(), _NUMERICO, direita))
+        return no
+
+    def unario(self):
+        if self.aceitar("-"):
+            posicao = self.olhar()[2]
+            return _no("neg", self.checar(self.unario(), _NUMERICO, posicao))
+        return self.atomo()
+
+    def atomo(self):
+        tipo, valor, posicao = self.olhar()
+        if tipo == "numero":
+            self.atual += 1
+            return ("const", float(valor))
+        if tipo == "op" and valor == "(":
+            self.atual += 1
+            no = self.ou()
+            self.exigir(")")
+            return no
+        if tipo != "nome" or valor in CRUZAMENTOS:
+            self.erro(posicao, "esperava um número, uma coluna ou '('")
+        self.atual += 1
+        if self.aceitar("("):
+            return self.funcao(valor, posicao)
+        if valor in self.params:
+            return ("const", float(self.params[valor]))
+        return ("coluna", valor)
+
+    def funcao(self, nome, posicao):
+        if nome not in FUNCOES:
+            self.erro(posicao, f"função desconhecida: {nome!r} (disponíveis: {', '.join(FUNCOES)})")
+        args = []
+        if not self.aceitar(")"):
+            while True:
+                inicio = self.olhar()[2]
+                args.append((self.checar(self.soma(), _NUMERICO, inicio), inicio))
+                if self.aceitar(")"):
+                    break
+                self.exigir(",")
+        minimo, maximo = FUNCOES[nome]
+        if not minimo <= len(args) <= maximo:
+            self.erro(posicao, f"{nome}() recebe de {minimo} a {maximo} argumentos")
+        if nome == "abs":
+            return _no("abs", args[0][0])
+        n = args[1][0] if len(args) > 1 else ("const", 1.0)
+        if n[0] != "const" or n[1] < 1 or n[1] != int(n[1]):
+            self.erro(args[1][1], "o deslocamento de anterior() deve ser um inteiro positivo")
+        return _no("anterior", args[0][0], int(n[1]))
+
+
+# 🔹 Regra em texto -> árvore canônica; `params` substituem nomes por constantes (ex.: adx_minimo)
+def analisar(texto, params=None):
+    return _Parser(texto, params or {}).regra()
+
+
+class Programa:
+    # `regras`: {nome: texto}; todos os nós distintos das regras ficam numa lista em ordem de dependência
+    def __init__(self, regras, params=None):
+        self.regras = dict(regras)
+        self._posicoes = {}
+        self._instrucoes = []
+        self.raizes = {nome: self._incluir(analisar(texto, params)) for nome, texto in self.regras.items()}
+        self.colunas = tuple(sorted({no[1] for no, _ in self._instrucoes if no[0] == "coluna"}))
+        # Depois da última leitura um resultado intermediário é descartado para não segurar memória
+        ultima = {}
+        for posicao, (_, entradas) in enumerate(self._instrucoes):
+            for entrada in entradas:
+                ultima[entrada] = posicao
+        raizes = set(self.raizes.values())
+        self._liberar = [[] for _ in self._instrucoes]
+        for entrada, posicao in ultima.items():
+            if entrada not in raizes:
+                self._liberar[posicao].append(entrada)
+
+    def _incluir(self, no):
+        if no in self._posicoes:
+            return self._posicoes[no]
+        if no[0] in ("const", "coluna"):
+            entradas = ()
+        elif no[0] == "anterior":
+            entradas = (self._incluir(no[1]),)
+        else:
+            entradas = tuple(self._incluir(filho) for filho in no[1:])
+        self._posicoes[no] = len(self._instrucoes)
+        self._instrucoes.append((no, entradas))
+        return self._posicoes[no]
+
+    def __len__(self):
+        return len(self._instrucoes)
+
+    def __repr__(self):
+        return f"Programa({len(self.regras)} regras, {len(self._instrucoes)} nós, colunas={list(self.colunas)})"
+
+    # 🔹 Avalia todas as regras sobre o df de uma vez: {nome: máscara booleana com len(df) candles}
+    def avaliar(self, df):
+        ausentes = [nome for nome in self.colunas if nome not in df.columns]
+        if ausentes:
+            raise ValueError(f"coluna(s) ausente(s) no df para as regras: {', '.join(ausentes)}")
+        n = len(df)
+        valores = [None] * len(self._instrucoes)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for posicao, (no, entradas) in enumerate(self._instrucoes):
+                args = [valores[entrada] for entrada in entradas]
+                op = no[0]
+                if op == "const":
+                    valor = no[1]
+                elif op == "coluna":
+                    valor = df[no[1]].to_numpy(dtype=np.float64)
+                elif op == "anterior":
+                    valor = _anterior(args[0], no[2])
+                elif op in ("&", "|"):
+                    juntar = np.logical_and if op == "&" else np.logical_or
+                    valor = juntar(args[0], args[1])
+                    for arg in args[2:]:
+                        juntar(valor, arg, out=valor)
+                else:
+                    valor = _OPERACOES[op](*args)
+                valores[posicao] = valor
+                for entrada in self._liberar[posicao]:
+                    valores[entrada] = None
+        return {nome: np.broadcast_to(np.asarray(valores[posicao], dtype=bool), (n,)) if np.ndim(valores[posicao]) == 0
+                else np.asarray(valores[posicao], dtype=bool) for nome, posicao in self.raizes.items()}
+
+
+@functools.lru_cache(maxsize=256)
+def _compilar(regras, params):
+    return Programa(dict(regras), dict(params))
+
+
+# 🔹 Compila (com cache) um lote {nome: texto}; regras repetidas entre chamadas não são reanalisadas
+def compilar(regras, **params):
+    return _compilar(tuple(regras.items()), tuple(sorted(params.items())))
+
+
+# 🔹 Várias estratégias {nome: {"compra": texto, "venda": texto}} num só programa: {nome: array int8 de sinais}
+def avaliar_estrategias(df, estrategias, aquecimento=0, **params):
+    regras = {}
+    for nome, lados in estrategias.items():
+        for lado in ("compra", "venda"):
+            if lados.get(lado):
+                regras[(nome, lado)] = lados[lado]
+    mascaras = compilar(regras, **params).avaliar(df)
+    vazia = np.zeros(len(df), dtype=bool)
+    return {
+        nome: montar_sinais(mascaras.get((nome, "compra"), vazia), mascaras.get((nome, "venda"), vazia), aquecimento)
+        for nome in estrategias
+    }
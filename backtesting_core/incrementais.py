@@ -0,0 +1,375 @@
+import math
+from collections import deque
+
+import numpy as np
+
+from backtesting_core import indicadores
+from backtesting_core.indicadores import ADX_DM_CLOSE, VARIANTES_ADX, alfa_span
+
+# 🔹 Versões incrementais dos indicadores de `indicadores`: cada candle novo custa O(1) e o estado cabe num dict
+# pequeno (serializável em JSON), então dá para acompanhar um feed ao vivo ou anexar candles sem recalcular
+# o histórico. As contas são as mesmas dos núcleos em lote (as funções escalares são reaproveitadas), então o
+# valor do último candle é idêntico ao da coluna calculada sobre o histórico inteiro.
+
+
+def _python(funcao):
+    # com numba os auxiliares estão compilados; chamados candle a candle, a versão Python pura sai mais barata
+    return getattr(funcao, "py_func", funcao)
+
+
+_ewm_passo = _python(indicadores._ewm_passo)
+_mm_novo = _python(indicadores._mm_novo)
+_mm_adicionar = _python(indicadores._mm_adicionar)
+_mm_remover = _python(indicadores._mm_remover)
+_mm_valor = _python(indicadores._mm_valor)
+_maximo = _python(indicadores._maximo)
+
+NAN = float("nan")
+
+
+def _para_json(valor):
+    if isinstance(valor, IndicadorIncremental):
+        return valor.estado()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    if isinstance(valor, deque):
+        return [list(item) if isinstance(item, tuple) else item for item in valor]
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+# 🔹 Base: `estado()` devolve parâmetros + variáveis internas; `restaurar(estado)` reconstrói o indicador
+class IndicadorIncremental:
+    PARAMETROS = ()
+
+    def estado(self):
+        estado = {nome: _para_json(valor) for nome, valor in vars(self).items()}
+        estado["indicador"] = type(self).__name__
+        return estado
+
+    @classmethod
+    def restaurar(cls, estado):
+        indicador = cls(**{nome: estado[nome] for nome in cls.PARAMETROS})
+        for nome, atual in vars(indicador).items():
+            valor = estado[nome]
+            if isinstance(atual, IndicadorIncremental):
+                valor = type(atual).restaurar(valor)
+            elif isinstance(atual, np.ndarray):
+                valor = np.array(valor, dtype=atual.dtype)
+            elif isinstance(atual, deque):
+                valor = deque((tuple(item) if isinstance(item, list) else item for item in valor),
+                              maxlen=atual.maxlen)
+            setattr(indicador, nome, valor)
+        return indicador
+
+
+class MMEIncremental(IndicadorIncremental):
+    PARAMETROS = ("periodo",)
+
+    def __init__(self, periodo=9):
+        self.periodo = periodo
+        self.alfa = alfa_span(periodo)
+        self.media, self.peso, self.obs = NAN, 1.0, 0
+
+    def atualizar(self, valor):
+        self.media, self.peso, self.obs = _ewm_passo(self.media, self.peso, self.obs, valor, self.alfa)
+        return self.media
+
+
+# 🔹 TRIX e trix_delta; `mme1` recebe a primeira média da cadeia quando ela já é mantida por fora (MME compartilhada)
+class TRIXIncremental(IndicadorIncremental):
+    PARAMETROS = ("periodo",)
+
+    def __init__(self, periodo=14):
+        self.periodo = periodo
+        self.alfa = alfa_span(periodo)
+        self.m1, self.p1, self.o1 = NAN, 1.0, 0
+        self.m2, self.p2, self.o2 = NAN, 1.0, 0
+        self.m3, self.p3, self.o3 = NAN, 1.0, 0
+        self.anterior = NAN
+        self.trix = NAN
+
+    def atualizar(self, close, mme1=None):
+        if mme1 is None:
+            self.m1, self.p1, self.o1 = _ewm_passo(self.m1, self.p1, self.o1, close, self.alfa)
+            mme1 = self.m1
+        self.m2, self.p2, self.o2 = _ewm_passo(self.m2, self.p2, self.o2, mme1, self.alfa)
+        self.m3, self.p3, self.o3 = _ewm_passo(self.m3, self.p3, self.o3, self.m2, self.alfa)
+        trix = (self.m3 / self.anterior - 1.0) * 100.0
+        delta = trix - self.trix
+        self.anterior = self.m3
+        self.trix = trix
+        return trix, delta
+
+
+def _divisao(a, b):
+    # como no NumPy: divisão por zero vira inf/NaN em vez de exceção
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+# 🔹 ADX e adx_delta nas duas variantes de `indicadores`: médias exponenciais (estilo Wilder) ou médias simples
+class ADXIncremental(IndicadorIncremental):
+    PARAMETROS = ("periodo", "variante")
+
+    def __init__(self, periodo=14, variante=ADX_DM_CLOSE):
+        if variante not in VARIANTES_ADX:
+            raise ValueError(f"variante de ADX desconhecida: {variante!r} (use {', '.join(VARIANTES_ADX)})")
+        self.periodo = periodo
+        self.variante = variante
+        self.alfa = alfa_span(periodo)
+        self.high_anterior = NAN
+        self.low_anterior = NAN
+        self.close_anterior = NAN
+        self.adx = NAN
+        self.indice = 0
+        if variante == ADX_DM_CLOSE:
+            self.mp, self.pp, self.op = NAN, 1.0, 0
+            self.mm, self.pm, self.om = NAN, 1.0, 0
+            self.ma, self.pa, self.oa = NAN, 1.0, 0
+        else:
+            self.tr = MMSIncremental(periodo, 1)
+            self.media_mais = MMSIncremental(periodo, 1)
+            self.media_menos = MMSIncremental(periodo, 1)
+            self.media_dx = MMSIncremental(periodo, 1)
+
+    def atualizar(self, high, low, close):
+        if self.variante == ADX_DM_CLOSE:
+            adx = self._dm_close(high, low, close)
+        else:
+            adx = self._true_range(high, low, close)
+        delta = adx - self.adx
+        self.adx = adx
+        self.high_anterior, self.low_anterior, self.close_anterior = high, low, close
+        self.indice += 1
+        return adx, delta
+
+    def _dm_close(self, high, low, close):
+        high_diff = high - self.high_anterior
+        low_diff = low - self.low_anterior
+        mais_dm = (1.0 if (high_diff > low_diff and high_diff > 0) else 0.0) * high_diff
+        menos_dm = (1.0 if (low_diff > high_diff and low_diff > 0) else 0.0) * low_diff
+        self.mp, self.pp, self.op = _ewm_passo(self.mp, self.pp, self.op, mais_dm, self.alfa)
+        self.mm, self.pm, self.om = _ewm_passo(self.mm, self.pm, self.om, menos_dm, self.alfa)
+        mais_di = 100.0 * _divisao(self.mp, close)
+        menos_di = 100.0 * _divisao(self.mm, close)
+        dx = _divisao(100.0 * abs(mais_di - menos_di), mais_di + menos_di)
+        self.ma, self.pa, self.oa = _ewm_passo(self.ma, self.pa, self.oa, dx, self.alfa)
+        return self.ma
+
+    def _true_range(self, high, low, close):
+        anterior = self.close_anterior
+        tr = _maximo(high - low, _maximo(abs(high - anterior), abs(low - anterior)))
+        if self.indice == 0:
+            mais_dm = menos_dm = 0.0
+        else:
+            subida = high - self.high_anterior
+            descida = self.low_anterior - low
+            mais_dm = _maximo(subida, 0.0) if subida > descida else 0.0
+            menos_dm = _maximo(descida, 0.0) if descida > subida else 0.0
+        atr = self.tr.atualizar(tr)
+        mais_di = 100.0 * _divisao(self.media_mais.atualizar(mais_dm), atr)
+        menos_di = 100.0 * _divisao(self.media_menos.atualizar(menos_dm), atr)
+        dx = 100.0 * _divisao(abs(mais_di - menos_di), mais_di + menos_di)
+        adx = self.media_dx.atualizar(dx)
+        return 0.0 if adx != adx else adx
+
+
+# 🔹 Média móvel simples com soma corrente (mesma soma compensada do rolling().mean())
+class MMSIncremental(IndicadorIncremental):
+    PARAMETROS = ("periodo", "minimo")
+
+    def __init__(self, periodo=14, minimo=None):
+        self.periodo = periodo
+        self.minimo = periodo if minimo is None else minimo
+        self.soma = _mm_novo(NAN)
+        self.valores = deque(maxlen=periodo)
+
+    def atualizar(self, valor):
+        if len(self.valores) == self.periodo:
+            _mm_remover(self.soma, self.valores[0])
+        self.valores.append(valor)
+        _mm_adicionar(self.soma, valor)
+        return _mm_valor(self.soma, self.minimo)
+
+
+class RSIIncremental(IndicadorIncremental):
+    PARAMETROS = ("periodo",)
+
+    def __init__(self, periodo=14):
+        self.periodo = periodo
+        self.ganhos = _mm_novo(NAN)
+        self.perdas = _mm_novo(NAN)
+        self.variacoes = deque(maxlen=periodo)
+        self.close_anterior = NAN
+        self.indice = 0
+
+    def atualizar(self, close):
+        variacao = close - self.close_anterior if self.indice > 0 else NAN
+        if len(self.variacoes) == self.periodo:
+            saindo = self.variacoes[0]
+            _mm_remover(self.ganhos, saindo if saindo > 0 else 0.0)
+            _mm_remover(self.perdas, -(saindo if saindo < 0 else 0.0))
+        self.variacoes.append(variacao)
+        _mm_adicionar(self.ganhos, variacao if variacao > 0 else 0.0)
+        _mm_adicionar(self.perdas, -(variacao if variacao < 0 else 0.0))
+        self.close_anterior = close
+        self.indice += 1
+        rs = _divisao(_mm_valor(self.ganhos, self.periodo), _mm_valor(self.perdas, self.periodo))
+        return 100.0 - _divisao(100.0, 1.0 + rs)
+
+
+class OBVIncremental(IndicadorIncremental):
+    def __init__(self):
+        self.obv = 0.0
+        self.close_anterior = NAN
+
+    def atualizar(self, close, volume):
+        if close > self.close_anterior:
+            self.obv += volume
+        elif close < self.close_anterior:
+            self.obv += -volume
+        else:
+            self.obv += 0.0
+        self.close_anterior = close
+        return self.obv
+
+
+# 🔹 Estocástico: mínima/máxima móveis por fila monotônica (índice, valor) e %D por média móvel do %K
+class EstocasticoIncremental(IndicadorIncremental):
+    PARAMETROS = ("periodo", "suavizacao")
+
+    def __init__(self, periodo=14, suavizacao=3):
+        self.periodo = periodo
+        self.suavizacao = suavizacao
+        self.fila_min = deque()
+        self.fila_max = deque()
+        self.ultimo_nan = -periodo  # índice do último candle com high/low NaN (derruba a janela inteira)
+        self.indice = 0
+        self.media_k = _mm_novo(NAN)
+        self.ks = deque(maxlen=suavizacao)
+
+    @staticmethod
+    def _empurrar(fila, indice, valor, maximo):
+        while fila and ((fila[-1][1] <= valor) if maximo else (fila[-1][1] >= valor)):
+            fila.pop()
+        fila.append((indice, valor))
+
+    def atualizar(self, high, low, close):
+        i = self.indice
+        self.indice += 1
+        for fila in (self.fila_min, self.fila_max):
+            while fila and fila[0][0] <= i - self.periodo:
+                fila.popleft()
+        if low != low or high != high:
+            self.ultimo_nan = i
+        if low == low:
+            self._empurrar(self.fila_min, i, low, False)
+        if high == high:
+            self._empurrar(self.fila_max, i, high, True)
+
+        if i + 1 < self.periodo or i - self.ultimo_nan < self.periodo:
+            low_min = high_max = NAN
+        else:
+            low_min = self.fila_min[0][1]
+            high_max = self.fila_max[0][1]
+        k = _divisao(close - low_min, high_max - low_min) * 100.0
+
+        if len(self.ks) == self.suavizacao:
+            _mm_remover(self.media_k, self.ks[0])
+        self.ks.append(k)
+        _mm_adicionar(self.media_k, k)
+        return k, _mm_valor(self.media_k, self.suavizacao)
+
+
+INCREMENTAIS = {
+    classe.__name__: classe
+    for classe in (MMEIncremental, TRIXIncremental, ADXIncremental, MMSIncremental, RSIIncremental, OBVIncremental,
+                   EstocasticoIncremental)
+}
+
+
+def restaurar_indicador(estado):
+    return INCREMENTAIS[estado["indicador"]].restaurar(estado)
+
+
+# 🔹 Conjunto de indicadores alimentado candle a candle, com a mesma especificação de `calcular_indicadores`:
+# [("mme", {"periodo": 9}), ("trix", {"periodo": 9}), ("adx", {})] -> {"MME9": ..., "trix": ..., "ADX": ...}.
+# As médias exponenciais do close são compartilhadas entre MME e TRIX, como na versão em lote.
+class IndicadoresIncrementais:
+    def __init__(self, especificacao):
+        self.especificacao = [(nome, dict(params)) for nome, params in especificacao]
+        self.medias = {}
+        self.indicadores = []
+        for nome, params in self.especificacao:
+            if nome == "mme":
+                self._media(params.get("periodo", 9))
+                self.indicadores.append(None)
+            elif nome in _CONSTRUTORES:
+                self.indicadores.append(_CONSTRUTORES[nome](**params))
+            else:
+                raise ValueError(f"indicador desconhecido: {nome!r} (disponíveis: mme, {', '.join(sorted(_CONSTRUTORES))})")
+
+    def _media(self, periodo):
+        if periodo not in self.medias:
+            self.medias[periodo] = MMEIncremental(periodo)
+        return self.medias[periodo]
+
+    def atualizar(self, high, low, close, volume=NAN):
+        medias = {periodo: media.atualizar(close) for periodo, media in self.medias.items()}
+        valores = {}
+        for (nome, params), indicador in zip(self.especificacao, self.indicadores):
+            if nome == "mme":
+                periodo = params.get("periodo", 9)
+                valores[f"MME{periodo}"] = medias[periodo]
+            elif nome == "trix":
+                mme1 = medias.get(indicador.periodo)
+                valores["trix"], valores["trix_delta"] = indicador.atualizar(close, mme1)
+            elif nome == "adx":
+                valores["ADX"], valores["adx_delta"] = indicador.atualizar(high, low, close)
+            elif nome == "estocastico":
+                valores["%K"], valores["%D"] = indicador.atualizar(high, low, close)
+            elif nome == "sma":
+                valores["sma"] = indicador.atualizar(close)
+            elif nome == "rsi":
+                valores["RSI"] = indicador.atualizar(close)
+            elif nome == "obv":
+                valores["OBV"] = indicador.atualizar(close, volume)
+        return valores
+
+    # Alimenta o histórico já existente (ex.: o DataFrame do cache) para o estado ficar igual ao da versão em lote
+    def aquecer(self, df):
+        valores = {}
+        volume = df["volume"].to_numpy(dtype=np.float64) if "volume" in df else None
+        colunas = [df[nome].to_numpy(dtype=np.float64).tolist() for nome in ("high", "low", "close")]
+        for i, (high, low, close) in enumerate(zip(*colunas)):
+            valores = self.atualizar(high, low, close, NAN if volume is None else float(volume[i]))
+        return valores
+
+    def estado(self):
+        return {
+            "especificacao": self.especificacao,
+            "medias": {str(periodo): media.estado() for periodo, media in self.medias.items()},
+            "indicadores": [None if indicador is None else indicador.estado() for indicador in self.indicadores],
+        }
+
+    @classmethod
+    def restaurar(cls, estado):
+        conjunto = cls(estado["especificacao"])
+        conjunto.medias = {int(periodo): MMEIncremental.restaurar(salvo) for periodo, salvo in estado["medias"].items()}
+        conjunto.indicadores = [None if salvo is None else restaurar_indicador(salvo) for salvo in estado["indicadores"]]
+        return conjunto
+
+
+_CONSTRUTORES = {
+    "trix": TRIXIncremental,
+    "adx": ADXIncremental,
+    "estocastico": EstocasticoIncremental,
+    "sma": MMSIncremental,
+    "rsi": RSIIncremental,
+    "obv": OBVIncremental,
+}
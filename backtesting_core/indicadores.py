@@ -0,0 +1,836 @@
+import numpy as np
+import pandas as pd
+
+from backtesting_core import perfil
+
+try:
+    from numba import njit
+except ImportError:  # numba é opcional: sem ele cada indicador cai na mesma fórmula escrita com pandas
+    njit = None
+
+# 🔹 Biblioteca única dos indicadores usados pelos scripts.
+# Cada indicador escreve só nas colunas/buffers de saída: nada de colunas auxiliares (ema1, +DM, low_min...)
+# penduradas no DataFrame. Com numba os núcleos percorrem os candles uma vez, guardando o estado em escalares;
+# sem numba a mesma conta é feita com pandas, e as duas versões dão exatamente o mesmo resultado.
+
+# 🔹 Variantes do ADX encontradas nos scripts (as fórmulas divergem e os resultados também)
+ADX_DM_CLOSE = "dm_close"  # ADX/TRIX/STOCH: médias exponenciais do +DM/-DM divididas pelo close
+ADX_TRUE_RANGE = "true_range"  # v03: médias simples do +DM/-DM divididas pelo ATR (média do true range)
+VARIANTES_ADX = (ADX_DM_CLOSE, ADX_TRUE_RANGE)
+
+# error_model="numpy": divisão por zero vira inf/NaN como no pandas, em vez de levantar exceção
+_compilar = njit(cache=True, nogil=True, error_model="numpy") if njit is not None else (lambda funcao: funcao)
+
+# Posições do vetor de estado da média móvel simples (mesma soma compensada do rolling().mean() do pandas)
+_SOMA, _COMP_ADD, _COMP_REM, _OBS, _NEGATIVOS, _IGUAIS, _ULTIMO = range(7)
+
+# Até este tamanho a mínima/máxima móvel varre a janela; acima usa fila monotônica
+JANELA_VARREDURA = 32
+
+# Núcleos em lote (vários períodos numa passada): a série é lida uma vez, em blocos de BLOCO_LOTE candles.
+# Nas médias exponenciais, em cada candle todos os períodos avançam um passo (cadeias independentes, que o
+# processador calcula em paralelo) num bloco (candles x períodos) que depois é copiado para as linhas da saída;
+# o custo fica perto do de escrever a matriz de saída. No estocástico, janelas até JANELA_LOTE saem de uma única
+# varredura para trás por candle que serve a todos os períodos.
+BLOCO_LOTE = 256
+JANELA_LOTE = 128
+
+
+# 🔹 Fator de suavização de ewm(span=periodo, adjust=False), calculado como o pandas calcula
+def alfa_span(periodo):
+    com = (periodo - 1) / 2.0
+    return 1.0 / (1.0 + com)
+
+
+# 🔹 Um passo de ewm(adjust=False).mean(): devolve o novo (média, peso, observações)
+@_compilar
+def _ewm_passo(media, peso, obs, valor, alfa):
+    observado = valor == valor
+    if observado:
+        obs += 1
+    if media == media:
+        peso *= 1.0 - alfa
+        if observado:
+            if media != valor:
+                # com == 1 (alfa 0.5): o pandas recompõe o peso novo depois de lacunas com NaN
+                novo = 1.0 - peso if alfa == 0.5 else alfa
+                media = (peso * media + novo * valor) / (peso + novo)
+            peso = 1.0
+    elif observado:
+        media = valor
+    return media, peso, obs
+
+
+@_compilar
+def _mm_novo(primeiro):
+    estado = np.zeros(7, dtype=np.float64)
+    estado[_ULTIMO] = primeiro
+    return estado
+
+
+@_compilar
+def _mm_adicionar(estado, valor):
+    if valor == valor:
+        estado[_OBS] += 1
+        y = valor - estado[_COMP_ADD]
+        t = estado[_SOMA] + y
+        estado[_COMP_ADD] = t - estado[_SOMA] - y
+        estado[_SOMA] = t
+        if np.signbit(valor):
+            estado[_NEGATIVOS] += 1
+        if valor == estado[_ULTIMO]:
+            estado[_IGUAIS] += 1
+        else:
+            estado[_IGUAIS] = 1
+        estado[_ULTIMO] = valor
+
+
+@_compilar
+def _mm_remover(estado, valor):
+    if valor == valor:
+        estado[_OBS] -= 1
+        y = -valor - estado[_COMP_REM]
+        t = estado[_SOMA] + y
+        estado[_COMP_REM] = t - estado[_SOMA] - y
+        estado[_SOMA] = t
+        if np.signbit(valor):
+            estado[_NEGATIVOS] -= 1
+
+
+@_compilar
+def _mm_valor(estado, minimo):
+    obs = estado[_OBS]
+    if obs < minimo or obs <= 0:
+        return np.nan
+    if estado[_IGUAIS] >= obs:
+        return estado[_ULTIMO]
+    media = estado[_SOMA] / obs
+    if estado[_NEGATIVOS] == 0 and media < 0:
+        return 0.0
+    if estado[_NEGATIVOS] == obs and media > 0:
+        return 0.0
+    return media
+
+
+@_compilar
+def _maximo(a, b):
+    # np.maximum: NaN em qualquer lado propaga
+    if a != a or b != b:
+        return np.nan
+    return a if a >= b else b
+
+
+# 🔹 Núcleos: só operações escalares, compilados pelo numba; sem numba quem calcula é o pandas
+@_compilar
+def _mme_nucleo(valores, alfa, saida):
+    media, peso, obs = np.nan, 1.0, 0
+    for i in range(len(valores)):
+        media, peso, obs = _ewm_passo(media, peso, obs, valores[i], alfa)
+        saida[i] = media
+
+
+@_compilar
+def _trix_nucleo(serie, alfa, ja_suavizada, saida, saida_delta):
+    m1, p1, o1 = np.nan, 1.0, 0
+    m2, p2, o2 = np.nan, 1.0, 0
+    m3, p3, o3 = np.nan, 1.0, 0
+    anterior = np.nan
+    trix_anterior = np.nan
+    for i in range(len(serie)):
+        valor = serie[i]
+        if not ja_suavizada:
+            m1, p1, o1 = _ewm_passo(m1, p1, o1, valor, alfa)
+            valor = m1
+        m2, p2, o2 = _ewm_passo(m2, p2, o2, valor, alfa)
+        m3, p3, o3 = _ewm_passo(m3, p3, o3, m2, alfa)
+        trix = (m3 / anterior - 1.0) * 100.0
+        saida[i] = trix
+        saida_delta[i] = trix - trix_anterior
+        anterior = m3
+        trix_anterior = trix
+
+
+@_compilar
+def _adx_dm_close_nucleo(high, low, close, alfa, saida, saida_delta):
+    mp, pp, op = np.nan, 1.0, 0
+    mm, pm, om = np.nan, 1.0, 0
+    ma, pa, oa = np.nan, 1.0, 0
+    high_anterior = np.nan
+    low_anterior = np.nan
+    adx_anterior = np.nan
+    for i in range(len(close)):
+        high_diff = high[i] - high_anterior
+        low_diff = low[i] - low_anterior
+        mais_dm = (1.0 if (high_diff > low_diff and high_diff > 0) else 0.0) * high_diff
+        menos_dm = (1.0 if (low_diff > high_diff and low_diff > 0) else 0.0) * low_diff
+        mp, pp, op = _ewm_passo(mp, pp, op, mais_dm, alfa)
+        mm, pm, om = _ewm_passo(mm, pm, om, menos_dm, alfa)
+        mais_di = 100.0 * (mp / close[i])
+        menos_di = 100.0 * (mm / close[i])
+        dx = 100.0 * abs(mais_di - menos_di) / (mais_di + menos_di)
+        ma, pa, oa = _ewm_passo(ma, pa, oa, dx, alfa)
+        saida[i] = ma
+        saida_delta[i] = ma - adx_anterior
+        adx_anterior = ma
+        high_anterior = high[i]
+        low_anterior = low[i]
+
+
+@_compilar
+def _true_range(high, low, close, j):
+    anterior = close[j - 1] if j > 0 else np.nan
+    return _maximo(high[j] - low[j], _maximo(abs(high[j] - anterior), abs(low[j] - anterior)))
+
+
+@_compilar
+def _movimentos(high, low, j):
+    if j == 0:
+        return 0.0, 0.0
+    subida = high[j] - high[j - 1]
+    descida = low[j - 1] - low[j]
+    mais_dm = _maximo(subida, 0.0) if subida > descida else 0.0
+    menos_dm = _maximo(descida, 0.0) if descida > subida else 0.0
+    return mais_dm, menos_dm
+
+
+@_compilar
+def _adx_true_range_nucleo(high, low, close, janela, saida, saida_delta):
+    tr = _mm_novo(_true_range(high, low, close, 0))
+    mais_dm0, menos_dm0 = _movimentos(high, low, 0)
+    media_mais = _mm_novo(mais_dm0)
+    media_menos = _mm_novo(menos_dm0)
+    media_dx = _mm_novo(np.nan)
+    dx_janela = np.empty(janela, dtype=np.float64)  # DX não dá para recalcular na saída da janela
+    adx_anterior = np.nan
+    for i in range(len(close)):
+        if i >= janela:
+            j = i - janela
+            _mm_remover(tr, _true_range(high, low, close, j))
+            mais_dm, menos_dm = _movimentos(high, low, j)
+            _mm_remover(media_mais, mais_dm)
+            _mm_remover(media_menos, menos_dm)
+            _mm_remover(media_dx, dx_janela[j % janela])
+        _mm_adicionar(tr, _true_range(high, low, close, i))
+        mais_dm, menos_dm = _movimentos(high, low, i)
+        _mm_adicionar(media_mais, mais_dm)
+        _mm_adicionar(media_menos, menos_dm)
+        atr = _mm_valor(tr, 1)
+        mais_di = 100.0 * (_mm_valor(media_mais, 1) / atr)
+        menos_di = 100.0 * (_mm_valor(media_menos, 1) / atr)
+        dx = 100.0 * (abs(mais_di - menos_di) / (mais_di + menos_di))
+        if i == 0:
+            media_dx[_ULTIMO] = dx
+        dx_janela[i % janela] = dx
+        _mm_adicionar(media_dx, dx)
+        adx = _mm_valor(media_dx, 1)
+        if adx != adx:
+            adx = 0.0
+        saida[i] = adx
+        saida_delta[i] = adx - adx_anterior
+        adx_anterior = adx
+
+
+@_compilar
+def _media_movel_nucleo(valores, janela, minimo, saida):
+    estado = _mm_novo(valores[0] if len(valores) else np.nan)
+    for i in range(len(valores)):
+        if i >= janela:
+            _mm_remover(estado, valores[i - janela])
+        _mm_adicionar(estado, valores[i])
+        saida[i] = _mm_valor(estado, minimo)
+
+
+@_compilar
+def _extremo_movel(valores, janela, i, fila, mascara, inicio, fim, obs, maximo):
+    # Fila monotônica (buffer circular de índices, capacidade potência de 2): o extremo fica sempre na frente
+    if i >= janela:
+        saindo = valores[i - janela]
+        if saindo == saindo:
+            obs -= 1
+        if fim > inicio and fila[inicio & mascara] == i - janela:
+            inicio += 1
+    valor = valores[i]
+    if valor == valor:
+        obs += 1
+        while fim > inicio:
+            ultimo = valores[fila[(fim - 1) & mascara]]
+            if (ultimo <= valor) if maximo else (ultimo >= valor):
+                fim -= 1
+            else:
+                break
+        fila[fim & mascara] = i
+        fim += 1
+    return inicio, fim, obs
+
+
+@_compilar
+def _extremos_varredura(high, low, i, periodo):
+    # Janelas curtas: percorrer a janela inteira sai mais barato que manter a fila (menos desvios imprevisíveis)
+    if i + 1 < periodo:
+        return np.nan, np.nan
+    low_min = low[i]
+    high_max = high[i]
+    for j in range(i - periodo + 1, i + 1):
+        if low[j] != low[j] or high[j] != high[j]:
+            return np.nan, np.nan
+        if low[j] < low_min:
+            low_min = low[j]
+        if high[j] > high_max:
+            high_max = high[j]
+    return low_min, high_max
+
+
+@_compilar
+def _estocastico_nucleo(high, low, close, periodo, suavizacao, saida_k, saida_d):
+    capacidade = 1
+    while capacidade < periodo:
+        capacidade *= 2
+    mascara = capacidade - 1
+    fila_min = np.empty(capacidade, dtype=np.int64)
+    fila_max = np.empty(capacidade, dtype=np.int64)
+    ini_min, fim_min, obs_min = 0, 0, 0
+    ini_max, fim_max, obs_max = 0, 0, 0
+    varredura = periodo <= JANELA_VARREDURA
+    k_janela = np.empty(suavizacao, dtype=np.float64)
+    media_k = _mm_novo(np.nan)
+    for i in range(len(close)):
+        if varredura:
+            low_min, high_max = _extremos_varredura(high, low, i, periodo)
+        else:
+            ini_min, fim_min, obs_min = _extremo_movel(low, periodo, i, fila_min, mascara, ini_min, fim_min,
+                                                       obs_min, False)
+            ini_max, fim_max, obs_max = _extremo_movel(high, periodo, i, fila_max, mascara, ini_max, fim_max,
+                                                       obs_max, True)
+            low_min = low[fila_min[ini_min & mascara]] if obs_min >= periodo and fim_min > ini_min else np.nan
+            high_max = high[fila_max[ini_max & mascara]] if obs_max >= periodo and fim_max > ini_max else np.nan
+        k = ((close[i] - low_min) / (high_max - low_min)) * 100.0
+        if i == 0:
+            media_k[_ULTIMO] = k
+        if i >= suavizacao:
+            _mm_remover(media_k, k_janela[i % suavizacao])
+        k_janela[i % suavizacao] = k
+        _mm_adicionar(media_k, k)
+        saida_k[i] = k
+        saida_d[i] = _mm_valor(media_k, suavizacao)
+
+
+@_compilar
+def _rsi_nucleo(close, periodo, saida):
+    ganhos = _mm_novo(0.0)
+    perdas = _mm_novo(-0.0)
+    for i in range(len(close)):
+        if i >= periodo:
+            j = i - periodo
+            variacao = close[j] - close[j - 1] if j > 0 else np.nan
+            _mm_remover(ganhos, variacao if variacao > 0 else 0.0)
+            _mm_remover(perdas, -(variacao if variacao < 0 else 0.0))
+        variacao = close[i] - close[i - 1] if i > 0 else np.nan
+        _mm_adicionar(ganhos, variacao if variacao > 0 else 0.0)
+        _mm_adicionar(perdas, -(variacao if variacao < 0 else 0.0))
+        rs = _mm_valor(ganhos, periodo) / _mm_valor(perdas, periodo)
+        saida[i] = 100.0 - (100.0 / (1.0 + rs))
+
+
+@_compilar
+def _obv_nucleo(close, volume, saida):
+    obv = 0.0
+    for i in range(len(close)):
+        if i > 0 and close[i] > close[i - 1]:
+            obv += volume[i]
+        elif i > 0 and close[i] < close[i - 1]:
+            obv += -volume[i]
+        else:
+            obv += 0.0
+        saida[i] = obv
+
+
+@_compilar
+def _copiar_bloco(bloco, saida, inicio, fim):
+    # bloco (candles x períodos) -> linhas da saída (períodos x candles)
+    for p in range(saida.shape[0]):
+        for i in range(inicio, fim):
+            saida[p, i] = bloco[i - inicio, p]
+
+
+@_compilar
+def _mme_lote_nucleo(valores, alfas, saida):
+    medias = np.full(len(alfas), np.nan)
+    pesos = np.ones(len(alfas))
+    obs = np.zeros(len(alfas), dtype=np.int64)
+    bloco = np.empty((BLOCO_LOTE, len(alfas)))
+    for inicio in range(0, len(valores), BLOCO_LOTE):
+        fim = min(inicio + BLOCO_LOTE, len(valores))
+        for i in range(inicio, fim):
+            valor = valores[i]
+            for p in range(len(alfas)):
+                media, peso, o = _ewm_passo(medias[p], pesos[p], obs[p], valor, alfas[p])
+                medias[p], pesos[p], obs[p] = media, peso, o
+                bloco[i - inicio, p] = media
+        _copiar_bloco(bloco, saida, inicio, fim)
+
+
+@_compilar
+def _trix_lote_nucleo(close, alfas, saida, saida_delta):
+    n_periodos = len(alfas)
+    m1, m2, m3 = np.full(n_periodos, np.nan), np.full(n_periodos, np.nan), np.full(n_periodos, np.nan)
+    p1, p2, p3 = np.ones(n_periodos), np.ones(n_periodos), np.ones(n_periodos)
+    o1 = np.zeros(n_periodos, dtype=np.int64)
+    o2 = np.zeros(n_periodos, dtype=np.int64)
+    o3 = np.zeros(n_periodos, dtype=np.int64)
+    anteriores = np.full(n_periodos, np.nan)
+    trix_anteriores = np.full(n_periodos, np.nan)
+    bloco = np.empty((BLOCO_LOTE, n_periodos))
+    bloco_delta = np.empty((BLOCO_LOTE, n_periodos))
+    for inicio in range(0, len(close), BLOCO_LOTE):
+        fim = min(inicio + BLOCO_LOTE, len(close))
+        for i in range(inicio, fim):
+            valor = close[i]
+            for p in range(n_periodos):
+                alfa = alfas[p]
+                media1, peso1, obs1 = _ewm_passo(m1[p], p1[p], o1[p], valor, alfa)
+                media2, peso2, obs2 = _ewm_passo(m2[p], p2[p], o2[p], media1, alfa)
+                media3, peso3, obs3 = _ewm_passo(m3[p], p3[p], o3[p], media2, alfa)
+                m1[p], p1[p], o1[p] = media1, peso1, obs1
+                m2[p], p2[p], o2[p] = media2, peso2, obs2
+                m3[p], p3[p], o3[p] = media3, peso3, obs3
+                trix = (media3 / anteriores[p] - 1.0) * 100.0
+                bloco[i - inicio, p] = trix
+                bloco_delta[i - inicio, p] = trix - trix_anteriores[p]
+                anteriores[p] = media3
+                trix_anteriores[p] = trix
+        _copiar_bloco(bloco, saida, inicio, fim)
+        _copiar_bloco(bloco_delta, saida_delta, inicio, fim)
+
+
+@_compilar
+def _adx_dm_close_lote_nucleo(high, low, close, alfas, saida, saida_delta):
+    n_periodos = len(alfas)
+    mp, mm, ma = np.full(n_periodos, np.nan), np.full(n_periodos, np.nan), np.full(n_periodos, np.nan)
+    pp, pm, pa = np.ones(n_periodos), np.ones(n_periodos), np.ones(n_periodos)
+    op = np.zeros(n_periodos, dtype=np.int64)
+    om = np.zeros(n_periodos, dtype=np.int64)
+    oa = np.zeros(n_periodos, dtype=np.int64)
+    adx_anteriores = np.full(n_periodos, np.nan)
+    bloco = np.empty((BLOCO_LOTE, n_periodos))
+    bloco_delta = np.empty((BLOCO_LOTE, n_periodos))
+    high_anterior = np.nan
+    low_anterior = np.nan
+    for inicio in range(0, len(close), BLOCO_LOTE):
+        fim = min(inicio + BLOCO_LOTE, len(close))
+        for i in range(inicio, fim):
+            # +DM e -DM não dependem do período: uma vez por candle para todos
+            high_diff = high[i] - high_anterior
+            low_diff = low[i] - low_anterior
+            mais_dm = (1.0 if (high_diff > low_diff and high_diff > 0) else 0.0) * high_diff
+            menos_dm = (1.0 if (low_diff > high_diff and low_diff > 0) else 0.0) * low_diff
+            for p in range(n_periodos):
+                alfa = alfas[p]
+                media_mais, peso_mais, obs_mais = _ewm_passo(mp[p], pp[p], op[p], mais_dm, alfa)
+                media_menos, peso_menos, obs_menos = _ewm_passo(mm[p], pm[p], om[p], menos_dm, alfa)
+                mais_di = 100.0 * (media_mais / close[i])
+                menos_di = 100.0 * (media_menos / close[i])
+                dx = 100.0 * abs(mais_di - menos_di) / (mais_di + menos_di)
+                media_adx, peso_adx, obs_adx = _ewm_passo(ma[p], pa[p], oa[p], dx, alfa)
+                mp[p], pp[p], op[p] = media_mais, peso_mais, obs_mais
+                mm[p], pm[p], om[p] = media_menos, peso_menos, obs_menos
+                ma[p], pa[p], oa[p] = media_adx, peso_adx, obs_adx
+                bloco[i - inicio, p] = media_adx
+                bloco_delta[i - inicio, p] = media_adx - adx_anteriores[p]
+                adx_anteriores[p] = media_adx
+            high_anterior = high[i]
+            low_anterior = low[i]
+        _copiar_bloco(bloco, saida, inicio, fim)
+        _copiar_bloco(bloco_delta, saida_delta, inicio, fim)
+
+
+@_compilar
+def _estocastico_lote_nucleo(high, low, close, periodos, suavizacao, saida_k, saida_d):
+    n_periodos = len(periodos)
+    ordem = np.argsort(periodos)
+    curtos = 0
+    while curtos < n_periodos and periodos[ordem[curtos]] <= JANELA_LOTE:
+        curtos += 1
+    capacidade = 1
+    while capacidade < periodos[ordem[n_periodos - 1]]:
+        capacidade *= 2
+    mascara = capacidade - 1
+    longos = n_periodos - curtos
+    filas_min = np.empty((longos, capacidade), dtype=np.int64)
+    filas_max = np.empty((longos, capacidade), dtype=np.int64)
+    filas = np.zeros((longos, 6), dtype=np.int64)  # início, fim e observações das filas de mínima e de máxima
+    k_janelas = np.empty((n_periodos, suavizacao))
+    medias_k = np.empty((n_periodos, 7))
+    for p in range(n_periodos):
+        medias_k[p] = _mm_novo(np.nan)
+    minimos = np.empty((n_periodos, BLOCO_LOTE))
+    maximos = np.empty((n_periodos, BLOCO_LOTE))
+    for inicio in range(0, len(close), BLOCO_LOTE):
+        fim = min(inicio + BLOCO_LOTE, len(close))
+        # Janelas curtas: uma varredura para trás por candle, registrando o extremo ao passar por cada período
+        for i in range(inicio, fim):
+            low_min = low[i]
+            high_max = high[i]
+            proximo = 0
+            j = i
+            while proximo < curtos and j >= 0:
+                if low[j] != low[j] or high[j] != high[j]:
+                    break
+                if low[j] < low_min:
+                    low_min = low[j]
+                if high[j] > high_max:
+                    high_max = high[j]
+                while proximo < curtos and periodos[ordem[proximo]] == i - j + 1:
+                    minimos[ordem[proximo], i - inicio] = low_min
+                    maximos[ordem[proximo], i - inicio] = high_max
+                    proximo += 1
+                j -= 1
+            while proximo < curtos:  # janela com NaN ou antes do início da série
+                minimos[ordem[proximo], i - inicio] = np.nan
+                maximos[ordem[proximo], i - inicio] = np.nan
+                proximo += 1
+        # Janelas longas: uma fila monotônica por período
+        for r in range(longos):
+            p = ordem[curtos + r]
+            periodo = periodos[p]
+            ini_min, fim_min, obs_min = filas[r, 0], filas[r, 1], filas[r, 2]
+            ini_max, fim_max, obs_max = filas[r, 3], filas[r, 4], filas[r, 5]
+            fila_min = filas_min[r]
+            fila_max = filas_max[r]
+            for i in range(inicio, fim):
+                ini_min, fim_min, obs_min = _extremo_movel(low, periodo, i, fila_min, mascara, ini_min, fim_min,
+                                                           obs_min, False)
+                ini_max, fim_max, obs_max = _extremo_movel(high, periodo, i, fila_max, mascara, ini_max, fim_max,
+                                                           obs_max, True)
+                completa = obs_min >= periodo and fim_min > ini_min
+                minimos[p, i - inicio] = low[fila_min[ini_min & mascara]] if completa else np.nan
+                completa = obs_max >= periodo and fim_max > ini_max
+                maximos[p, i - inicio] = high[fila_max[ini_max & mascara]] if completa else np.nan
+            filas[r, 0], filas[r, 1], filas[r, 2] = ini_min, fim_min, obs_min
+            filas[r, 3], filas[r, 4], filas[r, 5] = ini_max, fim_max, obs_max
+        for p in range(n_periodos):
+            media_k = medias_k[p]
+            k_janela = k_janelas[p]
+            for i in range(inicio, fim):
+                low_min = minimos[p, i - inicio]
+                k = ((close[i] - low_min) / (maximos[p, i - inicio] - low_min)) * 100.0
+                if i == 0:
+                    media_k[_ULTIMO] = k
+                if i >= suavizacao:
+                    _mm_remover(media_k, k_janela[i % suavizacao])
+                k_janela[i % suavizacao] = k
+                _mm_adicionar(media_k, k)
+                saida_k[p, i] = k
+                saida_d[p, i] = _mm_valor(media_k, suavizacao)
+
+
+def _usar_jit(jit):
+    if jit is None:
+        return njit is not None
+    if jit and njit is None:
+        raise RuntimeError("numba não está instalado; use jit=False")
+    return jit
+
+
+def _entrada(valores):
+    return np.ascontiguousarray(np.asarray(valores, dtype=np.float64))
+
+
+def _saida(saida, n, dtype):
+    if saida is None:
+        return np.empty(n, dtype=dtype)
+    if saida.shape != (n,):
+        raise ValueError(f"buffer de saída com formato {saida.shape}; esperado ({n},)")
+    return saida
+
+
+# 🔹 Média móvel exponencial: ewm(span=periodo, adjust=False).mean()
+def mme(valores, periodo, saida=None, dtype=np.float64, jit=None):
+    valores = _entrada(valores)
+    saida = _saida(saida, len(valores), dtype)
+    if _usar_jit(jit):
+        _mme_nucleo(valores, alfa_span(periodo), saida)
+    else:
+        saida[:] = pd.Series(valores).ewm(span=periodo, adjust=False).mean().to_numpy()
+    return saida
+
+
+# 🔹 TRIX: variação percentual da terceira média exponencial e a variação do próprio TRIX.
+# `mme1` recebe a primeira média da cadeia já calculada (ex.: a MME9 quando o TRIX também é de 9 períodos).
+def trix(close, periodo=14, saida=None, saida_delta=None, dtype=np.float64, mme1=None, jit=None):
+    serie = _entrada(close if mme1 is None else mme1)
+    saida = _saida(saida, len(serie), dtype)
+    saida_delta = _saida(saida_delta, len(serie), dtype)
+    if _usar_jit(jit):
+        _trix_nucleo(serie, alfa_span(periodo), mme1 is not None, saida, saida_delta)
+    else:
+        ema = pd.Series(serie)
+        if mme1 is None:
+            ema = ema.ewm(span=periodo, adjust=False).mean()
+        ema = ema.ewm(span=periodo, adjust=False).mean().ewm(span=periodo, adjust=False).mean()
+        resultado = ema.pct_change() * 100
+        saida[:] = resultado.to_numpy()
+        saida_delta[:] = resultado.diff().to_numpy()
+    return saida, saida_delta
+
+
+# 🔹 ADX e sua variação; `variante` escolhe a fórmula (ver VARIANTES_ADX)
+def adx(high, low, close, periodo=14, variante=ADX_DM_CLOSE, saida=None, saida_delta=None, dtype=np.float64,
+        jit=None):
+    if variante not in VARIANTES_ADX:
+        raise ValueError(f"variante de ADX desconhecida: {variante!r} (use {', '.join(VARIANTES_ADX)})")
+    high, low, close = _entrada(high), _entrada(low), _entrada(close)
+    saida = _saida(saida, len(close), dtype)
+    saida_delta = _saida(saida_delta, len(close), dtype)
+    if _usar_jit(jit):
+        if variante == ADX_DM_CLOSE:
+            _adx_dm_close_nucleo(high, low, close, alfa_span(periodo), saida, saida_delta)
+        else:
+            _adx_true_range_nucleo(high, low, close, periodo, saida, saida_delta)
+        return saida, saida_delta
+
+    high, low, close = pd.Series(high), pd.Series(low), pd.Series(close)
+    if variante == ADX_DM_CLOSE:
+        high_diff = high.diff()
+        low_diff = low.diff()
+        mais_dm = ((high_diff > low_diff) & (high_diff > 0)) * high_diff
+        menos_dm = ((low_diff > high_diff) & (low_diff > 0)) * low_diff
+        mais_di = 100 * (mais_dm.ewm(span=periodo, adjust=False).mean() / close)
+        menos_di = 100 * (menos_dm.ewm(span=periodo, adjust=False).mean() / close)
+        dx = 100 * abs(mais_di - menos_di) / (mais_di + menos_di)
+        resultado = dx.ewm(span=periodo, adjust=False).mean()
+    else:
+        close_anterior = close.shift(1)
+        tr = np.maximum(high - low, np.maximum(abs(high - close_anterior), abs(low - close_anterior)))
+        atr = tr.rolling(window=periodo, min_periods=1).mean()
+        subida = high - high.shift(1)
+        descida = low.shift(1) - low
+        mais_dm = pd.Series(np.where(subida > descida, np.maximum(subida, 0), 0))
+        menos_dm = pd.Series(np.where(descida > subida, np.maximum(descida, 0), 0))
+        mais_di = 100 * (mais_dm.rolling(window=periodo, min_periods=1).mean() / atr)
+        menos_di = 100 * (menos_dm.rolling(window=periodo, min_periods=1).mean() / atr)
+        dx = 100 * (abs(mais_di - menos_di) / (mais_di + menos_di))
+        resultado = dx.rolling(window=periodo, min_periods=1).mean().fillna(0)
+    saida[:] = resultado.to_numpy()
+    saida_delta[:] = resultado.diff().to_numpy()
+    return saida, saida_delta
+
+
+# 🔹 Estocástico: %K sobre a mínima/máxima de `periodo` candles e %D como média de `suavizacao` candles do %K
+def estocastico(high, low, close, periodo=14, suavizacao=3, saida_k=None, saida_d=None, dtype=np.float64,
+                jit=None):
+    high, low, close = _entrada(high), _entrada(low), _entrada(close)
+    saida_k = _saida(saida_k, len(close), dtype)
+    saida_d = _saida(saida_d, len(close), dtype)
+    if _usar_jit(jit):
+        _estocastico_nucleo(high, low, close, periodo, suavizacao, saida_k, saida_d)
+    else:
+        low_min = pd.Series(low).rolling(window=periodo).min()
+        high_max = pd.Series(high).rolling(window=periodo).max()
+        k = ((pd.Series(close) - low_min) / (high_max - low_min)) * 100
+        saida_k[:] = k.to_numpy()
+        saida_d[:] = k.rolling(window=suavizacao).mean().to_numpy()
+    return saida_k, saida_d
+
+
+# 🔹 Média móvel simples: rolling(window=periodo, min_periods=minimo).mean()
+def mms(valores, periodo=14, minimo=None, saida=None, dtype=np.float64, jit=None):
+    valores = _entrada(valores)
+    minimo = periodo if minimo is None else minimo
+    saida = _saida(saida, len(valores), dtype)
+    if _usar_jit(jit):
+        _media_movel_nucleo(valores, periodo, minimo, saida)
+    else:
+        saida[:] = pd.Series(valores).rolling(window=periodo, min_periods=minimo).mean().to_numpy()
+    return saida
+
+
+# 🔹 RSI com médias simples de ganhos e perdas
+def rsi(close, periodo=14, saida=None, dtype=np.float64, jit=None):
+    close = _entrada(close)
+    saida = _saida(saida, len(close), dtype)
+    if _usar_jit(jit):
+        _rsi_nucleo(close, periodo, saida)
+    else:
+        delta = pd.Series(close).diff()
+        ganho = (delta.where(delta > 0, 0)).rolling(window=periodo).mean()
+        perda = (-delta.where(delta < 0, 0)).rolling(window=periodo).mean()
+        saida[:] = (100 - (100 / (1 + ganho / perda))).to_numpy()
+    return saida
+
+
+# 🔹 OBV: volume acumulado com o sinal da variação do close
+def obv(close, volume, saida=None, dtype=np.float64, jit=None):
+    close, volume = _entrada(close), _entrada(volume)
+    saida = _saida(saida, len(close), dtype)
+    if _usar_jit(jit):
+        _obv_nucleo(close, volume, saida)
+    else:
+        anterior = pd.Series(close).shift(1).to_numpy()
+        saida[:] = np.where(close > anterior, volume, np.where(close < anterior, -volume, 0)).cumsum()
+    return saida
+
+
+# 🔹 Versões em lote para varreduras de período: `periodos` é uma lista e cada resultado é uma matriz
+# (períodos x candles) com a linha p igual ao indicador de um período só (mme, trix, adx, estocastico).
+# Com numba os períodos são calculados juntos numa passada pelos candles; sem numba, um período por vez.
+def _periodos(periodos):
+    periodos = np.atleast_1d(np.asarray(periodos, dtype=np.int64))
+    if periodos.ndim != 1 or not len(periodos) or periodos.min() < 1:
+        raise ValueError("periodos deve ser uma lista não vazia de inteiros positivos")
+    return periodos
+
+
+def _saida_lote(saida, forma, dtype):
+    if saida is None:
+        return np.empty(forma, dtype=dtype)
+    if saida.shape != forma:
+        raise ValueError(f"buffer de saída com formato {saida.shape}; esperado {forma}")
+    return saida
+
+
+def _alfas(periodos):
+    return np.array([alfa_span(periodo) for periodo in periodos.tolist()])
+
+
+def mme_lote(valores, periodos, saida=None, dtype=np.float64, jit=None):
+    valores = _entrada(valores)
+    periodos = _periodos(periodos)
+    saida = _saida_lote(saida, (len(periodos), len(valores)), dtype)
+    if _usar_jit(jit):
+        _mme_lote_nucleo(valores, _alfas(periodos), saida)
+    else:
+        for linha, periodo in zip(saida, periodos.tolist()):
+            mme(valores, periodo, saida=linha, jit=False)
+    return saida
+
+
+def trix_lote(close, periodos, saida=None, saida_delta=None, dtype=np.float64, jit=None):
+    close = _entrada(close)
+    periodos = _periodos(periodos)
+    saida = _saida_lote(saida, (len(periodos), len(close)), dtype)
+    saida_delta = _saida_lote(saida_delta, (len(periodos), len(close)), dtype)
+    if _usar_jit(jit):
+        _trix_lote_nucleo(close, _alfas(periodos), saida, saida_delta)
+    else:
+        for linha, linha_delta, periodo in zip(saida, saida_delta, periodos.tolist()):
+            trix(close, periodo, saida=linha, saida_delta=linha_delta, jit=False)
+    return saida, saida_delta
+
+
+# A variante true_range (médias simples com janela por período) não tem núcleo em lote: roda um período por vez
+def adx_lote(high, low, close, periodos, variante=ADX_DM_CLOSE, saida=None, saida_delta=None, dtype=np.float64,
+             jit=None):
+    if variante not in VARIANTES_ADX:
+        raise ValueError(f"variante de ADX desconhecida: {variante!r} (use {', '.join(VARIANTES_ADX)})")
+    high, low, close = _entrada(high), _entrada(low), _entrada(close)
+    periodos = _periodos(periodos)
+    saida = _saida_lote(saida, (len(periodos), len(close)), dtype)
+    saida_delta = _saida_lote(saida_delta, (len(periodos), len(close)), dtype)
+    if _usar_jit(jit) and variante == ADX_DM_CLOSE:
+        _adx_dm_close_lote_nucleo(high, low, close, _alfas(periodos), saida, saida_delta)
+    else:
+        for linha, linha_delta, periodo in zip(saida, saida_delta, periodos.tolist()):
+            adx(high, low, close, periodo, variante, saida=linha, saida_delta=linha_delta, jit=jit)
+    return saida, saida_delta
+
+
+def estocastico_lote(high, low, close, periodos, suavizacao=3, saida_k=None, saida_d=None, dtype=np.float64,
+                     jit=None):
+    high, low, close = _entrada(high), _entrada(low), _entrada(close)
+    periodos = _periodos(periodos)
+    saida_k = _saida_lote(saida_k, (len(periodos), len(close)), dtype)
+    saida_d = _saida_lote(saida_d, (len(periodos), len(close)), dtype)
+    if _usar_jit(jit):
+        _estocastico_lote_nucleo(high, low, close, periodos, suavizacao, saida_k, saida_d)
+    else:
+        for linha_k, linha_d, periodo in zip(saida_k, saida_d, periodos.tolist()):
+            estocastico(high, low, close, periodo, suavizacao, saida_k=linha_k, saida_d=linha_d, jit=False)
+    return saida_k, saida_d
+
+
+# 🔹 Versões para DataFrame: acrescentam só as colunas finais de cada indicador
+def _valores(df, coluna):
+    return df[coluna].to_numpy(dtype=np.float64)
+
+
+@perfil.cronometrar("indicadores")
+def calcular_mme(df, periodo=9, dtype=np.float64, jit=None):
+    df[f"MME{periodo}"] = mme(_valores(df, "close"), periodo, dtype=dtype, jit=jit)
+    return df
+
+
+@perfil.cronometrar("indicadores")
+def calcular_trix(df, periodo=14, dtype=np.float64, jit=None):
+    df["trix"], df["trix_delta"] = trix(_valores(df, "close"), periodo, dtype=dtype, jit=jit)
+    return df
+
+
+@perfil.cronometrar("indicadores")
+def calcular_adx(df, periodo=14, variante=ADX_DM_CLOSE, dtype=np.float64, jit=None):
+    df["ADX"], df["adx_delta"] = adx(_valores(df, "high"), _valores(df, "low"), _valores(df, "close"), periodo,
+                                     variante, dtype=dtype, jit=jit)
+    return df
+
+
+@perfil.cronometrar("indicadores")
+def calcular_estocastico(df, periodo=14, suavizacao=3, dtype=np.float64, jit=None):
+    df["%K"], df["%D"] = estocastico(_valores(df, "high"), _valores(df, "low"), _valores(df, "close"), periodo,
+                                     suavizacao, dtype=dtype, jit=jit)
+    return df
+
+
+@perfil.cronometrar("indicadores")
+def calcular_sma(df, periodo=14, dtype=np.float64, jit=None):
+    df["sma"] = mms(_valores(df, "close"), periodo, dtype=dtype, jit=jit)
+    return df
+
+
+@perfil.cronometrar("indicadores")
+def calcular_rsi(df, periodo=14, dtype=np.float64, jit=None):
+    df["RSI"] = rsi(_valores(df, "close"), periodo, dtype=dtype, jit=jit)
+    return df
+
+
+@perfil.cronometrar("indicadores")
+def calcular_obv(df, dtype=np.float64, jit=None):
+    df["OBV"] = obv(_valores(df, "close"), _valores(df, "volume"), dtype=dtype, jit=jit)
+    return df
+
+
+# 🔹 Vários indicadores de uma vez, reaproveitando as médias exponenciais do close:
+# [("mme", {"periodo": 9}), ("mme", {"periodo": 21}), ("trix", {"periodo": 9})] calcula a MME9 uma única vez
+# e o TRIX parte dela. As médias compartilhadas ficam em float64 mesmo com dtype=np.float32 nas colunas.
+@perfil.cronometrar("indicadores")
+def calcular_indicadores(df, indicadores, dtype=np.float64, jit=None):
+    close = _valores(df, "close")
+    medias = {}
+
+    def media_close(periodo):
+        if periodo not in medias:
+            medias[periodo] = mme(close, periodo, jit=jit)
+        return medias[periodo]
+
+    for nome, params in indicadores:
+        params = dict(params)
+        if nome == "mme":
+            periodo = params.get("periodo", 9)
+            df[f"MME{periodo}"] = media_close(periodo).astype(dtype, copy=False)
+        elif nome == "trix":
+            periodo = params.get("periodo", 14)
+            df["trix"], df["trix_delta"] = trix(close, periodo, dtype=dtype, mme1=media_close(periodo), jit=jit)
+        elif nome in CALCULOS:
+            CALCULOS[nome](df, dtype=dtype, jit=jit, **params)
+        else:
+            raise ValueError(f"indicador desconhecido: {nome!r} (disponíveis: {', '.join(sorted(CALCULOS))})")
+    return df
+
+
+CALCULOS = {
+    "mme": calcular_mme,
+    "trix": calcular_trix,
+    "adx": calcular_adx,
+    "estocastico": calcular_estocastico,
+    "sma": calcular_sma,
+    "rsi": calcular_rsi,
+    "obv": calcular_obv,
+}
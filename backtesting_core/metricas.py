@@ -0,0 +1,179 @@
+import numpy as np
+
+from backtesting_core.download import GRANULARIDADES_MS
+from backtesting_core.execucao import (
+    EVENTO_BUY, EVENTO_LOSS_SL, EVENTO_SELL, EVENTO_WIN_REVERSE, EVENTO_WIN_TP, LONG, SHORT, estados_eventos,
+    marcar_a_mercado, resultados_saidas, tempos_ms,
+)
+
+try:
+    from numba import njit
+except ImportError:  # numba é opcional: sem ele as mesmas contas são feitas com NumPy, uma operação por vez
+    njit = None
+
+# 🔹 Métricas de um backtest a partir do patrimônio marcado a mercado em cada candle (USDT livre + valor da
+# posição aberta no close), e não do saldo em USDT, que fica zerado enquanto a compra está aberta.
+# Só os eventos passam por um loop em Python; o que é por candle é feito numa única passada compilada pelo numba
+# (patrimônio, drawdown, somas dos retornos e exposição juntos) ou, sem numba, com operações vetorizadas.
+ANO_MS = 365 * 86_400_000
+
+
+def periodos_por_ano(granularity="1m"):
+    return ANO_MS / GRANULARIDADES_MS[granularity]
+
+
+# 🔹 Drawdown em cada candle: fração abaixo do maior patrimônio até ali
+def drawdown(patrimonio):
+    pico = np.maximum.accumulate(patrimonio)
+    return np.divide(pico - patrimonio, pico, out=np.zeros(len(patrimonio)), where=pico > 0)
+
+
+# 🔹 Retorno de cada candle sobre o patrimônio do candle anterior
+def retornos(patrimonio):
+    anterior = patrimonio[:-1]
+    return np.divide(patrimonio[1:] - anterior, anterior, out=np.zeros(len(anterior)), where=anterior > 0)
+
+
+# 🔹 Sharpe e Sortino anualizados a partir das somas dos retornos (soma, soma dos quadrados e soma dos quadrados
+# dos negativos): no Sortino só os retornos negativos entram no desvio
+def _razao(media, desvio, periodos):
+    return float(media / desvio * np.sqrt(periodos)) if desvio > 0 else np.nan
+
+
+def _sharpe(soma, soma_quadrados, n, periodos):
+    media = soma / n if n else 0.0
+    return _razao(media, np.sqrt(max(soma_quadrados / n - media * media, 0.0)) if n else 0.0, periodos)
+
+
+def _sortino(soma, soma_baixa, n, periodos):
+    return _razao(soma / n if n else 0.0, np.sqrt(soma_baixa / n) if n else 0.0, periodos)
+
+
+def sharpe(retornos, periodos):
+    return _sharpe(retornos.sum(), np.dot(retornos, retornos), len(retornos), periodos)
+
+
+def sortino(retornos, periodos):
+    negativos = np.minimum(retornos, 0.0)
+    return _sortino(retornos.sum(), np.dot(negativos, negativos), len(retornos), periodos)
+
+
+def fator_lucro(resultados):
+    ganhos = resultados[resultados > 0].sum()
+    perdas = -resultados[resultados < 0].sum()
+    if perdas > 0:
+        return float(ganhos / perdas)
+    return np.inf if ganhos > 0 else np.nan
+
+
+def _taxa(acertos, erros):
+    total = acertos + erros
+    return float(acertos / total) if total else np.nan
+
+
+# 🔹 Passada única pelos candles com as mesmas contas de execucao.marcar_a_mercado, drawdown e retornos.
+# Preenche `patrimonio` e `quedas` e devolve (candles expostos, maior queda, soma, soma dos quadrados e soma dos
+# quadrados dos negativos dos retornos).
+def _percorrer_candles(close, ev_indice, usd, btc, lado, entrada, tamanho, patrimonio, quedas):
+    n_ev = len(ev_indice)
+    estado = 0
+    expostos = 0
+    pico = 0.0
+    maior_queda = 0.0
+    anterior = 0.0
+    soma = 0.0
+    soma_quadrados = 0.0
+    soma_baixa = 0.0
+    for i in range(len(close)):
+        while estado < n_ev and ev_indice[estado] <= i:
+            estado += 1
+        if lado[estado] == LONG:
+            valor = usd[estado] + btc[estado] * close[i]
+            expostos += 1
+        elif lado[estado] == SHORT:
+            valor = usd[estado] + (entrada[estado] - close[i]) * tamanho[estado]
+            expostos += 1
+        else:
+            valor = usd[estado] + 0.0
+        patrimonio[i] = valor
+
+        if i == 0 or valor > pico:
+            pico = valor
+        queda = (pico - valor) / pico if pico > 0 else 0.0
+        quedas[i] = queda
+        if queda > maior_queda:
+            maior_queda = queda
+
+        if i > 0:
+            retorno = (valor - anterior) / anterior if anterior > 0 else 0.0
+            soma += retorno
+            soma_quadrados += retorno * retorno
+            if retorno < 0:
+                soma_baixa += retorno * retorno
+        anterior = valor
+    return expostos, maior_queda, soma, soma_quadrados, soma_baixa
+
+
+_percorrer_candles_jit = njit(cache=True, nogil=True)(_percorrer_candles) if njit is not None else None
+
+
+def _percorrer_numpy(close, eventos, estados):
+    patrimonio, lado = marcar_a_mercado(close, eventos, estados)
+    quedas = drawdown(patrimonio)
+    variacoes = retornos(patrimonio)
+    negativos = np.minimum(variacoes, 0.0)
+    return (patrimonio, quedas, int(np.count_nonzero(lado)), float(quedas.max()) if len(quedas) else 0.0,
+            float(variacoes.sum()), float(np.dot(variacoes, variacoes)), float(np.dot(negativos, negativos)))
+
+
+# 🔹 Métricas sobre os arrays e os eventos do núcleo (execucao.executar_arrays/processar_candles).
+# `tamanho_ordem` pode ser um array por candle (cada posição usa o da entrada).
+# Devolve {"patrimonio", "drawdown"} por candle e as métricas.
+def calcular_metricas(close, eventos, initial_balance, tamanho_ordem, granularity="1m", jit=None):
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    tamanhos = np.broadcast_to(np.asarray(tamanho_ordem, dtype=np.float64), close.shape)
+    estados = estados_eventos(eventos, initial_balance, tamanhos)
+
+    usar_jit = _percorrer_candles_jit is not None if jit is None else jit
+    if usar_jit:
+        if _percorrer_candles_jit is None:
+            raise RuntimeError("numba não está instalado; use jit=False")
+        patrimonio = np.empty(len(close))
+        quedas = np.empty(len(close))
+        resumo = _percorrer_candles_jit(
+            close, np.ascontiguousarray(eventos[2][:eventos[3]], dtype=np.int64), *estados, patrimonio, quedas,
+        )
+    else:
+        patrimonio, quedas, *resumo = _percorrer_numpy(close, eventos, estados)
+    expostos, maior_queda, soma, soma_quadrados, soma_baixa = resumo
+    n_retornos = max(len(close) - 1, 0)
+    periodos = periodos_por_ano(granularity)
+
+    ev_codigo = eventos[0][:eventos[3]]
+    saidas, resultados = resultados_saidas(eventos, estados[0])
+    comprado = ev_codigo[saidas - 1] == EVENTO_BUY
+    acerto = (ev_codigo[saidas] == EVENTO_WIN_TP) | (ev_codigo[saidas] == EVENTO_WIN_REVERSE)
+    erro = ev_codigo[saidas] == EVENTO_LOSS_SL
+    final = float(patrimonio[-1]) if len(patrimonio) else float(initial_balance)
+    return {
+        "patrimonio": patrimonio,
+        "drawdown": quedas,
+        "saldo_final": final,
+        "retorno_pct": (final / initial_balance - 1) * 100,
+        "max_drawdown": float(maior_queda),
+        "sharpe": _sharpe(soma, soma_quadrados, n_retornos, periodos),
+        "sortino": _sortino(soma, soma_baixa, n_retornos, periodos),
+        "fator_lucro": fator_lucro(resultados),
+        "exposicao": expostos / len(close) if len(close) else 0.0,
+        "trades": int(np.count_nonzero((ev_codigo == EVENTO_BUY) | (ev_codigo == EVENTO_SELL))),
+        "taxa_acerto_long": _taxa(np.count_nonzero(acerto & comprado), np.count_nonzero(erro & comprado)),
+        "taxa_acerto_short": _taxa(np.count_nonzero(acerto & ~comprado), np.count_nonzero(erro & ~comprado)),
+    }
+
+
+# 🔹 Métricas de um backtest do DataFrame a partir do registro de operações que executar_sinais devolve
+def metricas_operacoes(df, operacoes, initial_balance, tamanho_ordem, granularity="1m", jit=None):
+    indices = np.searchsorted(tempos_ms(df), operacoes.coluna("tempo"))
+    eventos = (operacoes.coluna("evento"), operacoes.coluna("preco"), indices, len(operacoes))
+    return calcular_metricas(df["close"].to_numpy(dtype=np.float64), eventos, initial_balance, tamanho_ordem,
+                             granularity, jit)
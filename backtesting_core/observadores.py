@@ -0,0 +1,140 @@
+import heapq
+import json
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core.execucao import EVENTO_BUY, EVENTO_FECHAMENTO, EVENTO_SELL, ROTULOS_EVENTOS
+from backtesting_core.sinais import ROTULOS
+
+# 🔹 Observadores do backtest: entradas, saídas, sinais e fechamentos forçados entregues como dicionários.
+# O núcleo já registra cada evento nos arrays de eventos, então nada muda no loop (compilado ou não): os
+# observadores são chamados depois da execução, em ordem de candle, a partir desses arrays e dos sinais.
+# Sem observadores inscritos num tipo, os registros desse tipo nem são montados.
+SINAL = "sinal"
+ENTRADA = "entrada"
+SAIDA = "saida"
+FECHAMENTO = "fechamento"
+TIPOS = (SINAL, ENTRADA, SAIDA, FECHAMENTO)
+LADOS = {EVENTO_BUY: "long", EVENTO_SELL: "short"}
+
+
+def _tipo_evento(codigo):
+    if codigo in LADOS:
+        return ENTRADA
+    return FECHAMENTO if codigo == EVENTO_FECHAMENTO else SAIDA
+
+
+class Observadores:
+    # `colunas`: colunas do df (ex.: indicadores) anexadas a cada sinal por execucao.executar_sinais
+    def __init__(self, colunas=()):
+        self.colunas = tuple(colunas)
+        self._inscritos = {tipo: [] for tipo in TIPOS}
+
+    # 🔹 Inscreve `observador(registro)` nos tipos pedidos (todos por padrão); devolve o próprio observador
+    def inscrever(self, observador, tipos=TIPOS):
+        tipos = (tipos,) if isinstance(tipos, str) else tuple(tipos)
+        for tipo in tipos:
+            if tipo not in self._inscritos:
+                raise ValueError(f"tipo de evento desconhecido: {tipo!r} (use {', '.join(TIPOS)})")
+        for tipo in tipos:
+            self._inscritos[tipo].append(observador)
+        return observador
+
+    def remover(self, observador):
+        for inscritos in self._inscritos.values():
+            while observador in inscritos:
+                inscritos.remove(observador)
+
+    def ativo(self, tipo=None):
+        if tipo is None:
+            return any(self._inscritos.values())
+        return bool(self._inscritos[tipo])
+
+    def notificar(self, registro):
+        for observador in self._inscritos[registro["tipo"]]:
+            observador(registro)
+
+    def _registros_eventos(self, eventos, tempos):
+        ev_codigo, ev_preco, ev_indice, n_ev = eventos
+        lado = None
+        for codigo, preco, indice in zip(ev_codigo[:n_ev].tolist(), ev_preco[:n_ev].tolist(),
+                                         ev_indice[:n_ev].tolist()):
+            tipo = _tipo_evento(codigo)
+            lado = LADOS.get(codigo, lado)  # uma saída fecha a posição aberta pela entrada anterior
+            if self._inscritos[tipo]:
+                registro = {"tipo": tipo, "evento": ROTULOS_EVENTOS[codigo], "lado": lado, "preco": preco,
+                            "indice": indice}
+                if tempos is not None:
+                    registro["timestamp"] = int(tempos[indice])
+                yield indice, registro
+
+    def _registros_sinais(self, sinais, tempos, close, extras):
+        indices = np.flatnonzero(np.asarray(sinais))
+        valores = np.asarray(sinais)[indices].tolist()
+        precos = None if close is None else np.asarray(close)[indices].tolist()
+        timestamps = None if tempos is None else np.asarray(tempos)[indices].tolist()
+        colunas = {nome: np.asarray(coluna)[indices].tolist() for nome, coluna in (extras or {}).items()}
+        for posicao, indice in enumerate(indices.tolist()):
+            registro = {"tipo": SINAL, "sinal": ROTULOS[valores[posicao]], "indice": indice}
+            if precos is not None:
+                registro["preco"] = precos[posicao]
+            if timestamps is not None:
+                registro["timestamp"] = timestamps[posicao]
+            for nome, coluna in colunas.items():
+                registro[nome] = coluna[posicao]
+            yield indice, registro
+
+    # 🔹 Entrega os eventos de uma execução (e os sinais, se alguém os observa) na ordem dos candles;
+    # num mesmo candle o sinal vem antes das operações que ele gerou. `tempos` são os timestamps em ms.
+    def publicar(self, eventos, sinais=None, tempos=None, close=None, extras=None):
+        fontes = []
+        if sinais is not None and self._inscritos[SINAL]:
+            fontes.append(self._registros_sinais(sinais, tempos, close, extras))
+        if any(self._inscritos[tipo] for tipo in (ENTRADA, SAIDA, FECHAMENTO)):
+            fontes.append(self._registros_eventos(eventos, tempos))
+        for _, registro in heapq.merge(*fontes, key=lambda item: item[0]):
+            self.notificar(registro)
+
+
+# 🔹 Guarda os registros numa lista (ex.: para montar um DataFrame depois)
+class SaidaMemoria:
+    def __init__(self):
+        self.registros = []
+
+    def __call__(self, registro):
+        self.registros.append(registro)
+
+    def dataframe(self):
+        return pd.DataFrame(self.registros)
+
+
+# 🔹 Grava um registro JSON por linha, acumulando `buffer` linhas antes de cada escrita no arquivo
+class SaidaJsonl:
+    def __init__(self, caminho, buffer=1000, modo="a"):
+        self.caminho = caminho
+        self.buffer = buffer
+        self._arquivo = open(caminho, modo, encoding="utf-8")
+        self._pendentes = []
+
+    def __call__(self, registro):
+        self._pendentes.append(json.dumps(registro, ensure_ascii=False, default=str))
+        if len(self._pendentes) >= self.buffer:
+            self.descarregar()
+
+    def descarregar(self):
+        if self._pendentes:
+            self._arquivo.write("\n".join(self._pendentes) + "\n")
+            self._pendentes.clear()
+        self._arquivo.flush()
+
+    def fechar(self):
+        if not self._arquivo.closed:
+            self.descarregar()
+            self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
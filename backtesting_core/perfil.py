@@ -0,0 +1,204 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+# 🔹 Instrumentação por estágio (carregar, download, dataframe, indicadores, sinais, execucao...): tempo, número de
+# chamadas e contadores (candles, sinais, trades, acertos e falhas de cache, bytes baixados) num relatório JSON.
+# Desligada por padrão: etapa() devolve um contexto vazio compartilhado e contar() volta na primeira linha.
+# Liga com ativar() ou com a variável de ambiente BACKTEST_PERFIL=<relatorio.json> (ou 1 para perfil.json), que
+# grava o relatório ao fim do processo sem mudar os scripts; BACKTEST_PERFIL_PILHAS=<arquivo.folded> (sozinha ou
+# junto com a outra) liga o amostrador de pilhas, que exporta no formato "folded" dos flame graphs (flamegraph.pl, speedscope).
+# Os tempos são inclusivos: um estágio dentro de outro conta nos dois; o mesmo estágio aninhado conta uma vez.
+VARIAVEL_PERFIL = "BACKTEST_PERFIL"
+VARIAVEL_PILHAS = "BACKTEST_PERFIL_PILHAS"
+RELATORIO_PADRAO = "perfil.json"
+INTERVALO_AMOSTRAS = 0.005
+
+_ativo = False
+_trava = threading.Lock()
+_etapas = {}
+_abertas = threading.local()
+_inicio = time.perf_counter()
+_VAZIO = nullcontext()
+
+
+def ativar():
+    global _ativo
+    _ativo = True
+
+
+def desativar():
+    global _ativo
+    _ativo = False
+
+
+def ativo():
+    return _ativo
+
+
+def zerar():
+    global _inicio
+    with _trava:
+        _etapas.clear()
+        _inicio = time.perf_counter()
+
+
+def _etapa(nome):
+    dados = _etapas.get(nome)
+    if dados is None:
+        dados = _etapas[nome] = {"segundos": 0.0, "chamadas": 0, "contadores": Counter()}
+    return dados
+
+
+class _Cronometro:
+    __slots__ = ("nome", "inicio", "aninhada")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        abertas = getattr(_abertas, "nomes", None)
+        if abertas is None:
+            abertas = _abertas.nomes = set()
+        self.aninhada = self.nome in abertas
+        if not self.aninhada:
+            abertas.add(self.nome)
+            self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        if self.aninhada:
+            return False
+        segundos = time.perf_counter() - self.inicio
+        _abertas.nomes.discard(self.nome)
+        with _trava:
+            dados = _etapa(self.nome)
+            dados["segundos"] += segundos
+            dados["chamadas"] += 1
+        return False
+
+
+# 🔹 Contexto que cronometra o estágio `nome` (com o perfil desligado não faz nada)
+def etapa(nome):
+    return _Cronometro(nome) if _ativo else _VAZIO
+
+
+# 🔹 Soma `valor` ao contador `nome` do estágio
+def contar(estagio, nome, valor=1):
+    if not _ativo:
+        return
+    with _trava:
+        _etapa(estagio)["contadores"][nome] += int(valor)
+
+
+# 🔹 Decorador: cada chamada da função é cronometrada no estágio `nome`
+def cronometrar(nome):
+    def decorador(func):
+        @functools.wraps(func)
+        def cronometrada(*args, **kwargs):
+            if not _ativo:
+                return func(*args, **kwargs)
+            with _Cronometro(nome):
+                return func(*args, **kwargs)
+        return cronometrada
+    return decorador
+
+
+def relatorio():
+    with _trava:
+        etapas = {
+            nome: {"segundos": round(dados["segundos"], 6), "chamadas": dados["chamadas"],
+                   **dict(sorted(dados["contadores"].items()))}
+            for nome, dados in sorted(_etapas.items(), key=lambda item: -item[1]["segundos"])
+        }
+    return {
+        "criado_em": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "processo": {"pid": os.getpid(), "argv": sys.argv, "python": sys.version.split()[0]},
+        "segundos_total": round(time.perf_counter() - _inicio, 6),
+        "etapas": etapas,
+    }
+
+
+def salvar_relatorio(caminho=RELATORIO_PADRAO):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio(), arquivo, indent=2, ensure_ascii=False)
+    return caminho
+
+
+# 🔹 Amostrador de pilhas: uma thread lê a pilha das outras threads a cada `intervalo` segundos e conta cada
+# pilha como "modulo:funcao;modulo:funcao;... N" (o formato "folded" dos flame graphs)
+class AmostradorPilhas:
+    def __init__(self, intervalo=INTERVALO_AMOSTRAS, todas_threads=False):
+        self.intervalo = intervalo
+        self.todas_threads = todas_threads
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _amostrar(self, alvo):
+        proprio = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            for ident, quadro in sys._current_frames().items():
+                if ident == proprio or (not self.todas_threads and ident != alvo):
+                    continue
+                nomes = []
+                while quadro is not None:
+                    codigo = quadro.f_code
+                    modulo = os.path.splitext(os.path.basename(codigo.co_filename))[0]
+                    nomes.append(f"{modulo}:{codigo.co_name}")
+                    quadro = quadro.f_back
+                self.pilhas[";".join(reversed(nomes))] += 1
+
+    def iniciar(self):
+        if self._thread is None:
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._amostrar, args=(threading.get_ident(),), daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        if self._thread is not None:
+            self._parar.set()
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def salvar(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            for pilha, quantidade in self.pilhas.most_common():
+                arquivo.write(f"{pilha} {quantidade}\n")
+        return caminho
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *erro):
+        self.parar()
+
+
+def _iniciar_pelo_ambiente():
+    destino = os.environ.get(VARIAVEL_PERFIL, "")
+    destino = None if destino in ("", "0") else RELATORIO_PADRAO if destino == "1" else destino
+    pilhas = os.environ.get(VARIAVEL_PILHAS) or None
+    if destino is None and pilhas is None:
+        return
+    if destino is not None:
+        ativar()
+    amostrador = AmostradorPilhas().iniciar() if pilhas else None
+
+    def finalizar():
+        if amostrador is not None:
+            amostrador.parar().salvar(pilhas)
+        if destino is not None:
+            salvar_relatorio(destino)
+
+    atexit.register(finalizar)
+
+
+_iniciar_pelo_ambiente()
@@ -0,0 +1,136 @@
+import numpy as np
+
+from backtesting_core import armazenamento
+from backtesting_core.download import GRANULARIDADES_MS
+from backtesting_core.execucao import tempos_ms
+from backtesting_core.indicadores import calcular_indicadores
+
+# 🔹 Timeframes maiores montados a partir dos candles 1m do armazenamento (open = primeiro, high = máximo,
+# low = mínimo, close = último, volumes somados), em vez de um download separado por timeframe.
+# Cada timeframe fica gravado ao lado da base como <raiz>/<symbol>/<timeframe>_de_<base>/ e, quando chegam
+# candles 1m novos, só o último candle do timeframe (que podia estar incompleto) em diante é recalculado.
+# Na Bitget os candles de 6H, 12H, 1D e 1W começam em UTC+8 (1W na segunda-feira); os demais em UTC.
+ALINHAMENTO_MS = {
+    "6H": -8 * 3_600_000,
+    "12H": -8 * 3_600_000,
+    "1D": -8 * 3_600_000,
+    "1W": 4 * 86_400_000 - 8 * 3_600_000,  # 1970-01-05 (segunda) 00:00 UTC+8
+}
+SEGMENTOS_PARA_COMPACTAR = 8
+
+
+# 🔹 Início do candle do timeframe a que cada timestamp (ms) pertence
+def inicio_candle(timestamps, granularity):
+    passo = GRANULARIDADES_MS[granularity]
+    deslocamento = ALINHAMENTO_MS.get(granularity, 0)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    return timestamps - (timestamps - deslocamento) % passo
+
+
+# 🔹 Agrega colunas de candles (timestamp em ms, ordenado) no timeframe pedido, sem loop em Python
+def reamostrar(candles, granularity):
+    inicios = inicio_candle(candles["timestamp"], granularity)
+    if not len(inicios):
+        return {nome: np.asarray(valores)[:0] for nome, valores in candles.items()}
+    primeiros = np.flatnonzero(np.r_[True, inicios[1:] != inicios[:-1]])
+    ultimos = np.r_[primeiros[1:], len(inicios)] - 1
+    resultado = {"timestamp": inicios[primeiros]}
+    for nome, valores in candles.items():
+        valores = np.asarray(valores)
+        if nome == "open":
+            resultado[nome] = valores[primeiros]
+        elif nome == "high":
+            resultado[nome] = np.maximum.reduceat(valores, primeiros)
+        elif nome == "low":
+            resultado[nome] = np.minimum.reduceat(valores, primeiros)
+        elif nome == "close":
+            resultado[nome] = valores[ultimos]
+        elif nome in ("volume", "quote_volume"):
+            resultado[nome] = np.add.reduceat(valores, primeiros)
+    return resultado
+
+
+def nome_reamostrado(granularity, base="1m"):
+    return f"{granularity}_de_{base}"
+
+
+def _cobertura_ate(cobertura, limite):
+    return [[inicio, min(fim, limite)] for inicio, fim in cobertura if inicio < limite]
+
+
+def _cobertura_candles(candles, granularity):
+    timestamps = candles["timestamp"]
+    if not len(timestamps):
+        return []
+    return [[int(timestamps[0]), int(timestamps[-1]) + GRANULARIDADES_MS[granularity]]]
+
+
+def _registrar_base(raiz, symbol, derivado, base, cobertura_base):
+    meta = armazenamento.ler_meta(raiz, symbol, derivado)
+    meta["base"] = base
+    meta["cobertura_base"] = cobertura_base
+    armazenamento._gravar_meta(armazenamento.pasta_candles(raiz, symbol, derivado), meta)
+    return meta
+
+
+# 🔹 Garante o timeframe gravado em dia com a base: nada a fazer se a base não mudou, só o fim quando a base
+# cresceu depois do último candle do timeframe e tudo de novo quando mudou algo antes dele
+def atualizar_reamostrado(raiz, symbol, granularity, base="1m"):
+    derivado = nome_reamostrado(granularity, base)
+    cobertura_base = armazenamento.ler_meta(raiz, symbol, base)["cobertura"]
+    if armazenamento.existe_candles(raiz, symbol, derivado):
+        meta = armazenamento.ler_meta(raiz, symbol, derivado)
+        if meta.get("cobertura_base") == cobertura_base:
+            return meta
+        ultimo = meta["fim"]
+        anterior = meta.get("cobertura_base", [])
+        if ultimo is not None and _cobertura_ate(anterior, ultimo) == _cobertura_ate(cobertura_base, ultimo):
+            novos = reamostrar(armazenamento.abrir_candles(raiz, symbol, base, inicio=ultimo), granularity)
+            armazenamento.anexar_candles(raiz, symbol, derivado, novos, _cobertura_candles(novos, granularity))
+            if len(armazenamento.ler_meta(raiz, symbol, derivado)["segmentos"]) >= SEGMENTOS_PARA_COMPACTAR:
+                armazenamento.compactar_candles(raiz, symbol, derivado)
+            return _registrar_base(raiz, symbol, derivado, base, cobertura_base)
+
+    candles = reamostrar(armazenamento.abrir_candles(raiz, symbol, base), granularity)
+    armazenamento.salvar_candles(raiz, symbol, derivado, candles, _cobertura_candles(candles, granularity))
+    return _registrar_base(raiz, symbol, derivado, base, cobertura_base)
+
+
+# 🔹 Candles do timeframe (atualizados a partir da base) em [inicio, fim), abertos sem cópia quando compactados
+def obter_reamostrado(raiz, symbol, granularity, inicio=None, fim=None, base="1m"):
+    if granularity == base:
+        return armazenamento.abrir_candles(raiz, symbol, base, inicio, fim)
+    atualizar_reamostrado(raiz, symbol, granularity, base)
+    return armazenamento.abrir_candles(raiz, symbol, nome_reamostrado(granularity, base), inicio, fim)
+
+
+def carregar_reamostrado(raiz, symbol, granularity, inicio=None, fim=None, base="1m"):
+    return armazenamento.para_dataframe(obter_reamostrado(raiz, symbol, granularity, inicio, fim, base))
+
+
+# 🔹 Copia colunas de um timeframe maior para o df base com o sufixo do timeframe (ex.: ADX_1H).
+# Cada candle base só enxerga o último candle maior já fechado no seu fechamento (sem olhar o futuro).
+def alinhar_timeframe(df, df_timeframe, colunas, granularity, base="1m"):
+    fechamentos = tempos_ms(df_timeframe) + GRANULARIDADES_MS[granularity]
+    posicao = np.searchsorted(fechamentos, tempos_ms(df) + GRANULARIDADES_MS[base], side="right") - 1
+    valido = posicao >= 0
+    for coluna in colunas:
+        valores = df_timeframe[coluna].to_numpy(dtype=np.float64)
+        df[f"{coluna}_{granularity}"] = np.where(valido, valores[np.maximum(posicao, 0)], np.nan)
+    return df
+
+
+# 🔹 DataFrame no timeframe `base` com indicadores de vários timeframes: `indicadores` é
+# {timeframe: [(nome, params), ...]}; as colunas dos outros timeframes entram com o sufixo (ADX_1H, trix_15m...)
+def carregar_multitimeframe(raiz, symbol, indicadores, base="1m", inicio=None, fim=None):
+    df = armazenamento.carregar_dataframe(raiz, symbol, base, inicio, fim)
+    df = calcular_indicadores(df, indicadores.get(base, []))
+    for granularity, especificacao in indicadores.items():
+        if granularity == base:
+            continue
+        df_timeframe = carregar_reamostrado(raiz, symbol, granularity, inicio, fim, base)
+        colunas = list(df_timeframe.columns)
+        df_timeframe = calcular_indicadores(df_timeframe, especificacao)
+        novas = [coluna for coluna in df_timeframe.columns if coluna not in colunas]
+        df = alinhar_timeframe(df, df_timeframe, novas, granularity, base)
+    return df
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from backtesting_core.execucao import (
+    EVENTO_BUY, EVENTO_SELL, ROTULOS_EVENTOS, Evento, estados_eventos, resultados_saidas,
+)
+
+# 🔹 Registro de operações em colunas tipadas no lugar da lista de tuplas (rótulo, preço, data):
+# evento (int8, valores de execucao.Evento), preço (float64), tempo (epoch em ms, int64),
+# lado (int8: 1 comprado, -1 vendido) e resultado (float64: o quanto a saída mudou o saldo; NaN nas entradas).
+# As colunas crescem dobrando a capacidade, então adicionar uma operação por vez custa O(1) amortizado.
+# Para os scripts o registro continua iterando como a lista antiga de (rótulo, preço, pd.Timestamp).
+COLUNAS = {
+    "evento": np.int8,
+    "preco": np.float64,
+    "tempo": np.int64,
+    "lado": np.int8,
+    "resultado": np.float64,
+}
+CAPACIDADE_INICIAL = 64
+
+
+class RegistroOperacoes:
+    def __init__(self, capacidade=CAPACIDADE_INICIAL):
+        self._colunas = {nome: np.empty(max(int(capacidade), 1), dtype=dtype) for nome, dtype in COLUNAS.items()}
+        self._n = 0
+
+    # 🔹 Registro a partir dos eventos do núcleo (execucao.processar_candles/fechar_posicao).
+    # `tempos` são os timestamps em ms de cada candle; lado e resultado são refeitos com as contas do núcleo
+    # (sem `initial_balance` e `tamanho_ordem` a coluna de resultado fica NaN; `tamanho_ordem` pode ser um array
+    # por candle, como em execucao.curva_patrimonio).
+    @classmethod
+    def de_eventos(cls, eventos, tempos, initial_balance=None, tamanho_ordem=None):
+        ev_codigo, ev_preco, ev_indice, n_ev = eventos
+        codigo = ev_codigo[:n_ev]
+        indice = ev_indice[:n_ev]
+        entrada = (codigo == EVENTO_BUY) | (codigo == EVENTO_SELL)
+        # Toda saída fecha a posição aberta pelo evento anterior
+        lado_entrada = np.where(codigo == EVENTO_BUY, 1, -1).astype(np.int8)
+        lado = np.where(entrada, lado_entrada, np.r_[np.int8(0), lado_entrada[:-1]]).astype(np.int8)
+        resultado = np.full(n_ev, np.nan)
+        if initial_balance is not None and tamanho_ordem is not None and n_ev:
+            tamanhos = np.asarray(tamanho_ordem, dtype=np.float64)
+            if tamanhos.ndim == 0:
+                tamanhos = np.broadcast_to(tamanhos, (int(indice.max()) + 1,))
+            saidas, resultados = resultados_saidas(eventos, estados_eventos(eventos, initial_balance, tamanhos)[0])
+            resultado[saidas] = resultados
+        registro = cls(n_ev)
+        registro.estender(codigo, ev_preco[:n_ev], np.asarray(tempos, dtype=np.int64)[indice], lado, resultado)
+        return registro
+
+    def _garantir(self, total):
+        capacidade = len(self._colunas["evento"])
+        if total <= capacidade:
+            return
+        capacidade = max(total, 2 * capacidade)
+        for nome, valores in self._colunas.items():
+            novos = np.empty(capacidade, dtype=valores.dtype)
+            novos[:self._n] = valores[:self._n]
+            self._colunas[nome] = novos
+
+    def adicionar(self, evento, preco, tempo, lado=0, resultado=np.nan):
+        self._garantir(self._n + 1)
+        for nome, valor in zip(COLUNAS, (evento, preco, tempo, lado, resultado)):
+            self._colunas[nome][self._n] = valor
+        self._n += 1
+
+    def estender(self, eventos, precos, tempos, lados=None, resultados=None):
+        n = len(eventos)
+        self._garantir(self._n + n)
+        valores = (eventos, precos, tempos, 0 if lados is None else lados, np.nan if resultados is None else resultados)
+        for nome, valor in zip(COLUNAS, valores):
+            self._colunas[nome][self._n:self._n + n] = valor
+        self._n += n
+
+    # 🔹 Coluna como view (sem cópia) das operações registradas
+    def coluna(self, nome):
+        return self._colunas[nome][:self._n]
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return [self[i] for i in range(*posicao.indices(self._n))]
+        if posicao < 0:
+            posicao += self._n
+        if not 0 <= posicao < self._n:
+            raise IndexError("operação fora do registro")
+        return (ROTULOS_EVENTOS[int(self._colunas["evento"][posicao])], float(self._colunas["preco"][posicao]),
+                pd.Timestamp(int(self._colunas["tempo"][posicao]), unit="ms"))
+
+    def __iter__(self):
+        rotulos = [ROTULOS_EVENTOS[codigo] for codigo in self.coluna("evento").tolist()]
+        datas = pd.to_datetime(self.coluna("tempo"), unit="ms")
+        return iter(zip(rotulos, self.coluna("preco").tolist(), datas))
+
+    def __repr__(self):
+        return f"RegistroOperacoes({self._n} operações)"
+
+    # 🔹 DataFrame sobre as mesmas colunas (sem cópia); o tempo vira datetime64[ms] por reinterpretação
+    def para_dataframe(self):
+        colunas = {nome: self.coluna(nome) for nome in COLUNAS}
+        colunas["tempo"] = colunas["tempo"].view("datetime64[ms]")
+        return pd.DataFrame(colunas, copy=False)
+
+    # 🔹 Tabela Arrow sobre as mesmas colunas (sem cópia); o evento vira dicionário com os rótulos
+    def para_arrow(self):
+        try:
+            import pyarrow as pa
+        except ImportError as erro:
+            raise RuntimeError("RegistroOperacoes.para_arrow precisa do pacote pyarrow (pip install pyarrow)") from erro
+        rotulos = [ROTULOS_EVENTOS.get(codigo, "") for codigo in range(max(Evento) + 1)]
+        return pa.table({
+            "evento": pa.DictionaryArray.from_arrays(pa.array(self.coluna("evento")), pa.array(rotulos)),
+            "preco": pa.array(self.coluna("preco")),
+            "tempo": pa.array(self.coluna("tempo").view("datetime64[ms]")),
+            "lado": pa.array(self.coluna("lado")),
+            "resultado": pa.array(self.coluna("resultado")),
+        })
+
+    def salvar_parquet(self, caminho, compressao="zstd"):
+        tabela = self.para_arrow()
+        import pyarrow.parquet as pq
+        pq.write_table(tabela, caminho, compression=compressao)
+        return caminho
@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core import perfil
+
+# 🔹 Robustez por Monte Carlo sobre o resultado de cada trade (coluna "resultado" do RegistroOperacoes ou
+# execucao.resultados_saidas): milhares de sequências alternativas montadas de uma vez, em matrizes
+# (simulações x trades), para ver quanto do saldo final e do drawdown de um backtest foi sorte.
+#   embaralhar: mesma lista de trades em outra ordem (o saldo final não muda, o drawdown sim)
+#   blocos: bootstrap por blocos de `tamanho_bloco` trades consecutivos sorteados com reposição (1 = bootstrap simples)
+#   pular: cada trade é deixado de fora com probabilidade `prob_pular` (entradas perdidas)
+# O patrimônio de cada sequência é o saldo inicial mais a soma dos resultados até cada saída, então o drawdown aqui
+# é medido nas saídas (e não candle a candle como em metricas.py).
+# As simulações são divididas em lotes de até ELEMENTOS_POR_LOTE valores; cada lote tem a sua semente, derivada de
+# `semente` por np.random.SeedSequence.spawn, então o resultado é o mesmo com 1 ou N processos.
+EMBARALHAR = "embaralhar"
+BLOCOS = "blocos"
+PULAR = "pular"
+METODOS = (EMBARALHAR, BLOCOS, PULAR)
+ELEMENTOS_POR_LOTE = 2_000_000
+SIMULACOES_POR_PROCESSO = 20_000  # abaixo disso o pool custa mais do que economiza
+QUANTIS = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+# 🔹 Resultados das saídas de um RegistroOperacoes (as entradas têm resultado NaN)
+def resultados_operacoes(operacoes):
+    resultado = operacoes.coluna("resultado")
+    return resultado[~np.isnan(resultado)]
+
+
+# 🔹 Saldo final e maior drawdown de cada linha de uma matriz (sequências x trades) de resultados.
+# A matriz é reaproveitada para o patrimônio (sem cópia).
+def saldo_e_drawdown(resultados, initial_balance):
+    patrimonio = np.cumsum(resultados, axis=1, out=resultados)
+    patrimonio += initial_balance
+    final = patrimonio[:, -1].copy() if patrimonio.shape[1] else np.full(len(patrimonio), float(initial_balance))
+    pico = np.maximum.accumulate(patrimonio, axis=1)
+    np.maximum(pico, initial_balance, out=pico)
+    quedas = np.subtract(pico, patrimonio, out=patrimonio)
+    quedas /= pico
+    return final, quedas.max(axis=1, initial=0.0)
+
+
+def _amostras(resultados, quantidade, metodo, rng, tamanho_bloco, prob_pular):
+    n = len(resultados)
+    if metodo == EMBARALHAR:
+        return rng.permuted(np.tile(resultados, (quantidade, 1)), axis=1)
+    if metodo == BLOCOS:
+        blocos = -(-n // tamanho_bloco)
+        inicios = rng.integers(0, n, size=(quantidade, blocos, 1))
+        indices = ((inicios + np.arange(tamanho_bloco)) % n).reshape(quantidade, -1)[:, :n]  # blocos circulares
+        return resultados[indices]
+    if metodo == PULAR:
+        return np.where(rng.random((quantidade, n)) < prob_pular, 0.0, resultados)
+    raise ValueError(f"método desconhecido: {metodo!r} (use {', '.join(METODOS)})")
+
+
+# Um lote de simulações com o seu próprio gerador (roda no processo filho)
+def _simular_lote(resultados, initial_balance, quantidade, semente, metodo, tamanho_bloco, prob_pular):
+    rng = np.random.default_rng(semente)
+    return saldo_e_drawdown(_amostras(resultados, quantidade, metodo, rng, tamanho_bloco, prob_pular),
+                            initial_balance)
+
+
+# 🔹 Distribuições de saldo final e maior drawdown em `simulacoes` sequências alternativas dos trades.
+# Devolve {"saldo_final": array, "max_drawdown": array, "original": {...}, "metodo", "simulacoes", "trades"}.
+@perfil.cronometrar("robustez")
+def monte_carlo(resultados, initial_balance, simulacoes=10_000, metodo=EMBARALHAR, tamanho_bloco=10,
+                prob_pular=0.1, semente=None, processos=None):
+    resultados = np.ascontiguousarray(resultados, dtype=np.float64)
+    if metodo not in METODOS:
+        raise ValueError(f"método desconhecido: {metodo!r} (use {', '.join(METODOS)})")
+    if not len(resultados):
+        raise ValueError("sem trades para simular")
+    tamanho_bloco = max(1, min(int(tamanho_bloco), len(resultados)))
+
+    por_lote = max(1, min(simulacoes, ELEMENTOS_POR_LOTE // len(resultados)))
+    quantidades = [min(por_lote, simulacoes - inicio) for inicio in range(0, simulacoes, por_lote)]
+    sementes = np.random.SeedSequence(semente).spawn(len(quantidades))
+    tarefas = [(resultados, initial_balance, quantidade, filha, metodo, tamanho_bloco, prob_pular)
+               for quantidade, filha in zip(quantidades, sementes)]
+
+    processos = min(processos or os.cpu_count() or 1, len(tarefas), -(-simulacoes // SIMULACOES_POR_PROCESSO))
+    if processos <= 1:
+        lotes = [_simular_lote(*tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            lotes = list(executor.map(_simular_lote, *zip(*tarefas)))
+    perfil.contar("robustez", "simulacoes", simulacoes)
+
+    final, queda = saldo_e_drawdown(resultados[None, :].copy(), initial_balance)
+    return {
+        "saldo_final": np.concatenate([lote[0] for lote in lotes]),
+        "max_drawdown": np.concatenate([lote[1] for lote in lotes]),
+        "original": {"saldo_final": float(final[0]), "max_drawdown": float(queda[0])},
+        "metodo": metodo,
+        "simulacoes": simulacoes,
+        "trades": len(resultados),
+    }
+
+
+# 🔹 Tabela com média, quantis e a posição do backtest original em cada distribuição
+def resumo_monte_carlo(simulacao, initial_balance, quantis=QUANTIS):
+    linhas = {}
+    for nome in ("saldo_final", "max_drawdown"):
+        valores = simulacao[nome]
+        original = simulacao["original"][nome]
+        linhas[nome] = {
+            "original": original,
+            "media": float(valores.mean()),
+            **{f"q{quantil * 100:g}": float(valor) for quantil, valor in zip(quantis, np.quantile(valores, quantis))},
+            "percentil_original": float(np.mean(valores <= original) * 100),
+        }
+    tabela = pd.DataFrame(linhas).T
+    tabela["prob_prejuizo"] = [float(np.mean(simulacao["saldo_final"] < initial_balance)), np.nan]
+    return tabela
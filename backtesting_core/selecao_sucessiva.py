@@ -0,0 +1,197 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core.compartilhado import ConjuntoCompartilhado
+from backtesting_core.execucao import USD, contagem_trades, fechar_posicao, novo_estado, processar_candles
+from backtesting_core.sinais import gerar_sinais
+from backtesting_core.varredura import colunas_dados, combinacoes, publicar_dados, resumir, separar_parametros
+from backtesting_core.walk_forward import _regras
+
+# 🔹 Seleção sucessiva (successive halving): em vez de rodar todas as combinações da grade sobre o histórico
+# inteiro, todas rodam só num prefixo curto, as melhores `1/fator` pela métrica seguem para um prefixo `fator`
+# vezes maior, e assim por diante até o histórico completo. Cada candidato guarda o estado do motor
+# (estado, contadores, eventos) entre os estágios e continua de onde parou com processar_candles(inicio, fim),
+# então nenhum candle é executado duas vezes e o resultado final de quem chega ao fim é idêntico ao de varrer.
+# Os indicadores e sinais de cada estágio são calculados desde o primeiro candle até o corte, como no walk-forward.
+# Nos estágios intermediários a posição aberta é marcada a mercado no último candle (numa cópia do estado).
+# Com g candidatos e fator f o custo fica perto de log_f(g) execuções completas, em vez de g.
+FATOR = 3
+CANDLES_MINIMOS = 1000  # primeiro corte: abaixo disso a métrica quase não separa os candidatos
+CANDIDATOS_POR_PROCESSO = 4
+METRICAS = ("saldo_final", "retorno_pct", "trades", "acertos", "erros", "taxa_acerto")  # colunas de resumir
+
+# Dados do processo filho: colunas como views do conjunto em memória compartilhada
+_DADOS = {}
+_CONJUNTO = None
+
+
+def _iniciar_processo(nome_conjunto):
+    global _CONJUNTO, _DADOS
+    _CONJUNTO = ConjuntoCompartilhado.anexar(nome_conjunto)
+    _DADOS = _CONJUNTO.colunas
+
+
+# 🔹 Cortes (fim de cada estágio, em candles) para `candidatos` combinações sobre `n` candles.
+# Um estágio a cada divisão por `fator` até sobrar um candidato, sem começar abaixo de `candles_minimos`;
+# `cortes` explícitos aceitam números de candles ou frações do histórico (0 < fração <= 1).
+def cortes_estagios(n, candidatos, fator=FATOR, candles_minimos=CANDLES_MINIMOS, cortes=None):
+    if fator <= 1:
+        raise ValueError("fator precisa ser maior que 1")
+    if cortes is None:
+        estagios = 1 + int(math.log(max(candidatos, 1)) / math.log(fator) + 1e-9)
+        cortes = [round(n / fator ** (estagios - 1 - estagio)) for estagio in range(estagios)]
+        cortes = [corte for corte in cortes if corte >= min(candles_minimos, n)]
+    else:
+        cortes = [round(corte * n) if isinstance(corte, float) and corte <= 1 else int(corte) for corte in cortes]
+        if any(corte <= 0 or corte > n for corte in cortes):
+            raise ValueError(f"cortes precisam estar entre 1 e {n} candles")
+    cortes = sorted(set(cortes) | {n})
+    return cortes
+
+
+# 🔹 Avança um grupo de candidatos (mesmos parâmetros de indicador) de `inicio` até `fim`, cada um a partir do
+# seu estado salvo (None no primeiro estágio). Devolve (indice, linha, estado do motor) por candidato.
+# `dados` são as colunas quando roda no próprio processo; nos filhos vêm do conjunto anexado.
+def _avancar_grupo(preparar, estrategia, params_preparar, candidatos, inicio, fim, final, initial_balance,
+                   tamanho_ordem, dados=None):
+    dados = _DADOS if dados is None else dados
+    df = pd.DataFrame({nome: valores[:fim] for nome, valores in dados.items()}, copy=False)
+    if preparar is not None:
+        df = preparar(df, **params_preparar)
+    close = df["close"].to_numpy(dtype=np.float64)
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+
+    resultados = []
+    for indice, params_estrategia, params_execucao, motor in candidatos:
+        regras, tamanho, fechamento_forcado = _regras(params_execucao, tamanho_ordem)
+        if motor is None:
+            estado, contadores = novo_estado(initial_balance)
+            eventos = None
+        else:
+            estado, contadores, eventos = motor
+        sinais = gerar_sinais(df, estrategia, **params_estrategia)
+        eventos = processar_candles(close, high, low, sinais, estado, contadores, tamanho, inicio=max(inicio, 1),
+                                    fim=fim, eventos=eventos, **regras)
+        if final:
+            if fechamento_forcado and fim:
+                eventos = fechar_posicao(estado, close[fim - 1], fim - 1, eventos)
+            saldo = float(estado[USD])
+        else:
+            marcado = estado.copy()
+            fechar_posicao(marcado, close[fim - 1], fim - 1, eventos)
+            saldo = float(marcado[USD])
+        resultados.append((indice, resumir(saldo, contagem_trades(contadores), initial_balance),
+                           (estado, contadores, eventos)))
+    return resultados
+
+
+# 🔹 Busca por seleção sucessiva. `dados`, `estrategia`, `grade`, `preparar` e `metrica` funcionam como em
+# varredura.varrer; a cada estágio ficam os ceil(n / `fator`) melhores pela métrica (ao menos `minimo_mantidos`).
+# Devolve {"resultados": tabela dos que chegaram ao fim, ordenada pela métrica (mesmas colunas de varrer),
+# "candidatos": uma linha por combinação com o estágio em que foi eliminada (NaN para os finalistas) e a última
+# avaliação, "estagios": candles, candidatos, mantidos e tempo de cada estágio, "fracao_da_grade": candles
+# processados em relação à grade completa}.
+def selecao_sucessiva(dados, estrategia, grade, preparar=None, initial_balance=10000, tamanho_ordem=0.001,
+                      processos=None, metrica="saldo_final", fator=FATOR, candles_minimos=CANDLES_MINIMOS,
+                      cortes=None, minimo_mantidos=1):
+    if metrica not in METRICAS:
+        raise ValueError(f"métrica desconhecida: {metrica!r} (use {', '.join(METRICAS)})")
+    colunas = colunas_dados(dados)
+    n = len(colunas["close"])
+    todas = combinacoes(grade)
+    if not todas or not n:
+        raise ValueError("a grade e o histórico precisam ter ao menos uma combinação e um candle")
+    lista_cortes = cortes_estagios(n, len(todas), fator, candles_minimos, cortes)
+
+    candidatos = []
+    for params in todas:
+        params_preparar, params_estrategia, params_execucao = separar_parametros(params, preparar, estrategia)
+        candidatos.append((tuple(sorted(params_preparar.items())), params_estrategia, params_execucao))
+    motores = [None] * len(todas)
+    linhas = [None] * len(todas)
+    eliminados = {}
+    vivos = list(range(len(todas)))
+
+    processos = processos or os.cpu_count() or 1
+    executor = conjunto = None
+    temporario = False
+    estagios = []
+    processados = 0
+    inicio = 0
+    try:
+        # O pool fica aberto entre os estágios; o estado de cada candidato vai e volta com as tarefas
+        if processos > 1:
+            conjunto, temporario = publicar_dados(dados, colunas)
+            executor = ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                                           initargs=(conjunto.nome,))
+        for estagio, fim in enumerate(lista_cortes, start=1):
+            relogio = time.perf_counter()
+            final = fim == n
+            grupos = {}
+            for indice in vivos:
+                chave, params_estrategia, params_execucao = candidatos[indice]
+                grupos.setdefault(chave, []).append((indice, params_estrategia, params_execucao, motores[indice]))
+                motores[indice] = None  # o estado vai para a tarefa e volta atualizado
+
+            # Grupos grandes são quebrados em blocos para manter todos os processos ocupados
+            tamanho_bloco = max(1, -(-len(vivos) // (processos * CANDIDATOS_POR_PROCESSO)))
+            tarefas = [
+                (preparar, estrategia, dict(chave), lista[i:i + tamanho_bloco], inicio, fim, final, initial_balance,
+                 tamanho_ordem)
+                for chave, lista in grupos.items()
+                for i in range(0, len(lista), tamanho_bloco)
+            ]
+            if executor is None:
+                blocos = [_avancar_grupo(*tarefa, colunas) for tarefa in tarefas]
+            else:
+                blocos = list(executor.map(_avancar_grupo, *zip(*tarefas)))
+            for bloco in blocos:
+                for indice, linha, motor in bloco:
+                    linhas[indice] = linha
+                    motores[indice] = motor
+
+            avaliados = len(vivos)
+            processados += avaliados * fim
+            # Ordem estável: em empate fica quem vem antes na grade
+            vivos = sorted(vivos, key=lambda indice: -linhas[indice][metrica])
+            melhor = linhas[vivos[0]][metrica]
+            if not final:
+                mantidos = max(minimo_mantidos, -(-len(vivos) // fator))
+                for indice in vivos[mantidos:]:
+                    eliminados[indice] = estagio
+                    motores[indice] = None
+                vivos = sorted(vivos[:mantidos])
+            estagios.append({
+                "estagio": estagio,
+                "candles": fim,
+                "fim": pd.to_datetime(colunas["timestamp"][fim - 1], unit="ms") if "timestamp" in colunas else None,
+                "candidatos": avaliados,
+                "mantidos": len(vivos),
+                f"melhor_{metrica}": melhor,
+                "segundos": round(time.perf_counter() - relogio, 4),
+            })
+            inicio = fim
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if temporario:
+            conjunto.fechar()
+
+    tabela_candidatos = pd.DataFrame([
+        {**params, "eliminado_no_estagio": eliminados.get(indice, np.nan),
+         "candles_avaliados": lista_cortes[eliminados[indice] - 1] if indice in eliminados else n, **linhas[indice]}
+        for indice, params in enumerate(todas)
+    ])
+    resultados = pd.DataFrame([{**todas[indice], **linhas[indice]} for indice in vivos])
+    return {
+        "resultados": resultados.sort_values(metrica, ascending=False, kind="stable").reset_index(drop=True),
+        "candidatos": tabela_candidatos,
+        "estagios": pd.DataFrame(estagios),
+        "fracao_da_grade": processados / (len(todas) * n),
+    }
@@ -0,0 +1,85 @@
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from backtesting_core.download import GRANULARIDADES_MS, LIMITE_POR_PAGINA
+
+# 🔹 Servidor HTTP local que imita /api/v2/mix/market/history-candles da Bitget para rodar sem internet.
+# Os candles são determinísticos (dependem só do timestamp), então qualquer janela é sempre consistente.
+CAMINHO = "/api/v2/mix/market/history-candles"
+
+
+def candle_sintetico(ts, passo):
+    base = 30000.0 * (1.0 + 0.05 * math.sin(ts / 3.6e7) + 0.01 * math.sin(ts / 7.3e5))
+    open_ = round(base, 1)
+    close = round(base * (1.0 + 0.001 * math.sin(ts / 1.1e5)), 1)
+    high = round(max(open_, close) * (1.0 + 0.0005 * (1.0 + math.sin(ts / 9.7e4))), 1)
+    low = round(min(open_, close) * (1.0 - 0.0005 * (1.0 + math.cos(ts / 8.3e4))), 1)
+    volume = round(10.0 + 5.0 * math.sin(ts / 4.1e5), 4)
+    return [str(ts), str(open_), str(high), str(low), str(close), str(volume), str(round(volume * close, 2))]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        pedido = urlparse(self.path)
+        if pedido.path != CAMINHO:
+            self._responder(404, {"code": "40404", "msg": "Request URL NOT FOUND", "data": None})
+            return
+        servidor = self.server
+        with servidor.trava:
+            servidor.requisicoes += 1
+            falhar = servidor.falhas_restantes > 0
+            if falhar:
+                servidor.falhas_restantes -= 1
+        if falhar:
+            self._responder(429, {"code": "429", "msg": "Too Many Requests", "data": None})
+            return
+
+        params = {chave: valores[0] for chave, valores in parse_qs(pedido.query).items()}
+        passo = GRANULARIDADES_MS.get(params.get("granularity", "1m"))
+        if passo is None:
+            self._responder(400, {"code": "40034", "msg": "Parameter granularity error", "data": None})
+            return
+        limit = min(int(params.get("limit", LIMITE_POR_PAGINA)), LIMITE_POR_PAGINA)
+        fim = int(params["endTime"]) if "endTime" in params else servidor.agora_ms
+        inicio = int(params.get("startTime", fim - passo * limit))
+        fim = min(fim, servidor.agora_ms)
+
+        # A API devolve os candles mais recentes da janela, em ordem crescente de tempo
+        ultimo = fim - fim % passo
+        primeiro = max(inicio + (-inicio) % passo, ultimo - passo * (limit - 1))
+        dados = [candle_sintetico(ts, passo) for ts in range(primeiro, ultimo + 1, passo)]
+        self._responder(200, {"code": "00000", "msg": "success", "requestTime": servidor.agora_ms, "data": dados})
+
+    def _responder(self, status, corpo):
+        conteudo = json.dumps(corpo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+# 🔹 Sobe o servidor em uma thread; devolve o servidor e a URL para passar em baixar_historico(url=...)
+def iniciar_servidor(agora_ms, porta=0, falhas=0):
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), _Handler)
+    servidor.daemon_threads = True
+    servidor.agora_ms = agora_ms
+    servidor.falhas_restantes = falhas  # primeiras requisições respondidas com 429, para exercitar as novas tentativas
+    servidor.requisicoes = 0
+    servidor.trava = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}{CAMINHO}"
+
+
+if __name__ == "__main__":
+    import time
+
+    servidor, url = iniciar_servidor(int(time.time() * 1000), porta=8765)
+    print(f"Servidor local em {url}")
+    threading.Event().wait()
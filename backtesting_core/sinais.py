@@ -0,0 +1,65 @@
+import functools
+
+import numpy as np
+
+from backtesting_core import perfil
+
+# 🔹 Códigos dos sinais em int8: uma estratégia vetorizada devolve um array com um código por candle
+SEM_SINAL = 0
+COMPRA = 1
+VENDA = -1
+
+ROTULOS = {COMPRA: "BUY", VENDA: "SELL", SEM_SINAL: None}
+CODIGOS = {"BUY": COMPRA, "SELL": VENDA}
+
+
+# 🔹 Marca uma função como estratégia vetorizada: estrategia(df, **params) -> array int8 com len(df) sinais
+def estrategia_vetorizada(func):
+    func.vetorizada = True
+    return func
+
+
+# 🔹 Monta a coluna de sinais a partir das máscaras booleanas de compra e venda
+def montar_sinais(compra, venda, aquecimento=0):
+    compra = np.asarray(compra, dtype=bool)
+    venda = np.asarray(venda, dtype=bool)
+    sinais = np.zeros(len(compra), dtype=np.int8)
+    sinais[venda] = VENDA
+    sinais[compra] = COMPRA  # BUY tem prioridade, igual ao if/elif das estratégias por candle
+    sinais[:aquecimento] = SEM_SINAL
+    return sinais
+
+
+# 🔹 Adaptador: embrulha uma estratégia antiga estrategia(df, i) para que ela devolva a coluna inteira
+def adaptar_estrategia(estrategia, inicio=1):
+    @functools.wraps(estrategia)
+    def vetorizada(df):
+        sinais = np.zeros(len(df), dtype=np.int8)
+        for i in range(inicio, len(df)):
+            sinais[i] = CODIGOS.get(estrategia(df, i), SEM_SINAL)
+        return sinais
+
+    vetorizada.vetorizada = True
+    return vetorizada
+
+
+# 🔹 Gera os sinais de qualquer estratégia (vetorizada ou por candle) em uma única passada
+@perfil.cronometrar("sinais")
+def gerar_sinais(df, estrategia, **params):
+    if not getattr(estrategia, "vetorizada", False):
+        estrategia = adaptar_estrategia(estrategia)
+    sinais = np.asarray(estrategia(df, **params), dtype=np.int8)
+    if len(sinais) != len(df):
+        raise ValueError(f"A estratégia devolveu {len(sinais)} sinais para {len(df)} candles")
+    if perfil.ativo():
+        perfil.contar("sinais", "candles_avaliados", len(sinais))
+        perfil.contar("sinais", "sinais_emitidos", np.count_nonzero(sinais))
+    return sinais
+
+
+# 🔹 Converte os códigos int8 de volta para "BUY"/"SELL"/None (formato usado nos relatórios)
+def sinais_para_coluna(sinais):
+    coluna = np.full(len(sinais), None, dtype=object)
+    coluna[sinais == COMPRA] = "BUY"
+    coluna[sinais == VENDA] = "SELL"
+    return coluna
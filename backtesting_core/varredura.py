@@ -0,0 +1,165 @@
+import inspect
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core.cache_indicadores import CACHE_PADRAO
+from backtesting_core.compartilhado import ConjuntoCompartilhado
+from backtesting_core.execucao import executar_arrays
+from backtesting_core.sinais import gerar_sinais
+
+# 🔹 Parâmetros que vão para o núcleo de execução; o resto é dividido entre `preparar` e a estratégia
+PARAMETROS_EXECUCAO = (
+    "tamanho_ordem", "stop_loss_long", "take_profit_long", "stop_loss_short", "take_profit_short",
+    "saida_reversa", "fechamento_forcado", "exigir_saldo",
+)
+COLUNAS_OHLC = ("timestamp", "open", "high", "low", "close", "volume")
+
+# Dados do processo filho: colunas como views do conjunto em memória compartilhada
+_DADOS = {}
+_CONJUNTO = None
+
+
+# 🔹 Todas as combinações de uma grade {"parametro": [valores]}
+def combinacoes(grade):
+    nomes = list(grade)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*(grade[nome] for nome in nomes))]
+
+
+def _aceitos(func):
+    if func is None:
+        return set(), False
+    parametros = list(inspect.signature(func).parameters.values())[1:]  # o primeiro é sempre o df
+    return {p.name for p in parametros}, any(p.kind is p.VAR_KEYWORD for p in parametros)
+
+
+# 🔹 Divide uma combinação entre indicadores (`preparar`), estratégia e execução
+def separar_parametros(params, preparar, estrategia):
+    aceitos_preparar, _ = _aceitos(preparar)
+    aceitos_estrategia, estrategia_kwargs = _aceitos(estrategia)
+    grupos = ({}, {}, {})
+    for nome, valor in params.items():
+        if nome in PARAMETROS_EXECUCAO:
+            grupos[2][nome] = valor
+        elif nome in aceitos_preparar:
+            grupos[0][nome] = valor
+        elif nome in aceitos_estrategia or estrategia_kwargs:
+            grupos[1][nome] = valor
+        else:
+            raise ValueError(f"Parâmetro '{nome}' não é aceito por preparar, pela estratégia nem pela execução")
+    return grupos
+
+
+# 🔹 Colunas de `dados`: as OHLC de um DataFrame/dict (timestamp em ms) ou todas as de um ConjuntoCompartilhado,
+# que pode trazer indicadores já calculados
+def colunas_dados(dados):
+    if isinstance(dados, ConjuntoCompartilhado):
+        return dados.colunas
+    colunas = {nome: np.asarray(dados[nome]) for nome in COLUNAS_OHLC if nome in dados}
+    if np.issubdtype(colunas.get("timestamp", np.empty(0, dtype=np.int64)).dtype, np.datetime64):
+        colunas["timestamp"] = colunas["timestamp"].astype("datetime64[ms]").astype(np.int64)
+    return colunas
+
+
+# 🔹 Conjunto para o pool: o próprio `dados`, se já publicado, ou um bloco temporário com as colunas
+def publicar_dados(dados, colunas):
+    if isinstance(dados, ConjuntoCompartilhado):
+        return dados, False
+    return ConjuntoCompartilhado.publicar(colunas), True
+
+
+def _iniciar_processo(nome_conjunto, pasta_cache_indicadores=None):
+    global _CONJUNTO, _DADOS
+    _CONJUNTO = ConjuntoCompartilhado.anexar(nome_conjunto)
+    _DADOS = _CONJUNTO.colunas
+    if pasta_cache_indicadores is not None:
+        CACHE_PADRAO.pasta = pasta_cache_indicadores
+
+
+# 🔹 Linha de resultado de um backtest: saldo, retorno e acertos/erros
+def resumir(saldo, contagem, initial_balance):
+    acertos = contagem["win_long"] + contagem["win_short"]
+    erros = contagem["loss_long"] + contagem["loss_short"]
+    return {
+        "saldo_final": saldo,
+        "retorno_pct": (saldo - initial_balance) / initial_balance * 100,
+        "trades": acertos + erros,
+        "acertos": acertos,
+        "erros": erros,
+        "taxa_acerto": acertos / (acertos + erros) * 100 if acertos + erros else 0.0,
+    }
+
+
+# 🔹 Avalia um grupo de combinações que compartilham os mesmos parâmetros de indicador:
+# os indicadores são calculados uma vez e só sinais + execução rodam para cada combinação.
+# `dados` são as colunas quando roda no próprio processo; nos filhos vêm do conjunto anexado.
+def _avaliar_grupo(preparar, estrategia, params_preparar, combinacoes_grupo, initial_balance, tamanho_ordem,
+                   dados=None):
+    df = pd.DataFrame(_DADOS if dados is None else dados, copy=False)
+    if preparar is not None:
+        df = preparar(df, **params_preparar)
+    close = df["close"].to_numpy(dtype=np.float64)
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+
+    resultados = []
+    for params, params_estrategia, params_execucao in combinacoes_grupo:
+        params_execucao = dict(params_execucao)
+        tamanho = params_execucao.pop("tamanho_ordem", tamanho_ordem)
+        sinais = gerar_sinais(df, estrategia, **params_estrategia)
+        _, saldo, contagem = executar_arrays(close, high, low, sinais, initial_balance, tamanho, **params_execucao)
+        resultados.append({**params, **resumir(saldo, contagem, initial_balance)})
+    return resultados
+
+
+# 🔹 Varredura de parâmetros em vários processos. `dados` é um DataFrame, um dict de colunas OHLC ou um
+# compartilhado.ConjuntoCompartilhado já publicado (os processos só se ligam a ele pelo nome);
+# `preparar(df, **params)` calcula os indicadores e `estrategia(df, **params)` gera os sinais.
+# Com `pasta_cache_indicadores`, indicadores memorizados (cache_indicadores.memorizar) são
+# compartilhados em disco entre os processos e entre varreduras.
+# Devolve uma tabela com uma linha por combinação, ordenada pela métrica escolhida.
+def varrer(dados, estrategia, grade, preparar=None, initial_balance=10000, tamanho_ordem=0.001,
+           processos=None, metrica="saldo_final", pasta_cache_indicadores=None):
+    colunas = colunas_dados(dados)
+
+    todas = combinacoes(grade)
+    if not todas:
+        raise ValueError("a grade não tem nenhuma combinação (algum parâmetro está com a lista vazia)")
+    grupos = {}
+    for params in todas:
+        params_preparar, params_estrategia, params_execucao = separar_parametros(params, preparar, estrategia)
+        chave = tuple(sorted(params_preparar.items()))
+        grupos.setdefault(chave, []).append((params, params_estrategia, params_execucao))
+
+    # Grupos grandes são quebrados em blocos para manter todos os processos ocupados
+    processos = processos or os.cpu_count() or 1
+    tamanho_bloco = max(1, -(-len(todas) // (processos * 4)))
+    tarefas = [
+        (preparar, estrategia, dict(chave), lista[i:i + tamanho_bloco], initial_balance, tamanho_ordem)
+        for chave, lista in grupos.items()
+        for i in range(0, len(lista), tamanho_bloco)
+    ]
+
+    if processos == 1:
+        pasta_anterior = CACHE_PADRAO.pasta
+        if pasta_cache_indicadores is not None:
+            CACHE_PADRAO.pasta = pasta_cache_indicadores
+        try:
+            blocos = [_avaliar_grupo(*tarefa, colunas) for tarefa in tarefas]
+        finally:
+            CACHE_PADRAO.pasta = pasta_anterior
+    else:
+        conjunto, temporario = publicar_dados(dados, colunas)
+        try:
+            with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                                     initargs=(conjunto.nome, pasta_cache_indicadores)) as executor:
+                blocos = list(executor.map(_avaliar_grupo, *zip(*tarefas)))
+        finally:
+            if temporario:
+                conjunto.fechar()
+
+    tabela = pd.DataFrame([linha for bloco in blocos for linha in bloco])
+    return tabela.sort_values(metrica, ascending=False, kind="stable").reset_index(drop=True)
@@ -0,0 +1,188 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core.execucao import (
+    USD, contagem_trades, curva_patrimonio, fechar_posicao, novo_estado, processar_candles,
+)
+from backtesting_core.compartilhado import ConjuntoCompartilhado
+from backtesting_core.registro import RegistroOperacoes
+from backtesting_core.sinais import gerar_sinais
+from backtesting_core.varredura import (
+    colunas_dados, combinacoes, publicar_dados, resumir, separar_parametros,
+)
+
+# 🔹 Walk-forward: em cada janela os parâmetros são otimizados no treino e aplicados no teste seguinte.
+# As janelas rodam ao mesmo tempo num pool de processos ligados às mesmas colunas em memória compartilhada.
+# Os indicadores de cada janela são calculados desde o primeiro candle até o fim do teste, então o aquecimento
+# atravessa as fronteiras e os valores são os mesmos de uma execução sobre o histórico inteiro.
+# Os testes são costurados numa única execução fora da amostra: a posição e o saldo passam de uma janela para a
+# seguinte, e com os mesmos parâmetros em todas as janelas o resultado é idêntico ao backtest completo.
+ROLANTE = "rolante"  # treino de tamanho fixo que anda junto com o teste
+ANCORADA = "ancorada"  # treino sempre a partir do início do histórico
+MODOS = (ROLANTE, ANCORADA)
+
+# Dados do processo filho: colunas como views do conjunto em memória compartilhada
+_DADOS = {}
+_CONJUNTO = None
+
+
+# 🔹 Janelas (inicio_treino, fim_treino, inicio_teste, fim_teste) em índices de candle.
+# `treino` e `teste` são números de candles ou durações ("30D", "12h", pd.Timedelta) sobre os timestamps em ms.
+def janelas(tempos, treino, teste, modo=ROLANTE):
+    if modo not in MODOS:
+        raise ValueError(f"modo desconhecido: {modo!r} (use {' ou '.join(MODOS)})")
+    if isinstance(treino, (int, np.integer)) != isinstance(teste, (int, np.integer)):
+        raise ValueError("treino e teste precisam ser os dois em candles ou os dois em duração")
+    if isinstance(treino, (int, np.integer)):
+        eixo = np.arange(len(tempos), dtype=np.int64)
+    else:
+        eixo = np.asarray(tempos, dtype=np.int64)
+        treino = pd.Timedelta(treino).value // 1_000_000
+        teste = pd.Timedelta(teste).value // 1_000_000
+    if treino <= 0 or teste <= 0:
+        raise ValueError("treino e teste precisam ser positivos")
+
+    resultado = []
+    corte = eixo[0] + treino if len(eixo) else 0
+    while len(eixo) and corte <= eixo[-1]:
+        inicio_teste = int(np.searchsorted(eixo, corte, side="left"))
+        fim_teste = int(np.searchsorted(eixo, corte + teste, side="left"))
+        inicio_treino = 0 if modo == ANCORADA else int(np.searchsorted(eixo, corte - treino, side="left"))
+        if fim_teste > inicio_teste > inicio_treino:
+            resultado.append((inicio_treino, inicio_teste, inicio_teste, fim_teste))
+        corte += teste
+    return resultado
+
+
+def _iniciar_processo(nome_conjunto):
+    global _CONJUNTO, _DADOS
+    _CONJUNTO = ConjuntoCompartilhado.anexar(nome_conjunto)
+    _DADOS = _CONJUNTO.colunas
+
+
+def _regras(params_execucao, tamanho_ordem):
+    regras = dict(params_execucao)
+    tamanho = regras.pop("tamanho_ordem", tamanho_ordem)
+    fechamento_forcado = regras.pop("fechamento_forcado", True)
+    return regras, tamanho, fechamento_forcado
+
+
+# 🔹 Backtest sobre os candles [inicio, fim) com estado novo (o primeiro candle do histórico nunca opera)
+def _executar_trecho(close, high, low, sinais, inicio, fim, initial_balance, tamanho, fechamento_forcado, regras):
+    estado, contadores = novo_estado(initial_balance)
+    eventos = processar_candles(close, high, low, sinais, estado, contadores, tamanho, inicio=max(inicio, 1), fim=fim,
+                                **regras)
+    if fechamento_forcado and fim > inicio:
+        fechar_posicao(estado, close[fim - 1], fim - 1, eventos)
+    return float(estado[USD]), contagem_trades(contadores)
+
+
+# 🔹 Otimiza uma janela: todas as combinações no treino; devolve a melhor e os sinais dela no teste.
+# `dados` são as colunas quando roda no próprio processo; nos filhos vêm do conjunto anexado.
+def _otimizar_janela(preparar, estrategia, grupos, janela, initial_balance, tamanho_ordem, metrica, dados=None):
+    dados = _DADOS if dados is None else dados
+    inicio_treino, fim_treino, inicio_teste, fim_teste = janela
+    melhor = None
+    for params_preparar, lista in grupos:
+        # Só até o fim do teste: nada depois dele entra no cálculo desta janela
+        df = pd.DataFrame({nome: valores[:fim_teste] for nome, valores in dados.items()}, copy=False)
+        if preparar is not None:
+            df = preparar(df, **params_preparar)
+        close = df["close"].to_numpy(dtype=np.float64)
+        high = df["high"].to_numpy(dtype=np.float64)
+        low = df["low"].to_numpy(dtype=np.float64)
+        for params, params_estrategia, params_execucao in lista:
+            sinais = gerar_sinais(df, estrategia, **params_estrategia)
+            regras, tamanho, fechamento_forcado = _regras(params_execucao, tamanho_ordem)
+            saldo, contagem = _executar_trecho(close, high, low, sinais, inicio_treino, fim_treino, initial_balance,
+                                               tamanho, fechamento_forcado, regras)
+            linha = resumir(saldo, contagem, initial_balance)
+            if melhor is None or linha[metrica] > melhor[1][metrica]:
+                melhor = (params, linha, sinais[inicio_teste:fim_teste].copy(), params_execucao)
+    params, linha, sinais_teste, params_execucao = melhor
+    return {"janela": janela, "params": params, "treino": linha, "sinais_teste": sinais_teste,
+            "params_execucao": params_execucao}
+
+
+# 🔹 Walk-forward completo. `dados`, `estrategia`, `grade` e `preparar` funcionam como em varredura.varrer.
+# Devolve {"janelas": tabela por janela, "patrimonio": curva fora da amostra, "operacoes", "saldo_final", "contagem"}.
+def walk_forward(dados, estrategia, grade, treino, teste, modo=ROLANTE, preparar=None, initial_balance=10000,
+                 tamanho_ordem=0.001, processos=None, metrica="saldo_final"):
+    colunas = colunas_dados(dados)
+    tempos = colunas["timestamp"]
+    lista_janelas = janelas(tempos, treino, teste, modo)
+    if not lista_janelas:
+        raise ValueError("o histórico não tem candles suficientes para nenhuma janela de treino + teste")
+
+    todas = combinacoes(grade)
+    if not todas:
+        raise ValueError("a grade não tem nenhuma combinação (algum parâmetro está com a lista vazia)")
+    grupos = {}
+    for params in todas:
+        params_preparar, params_estrategia, params_execucao = separar_parametros(params, preparar, estrategia)
+        chave = tuple(sorted(params_preparar.items()))
+        grupos.setdefault(chave, []).append((params, params_estrategia, params_execucao))
+    grupos = [(dict(chave), lista) for chave, lista in grupos.items()]
+    tarefas = [(preparar, estrategia, grupos, janela, initial_balance, tamanho_ordem, metrica)
+               for janela in lista_janelas]
+
+    processos = min(processos or os.cpu_count() or 1, len(tarefas))
+    if processos == 1:
+        resultados = [_otimizar_janela(*tarefa, colunas) for tarefa in tarefas]
+    else:
+        conjunto, temporario = publicar_dados(dados, colunas)
+        try:
+            with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                                     initargs=(conjunto.nome,)) as executor:
+                resultados = list(executor.map(_otimizar_janela, *zip(*tarefas)))
+        finally:
+            if temporario:
+                conjunto.fechar()
+
+    # 🔹 Costura dos testes: uma única execução, janela após janela, com as regras escolhidas em cada uma
+    close = colunas["close"].astype(np.float64)
+    high = colunas["high"].astype(np.float64)
+    low = colunas["low"].astype(np.float64)
+    sinais = np.zeros(len(close), dtype=np.int8)
+    tamanhos = np.full(len(close), float(tamanho_ordem))
+    estado, contadores = novo_estado(initial_balance)
+    eventos = None
+    for resultado in resultados:
+        _, _, inicio_teste, fim_teste = resultado["janela"]
+        sinais[inicio_teste:fim_teste] = resultado["sinais_teste"]
+        regras, tamanho, fechamento_forcado = _regras(resultado["params_execucao"], tamanho_ordem)
+        tamanhos[inicio_teste:fim_teste] = tamanho
+        eventos = processar_candles(close, high, low, sinais, estado, contadores, tamanho,
+                                    inicio=max(inicio_teste, 1), fim=fim_teste, eventos=eventos, **regras)
+    inicio_oos = lista_janelas[0][2]
+    fim_oos = lista_janelas[-1][3]
+    if fechamento_forcado:
+        eventos = fechar_posicao(estado, close[fim_oos - 1], fim_oos - 1, eventos)
+    patrimonio = curva_patrimonio(close, eventos, initial_balance, tamanhos)
+
+    datas = pd.to_datetime(tempos, unit="ms")
+    linhas = []
+    for numero, resultado in enumerate(resultados, start=1):
+        inicio_treino, fim_treino, inicio_teste, fim_teste = resultado["janela"]
+        antes = patrimonio[inicio_teste - 1] if inicio_teste > inicio_oos else initial_balance
+        linhas.append({
+            "janela": numero,
+            "inicio_treino": datas[inicio_treino],
+            "fim_treino": datas[fim_treino - 1],
+            "inicio_teste": datas[inicio_teste],
+            "fim_teste": datas[fim_teste - 1],
+            **resultado["params"],
+            **{f"treino_{nome}": valor for nome, valor in resultado["treino"].items()},
+            "retorno_teste_pct": (patrimonio[fim_teste - 1] / antes - 1) * 100,
+        })
+
+    return {
+        "janelas": pd.DataFrame(linhas),
+        "patrimonio": pd.Series(patrimonio[inicio_oos:fim_oos], index=datas[inicio_oos:fim_oos], name="patrimonio"),
+        "operacoes": RegistroOperacoes.de_eventos(eventos, tempos, initial_balance, tamanhos),
+        "saldo_final": float(estado[USD]),
+        "contagem": contagem_trades(contadores),
+    }
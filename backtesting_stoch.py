@@ -1,154 +1,41 @@
 import requests
-import pandas as pd
-import numpy as np
+
+from backtesting_core.cache_candles import obter_dataframe
+from backtesting_core.estrategias import estrategia_estocastica
+from backtesting_core.execucao import executar_sinais
+from backtesting_core.indicadores import calcular_estocastico
+from backtesting_core.metricas import metricas_operacoes
+from backtesting_core.sinais import gerar_sinais
 
 # Configurações
 symbol = "SBTCSUSDT"  # Par de negociação
 initial_balance = 1000  # Saldo inicial em USDT
 tamanho_ordem = 0.001  # Quantidade de BTC comprada/vendida por operação
+inicio = None  # Início do histórico (ex.: "2024-01-01"); None = últimos 200 candles
+fim = None  # Fim do histórico; None = agora
+pasta_dados = "dados"  # Cache local: execuções seguintes baixam só os candles que faltam
 
-# 🔹 Baixar histórico da Bitget
+# 🔹 Baixar histórico da Bitget (paginado de `inicio` até `fim`, reaproveitando o cache local)
 def get_historical_data(symbol):
-    params = {
-        "symbol": symbol,
-        "productType": "susdt-futures",
-        "granularity": "1m",  # Timeframe de 1 minuto
-        "limit": "200"  # Pegamos o máximo de dados possíveis
-    }
-    response = requests.get("https://api.bitget.com/api/v2/mix/market/history-candles", params=params)
-    if response.status_code == 200:
-        data = response.json()["data"]
-        df = pd.DataFrame(data, columns=["timestamp", "open", "high", "low", "close", "volume", "quote_volume"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"].astype(int), unit="ms")
-        df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
-        return df
-    else:
-        print("Erro ao buscar histórico:", response.text)
-        return None
-
-# 🔹 Calcula o indicador Estocástico
-def calcular_estocastico(df, periodo=14):
-    df["low_min"] = df["low"].rolling(window=periodo).min()
-    df["high_max"] = df["high"].rolling(window=periodo).max()
-    df["%K"] = ((df["close"] - df["low_min"]) / (df["high_max"] - df["low_min"])) * 100
-    df["%D"] = df["%K"].rolling(window=3).mean()
-    return df
-
-# 🔹 Estratégia com Estocástico
-def estrategia_estocastica(df, i):
-    if i < 14:
+    try:
+        return obter_dataframe(pasta_dados, symbol, inicio, fim, product_type="susdt-futures", granularity="1m")
+    except requests.RequestException as erro:
+        print("Erro ao buscar histórico:", erro)
         return None
-    
-    if df.iloc[i]["%K"] > 80 and df.iloc[i]["%D"] > 80:
-        return "SELL"
-    elif df.iloc[i]["%K"] < 20 and df.iloc[i]["%D"] < 20:
-        return "BUY"
-    return None
 
-# 🔹 Sistema de execução de ordens
+# 🔹 Sistema de execução de ordens (saída por sinal contrário, TP e SL)
+# Diferente do loop antigo deste script: depois de uma saída por sinal contrário o TP/SL não é mais testado no
+# mesmo candle. O loop antigo registrava uma segunda saída com o estado velho (numa compra, saldo = 0 * alvo) e
+# todas as saídas por sinal contrário agora se chamam "WIN (REVERSE)", também nas vendas.
 def executar_ordem(df, initial_balance, tamanho_ordem, estrategia):
-    btc_balance = 0
-    usd_balance = initial_balance
-    operations = []
-    position_open = False
-    entry_price = 0
-    stop_loss = 0
-    take_profit = 0
-    trade_type = None
-    win_trades = 0
-    win_trades_tp = 0
-    win_trades_reverse = 0
-    loss_trades = 0
-    highest_balance = initial_balance
-    max_drawdown = 0
-    
-    for i in range(1, len(df)):
-        last_row = df.iloc[i]
-        price = last_row["close"]
-        ordem = estrategia(df, i)
-        
-        # Verifica Stop Loss ou Take Profit
-        if position_open:
-            if trade_type == "long":
-                if ordem == "SELL":
-                    usd_balance = btc_balance * price
-                    btc_balance = 0
-                    win_trades += 1
-                    win_trades_reverse += 1
-                    operations.append(("WIN (REVERSE)", price, last_row["timestamp"]))
-                    position_open = False
-                    
-                if last_row["high"] >= take_profit:
-                    usd_balance = btc_balance * take_profit
-                    btc_balance = 0
-                    win_trades += 1
-                    win_trades_tp += 1
-                    operations.append(("WIN (TP)", take_profit, last_row["timestamp"]))
-                    position_open = False
-
-                elif last_row["low"] <= stop_loss:
-                    usd_balance = btc_balance * stop_loss
-                    btc_balance = 0
-                    loss_trades += 1
-                    operations.append(("LOSS (SL)", stop_loss, last_row["timestamp"]))
-                    position_open = False
-
-            elif trade_type == "short":
-                if ordem == "BUY":
-                    usd_balance += (entry_price - price) * tamanho_ordem
-                    btc_balance = 0
-                    win_trades += 1
-                    win_trades_reverse += 1
-                    operations.append(("WIN (Reverse)", price, last_row["timestamp"]))
-                    position_open = False
-
-                if last_row["low"] <= take_profit:
-                    usd_balance += (entry_price - take_profit) * tamanho_ordem
-                    btc_balance = 0
-                    win_trades += 1
-                    win_trades_tp += 1
-                    operations.append(("WIN (TP)", take_profit, last_row["timestamp"]))
-                    print(usd_balance)
-                    
-                    position_open = False
-                    
-                elif last_row["high"] >= stop_loss:
-                    usd_balance += (entry_price - stop_loss) * tamanho_ordem
-                    btc_balance = 0
-                    loss_trades += 1
-                    operations.append(("LOSS (SL)", stop_loss, last_row["timestamp"]))
-                    position_open = False
-        
-        # Executa novas ordens
-        if not position_open:
-            if ordem == "BUY":
-                btc_balance = usd_balance / price
-                usd_balance = 0
-                entry_price = price
-                stop_loss = price * 0.995
-                take_profit = price * 1.01
-                position_open = True
-                trade_type = "long"
-                operations.append(("BUY", price, last_row["timestamp"]))
-            elif ordem == "SELL":
-                entry_price = price
-                stop_loss = price * 1.005
-                take_profit = price * 0.99
-                position_open = True
-                trade_type = "short"
-                operations.append(("SELL", price, last_row["timestamp"]))
-        
-        highest_balance = max(highest_balance, usd_balance)
-        drawdown = (highest_balance - usd_balance) / highest_balance if highest_balance > 0 else 0
-        max_drawdown = max(max_drawdown, drawdown)
-    
-    # Fechar posição no final do histórico
-    if position_open:
-        usd_balance = btc_balance * df.iloc[-1]["close"] if trade_type == "long" else usd_balance + (entry_price - df.iloc[-1]["close"]) * tamanho_ordem
-        btc_balance = 0
-        operations.append(("FECHAMENTO FORÇADO", df.iloc[-1]["close"], df.iloc[-1]["timestamp"]))
-        position_open = False
-    
+    sinais = gerar_sinais(df, estrategia)
+    operations, usd_balance, contagem = executar_sinais(df, sinais, initial_balance, tamanho_ordem, saida_reversa=True)
+    win_trades = contagem["win_long"] + contagem["win_short"]
+    win_trades_reverse = contagem["win_reverse"]
+    win_trades_tp = win_trades - win_trades_reverse
+    loss_trades = contagem["loss_long"] + contagem["loss_short"]
+    # Drawdown sobre o patrimônio marcado a mercado: durante uma compra o saldo em USDT fica zerado
+    max_drawdown = metricas_operacoes(df, operations, initial_balance, tamanho_ordem)["max_drawdown"]
     return operations, usd_balance, win_trades, win_trades_tp, win_trades_reverse, loss_trades, max_drawdown
 
 # 🚀 Executar Backtest
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from backtesting_core.ao_vivo import FeedReplay, SessaoPapel, arquivo_operacoes, executar
+
+
+def _candles(n=1500):
+    rng = np.random.default_rng(1)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    return pd.DataFrame({"timestamp": np.arange(n, dtype=np.int64) * 60_000 + 1_700_000_000_000, "open": close,
+                         "high": close * 1.002, "low": close * 0.998, "close": close, "volume": np.ones(n)})
+
+
+# 🔹 Sessão interrompida no meio e retomada do snapshot: mesmas operações de uma sessão sem parada.
+# O snapshot guarda só a contagem; linhas do JSONL gravadas depois dele são descartadas ao carregar.
+def test_retomar_do_snapshot(tmp_path):
+    df = _candles()
+    referencia = SessaoPapel.de_configuracao("trix")
+    executar(referencia, FeedReplay(df))
+
+    caminho = str(tmp_path / "sessao.json")
+    executar(SessaoPapel.de_configuracao("trix"), FeedReplay(df.iloc[:len(df) // 2]), snapshot=caminho,
+             snapshot_a_cada=10)
+    with open(caminho, encoding="utf-8") as arquivo:
+        assert isinstance(json.load(arquivo)["operacoes"], int)
+    with open(arquivo_operacoes(caminho), "a", encoding="utf-8") as arquivo:
+        arquivo.write(json.dumps(["BUY", 1.0, 0]) + "\n")
+
+    sessao = SessaoPapel.carregar(caminho)
+    executar(sessao, FeedReplay(df), snapshot=caminho)
+    assert sessao.operacoes == referencia.operacoes
+    assert SessaoPapel.carregar(caminho).operacoes == referencia.operacoes
+    assert referencia.operacoes
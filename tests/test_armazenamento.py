@@ -0,0 +1,50 @@
+import numpy as np
+
+from backtesting_core import armazenamento
+from backtesting_core.armazenamento import (
+    abrir_candles, anexar_candles, compactar_candles, ler_meta, mesclar_intervalos, salvar_candles,
+)
+
+PASSO = 60_000
+
+
+def _candles(inicio, fim, deslocamento=0.0):
+    timestamps = np.arange(inicio, fim, dtype=np.int64) * PASSO
+    close = 100.0 + np.arange(inicio, fim) + deslocamento
+    return {"timestamp": timestamps, "open": close, "high": close + 1, "low": close - 1, "close": close,
+            "volume": np.ones(len(close))}
+
+
+def test_mesclar_intervalos():
+    assert mesclar_intervalos([[30, 40], [0, 10], [10, 20], [5, 12]]) == [[0, 20], [30, 40]]
+    assert mesclar_intervalos([]) == []
+
+
+# 🔹 Segmentos anexados (com sobreposição: vale o último) e a compactação devolvem as mesmas colunas
+def test_anexar_e_compactar(tmp_path):
+    raiz = str(tmp_path)
+    salvar_candles(raiz, "BTC", "1m", _candles(0, 100))
+    anexar_candles(raiz, "BTC", "1m", _candles(90, 150, deslocamento=0.5))
+    anexar_candles(raiz, "BTC", "1m", _candles(200, 220), [[200 * PASSO, 230 * PASSO]])
+
+    meta = ler_meta(raiz, "BTC", "1m")
+    assert len(meta["segmentos"]) == 2
+    assert meta["cobertura"] == [[0, 150 * PASSO], [200 * PASSO, 230 * PASSO]]
+    esperado = armazenamento._mesclar([_candles(0, 90), _candles(90, 150, deslocamento=0.5), _candles(200, 220)])
+    anexado = abrir_candles(raiz, "BTC", "1m")
+
+    compactar_candles(raiz, "BTC", "1m")
+    meta_compactado = ler_meta(raiz, "BTC", "1m")
+    assert meta_compactado["segmentos"] == []
+    assert meta_compactado["cobertura"] == meta["cobertura"]
+    assert meta_compactado["linhas"] == len(esperado["timestamp"])
+    compactado = abrir_candles(raiz, "BTC", "1m")
+    for candles in (anexado, compactado):
+        assert list(candles) == list(esperado)
+        for nome, valores in esperado.items():
+            assert candles[nome].dtype == valores.dtype
+            np.testing.assert_array_equal(candles[nome], valores)
+
+    recorte = abrir_candles(raiz, "BTC", "1m", 95 * PASSO, 205 * PASSO, colunas=["close"])
+    np.testing.assert_array_equal(recorte["timestamp"], np.r_[np.arange(95, 150), np.arange(200, 205)] * PASSO)
+    assert list(recorte) == ["timestamp", "close"]
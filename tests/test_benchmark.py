@@ -0,0 +1,14 @@
+import numpy as np
+
+from backtesting_core import armazenamento
+from backtesting_core.benchmark import gerar_ohlcv, gravar_sinteticos
+
+
+# 🔹 Mesma semente e mesmo bloco: os primeiros candles não dependem do tamanho pedido nem de onde foram gravados
+def test_sinteticos_iguais_para_qualquer_tamanho(tmp_path):
+    curto = gerar_ohlcv(1000, semente=3, bloco=256)
+    longo = gerar_ohlcv(5000, semente=3, bloco=256)
+    gravado = armazenamento.abrir_candles(str(tmp_path), gravar_sinteticos(str(tmp_path), 5000, 3, bloco=256), "1m")
+    for nome, valores in longo.items():
+        np.testing.assert_array_equal(curto[nome], valores[:1000])
+        np.testing.assert_array_equal(gravado[nome], valores)
@@ -0,0 +1,48 @@
+import pytest
+
+from backtesting_core.cache_candles import lacunas, obter_dataframe
+from backtesting_core.download import GRANULARIDADES_MS, janelas_paginacao
+from backtesting_core.servidor_local import iniciar_servidor
+
+PASSO = GRANULARIDADES_MS["1m"]
+AGORA = 1_700_000_000_000 - 1_700_000_000_000 % PASSO
+
+
+def test_lacunas():
+    cobertura = [[10, 20], [30, 40]]
+    assert lacunas(cobertura, 0, 50) == [(0, 10), (20, 30), (40, 50)]
+    assert lacunas(cobertura, 12, 35) == [(20, 30)]
+    assert lacunas(cobertura, 10, 20) == []
+    assert lacunas(cobertura, 32, 38) == []
+    assert lacunas([], 5, 8) == [(5, 8)]
+
+
+@pytest.fixture
+def servidor():
+    servidor, url = iniciar_servidor(AGORA)
+    yield servidor, url
+    servidor.shutdown()
+    servidor.server_close()
+
+
+# 🔹 Só as lacunas vão para a API: o mesmo período de novo não faz nenhuma requisição
+def test_obter_dataframe_baixa_so_as_lacunas(servidor, tmp_path):
+    local, url = servidor
+    raiz = str(tmp_path)
+    opcoes = {"url": url, "requisicoes_por_segundo": 1000}
+    inicio, meio, fim = AGORA - 1000 * PASSO, AGORA - 600 * PASSO, AGORA - 100 * PASSO
+
+    frio = obter_dataframe(raiz, "SBTCSUSDT", inicio, meio, **opcoes)
+    assert local.requisicoes == len(janelas_paginacao(inicio, meio))
+    assert len(frio) == 400
+
+    quente = obter_dataframe(raiz, "SBTCSUSDT", inicio, meio, **opcoes)
+    assert local.requisicoes == len(janelas_paginacao(inicio, meio))
+    assert quente.equals(frio)
+
+    antes = local.requisicoes
+    maior = obter_dataframe(raiz, "SBTCSUSDT", inicio, fim, **opcoes)
+    assert local.requisicoes - antes == len(janelas_paginacao(meio, fim))
+    assert len(maior) == 900
+    assert maior["timestamp"].is_monotonic_increasing
+    assert maior.iloc[:400].equals(frio)
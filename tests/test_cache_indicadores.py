@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from backtesting_core import cache_indicadores
+from backtesting_core.cache_indicadores import CacheIndicadores, calcular
+from backtesting_core.compartilhado import ConjuntoCompartilhado
+from backtesting_core.indicadores import calcular_trix
+
+
+def _candles(semente, n=2000):
+    rng = np.random.default_rng(semente)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"timestamp": np.arange(n, dtype=np.int64) * 60_000, "open": close, "high": close + 1,
+                         "low": close - 1, "close": close, "volume": np.ones(n)})
+
+
+# 🔹 Blocos publicados em sequência podem cair no mesmo endereço de um bloco já liberado;
+# o cache não pode devolver os indicadores do bloco antigo
+def test_blocos_em_sequencia_nao_reaproveitam_indicadores():
+    cache = CacheIndicadores()
+    for semente in range(4):
+        base = _candles(semente)
+        conjunto = ConjuntoCompartilhado.publicar_dataframe(base)
+        df = calcular(conjunto.dataframe(), calcular_trix, cache=cache, periodo=14)
+        esperado = calcular_trix(base.copy(), 14)["trix"].to_numpy()
+        np.testing.assert_allclose(df["trix"].to_numpy(), esperado)
+        del df
+        conjunto.fechar()
+    assert cache.acertos == 0
+    assert not cache_indicadores._DIGITAIS_BUFFERS
+
+
+def test_mesmo_bloco_acerta_o_cache():
+    cache = CacheIndicadores()
+    with ConjuntoCompartilhado.publicar_dataframe(_candles(0)) as conjunto:
+        calcular(conjunto.dataframe(), calcular_trix, cache=cache, periodo=14)
+        calcular(conjunto.dataframe(), calcular_trix, cache=cache, periodo=14)
+        assert cache.acertos == 1
+    assert not cache_indicadores._DIGITAIS_BUFFERS
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from backtesting_core.download import GRANULARIDADES_MS, baixar_historico, baixar_intervalos, janelas_paginacao
+from backtesting_core.servidor_local import candle_sintetico, iniciar_servidor
+
+PASSO = GRANULARIDADES_MS["1m"]
+AGORA = 1_700_000_000_000 - 1_700_000_000_000 % PASSO
+
+
+@pytest.fixture
+def servidor():
+    servidores = []
+
+    def iniciar(falhas=0):
+        servidor, url = iniciar_servidor(AGORA, falhas=falhas)
+        servidores.append(servidor)
+        return servidor, url
+
+    yield iniciar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _tempos(df):
+    return df["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+
+
+# 🔹 Com 429 nas primeiras requisições as páginas são repetidas e o histórico vem completo, em ordem e sem buracos
+def test_baixar_historico_repete_depois_de_429(servidor):
+    local, url = servidor(falhas=3)
+    inicio = AGORA - 1000 * PASSO
+    df = baixar_historico("SBTCSUSDT", inicio, AGORA, url=url, threads=2, requisicoes_por_segundo=1000,
+                          espera_inicial=0.01)
+    assert local.requisicoes == len(janelas_paginacao(inicio, AGORA)) + 3
+    np.testing.assert_array_equal(_tempos(df), np.arange(inicio, AGORA, PASSO))
+    linha = candle_sintetico(inicio, PASSO)
+    assert df.loc[0, ["open", "high", "low", "close"]].tolist() == [float(valor) for valor in linha[1:5]]
+
+
+# 🔹 Intervalos sobrepostos pedem os mesmos candles mais de uma vez; o resultado não repete nenhum
+def test_baixar_intervalos_sobrepostos_sem_duplicatas(servidor):
+    _, url = servidor()
+    intervalos = [(AGORA - 500 * PASSO, AGORA - 100 * PASSO), (AGORA - 300 * PASSO, AGORA)]
+    df = baixar_intervalos("SBTCSUSDT", intervalos, url=url, requisicoes_por_segundo=1000)
+    np.testing.assert_array_equal(_tempos(df), np.arange(AGORA - 500 * PASSO, AGORA, PASSO))
@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+
+from backtesting_core import execucao
+from backtesting_core.execucao import (
+    EVENTO_BUY, EVENTO_FECHAMENTO, EVENTO_LOSS_SL, EVENTO_SELL, EVENTO_WIN_REVERSE, EVENTO_WIN_TP, USD,
+    curva_patrimonio, executar_arrays, novo_estado, processar_candles,
+)
+from backtesting_core.metricas import calcular_metricas
+
+CAMINHOS = [False] + ([True] if execucao.njit is not None else [])
+
+
+# 🔹 Loop de referência candle a candle, na forma dos scripts originais: saída por sinal contrário, depois TP
+# (testado antes do SL no mesmo candle) ou SL, e uma entrada nova no mesmo candle se a posição estiver fechada.
+# Depois de uma saída por sinal contrário o TP/SL não é testado de novo.
+def _referencia(close, high, low, sinais, initial_balance, tamanho, sl_long=0.995, tp_long=1.01, sl_short=1.005,
+                tp_short=0.99, saida_reversa=False, fechamento_forcado=True, exigir_saldo=False):
+    usd, btc, lado, entrada, stop, alvo = float(initial_balance), 0.0, None, 0.0, 0.0, 0.0
+    eventos = []
+    contagem = {"win_long": 0, "win_short": 0, "loss_long": 0, "loss_short": 0, "win_reverse": 0}
+
+    def sair(codigo, preco, i, chave=None):
+        nonlocal usd, btc, lado
+        if lado == "long":
+            usd = btc * preco
+        else:
+            usd += (entrada - preco) * tamanho
+        btc = 0.0
+        lado = None
+        if chave is not None:
+            contagem[chave] += 1
+        eventos.append((codigo, preco, i))
+
+    for i in range(1, len(close)):
+        ordem = sinais[i]
+        if saida_reversa and lado == "long" and ordem == -1:
+            contagem["win_reverse"] += 1
+            sair(EVENTO_WIN_REVERSE, close[i], i, "win_long")
+        elif saida_reversa and lado == "short" and ordem == 1:
+            contagem["win_reverse"] += 1
+            sair(EVENTO_WIN_REVERSE, close[i], i, "win_short")
+        if lado == "long":
+            if high[i] >= alvo:
+                sair(EVENTO_WIN_TP, alvo, i, "win_long")
+            elif low[i] <= stop:
+                sair(EVENTO_LOSS_SL, stop, i, "loss_long")
+        elif lado == "short":
+            if low[i] <= alvo:
+                sair(EVENTO_WIN_TP, alvo, i, "win_short")
+            elif high[i] >= stop:
+                sair(EVENTO_LOSS_SL, stop, i, "loss_short")
+        if lado is None and (usd > 0 or not exigir_saldo):
+            if ordem == 1:
+                btc, usd = usd / close[i], 0.0
+                lado, entrada, stop, alvo = "long", close[i], close[i] * sl_long, close[i] * tp_long
+                eventos.append((EVENTO_BUY, close[i], i))
+            elif ordem == -1:
+                lado, entrada, stop, alvo = "short", close[i], close[i] * sl_short, close[i] * tp_short
+                eventos.append((EVENTO_SELL, close[i], i))
+    if fechamento_forcado and lado is not None:
+        sair(EVENTO_FECHAMENTO, close[-1], len(close) - 1)  # não conta como acerto nem erro
+    return eventos, usd, contagem
+
+
+def _comparar(close, high, low, sinais, jit, initial_balance=1000, tamanho=0.001, **regras):
+    esperado, saldo_esperado, contagem_esperada = _referencia(close, high, low, sinais, initial_balance, tamanho,
+                                                              **regras)
+    nomes = {"sl_long": "stop_loss_long", "tp_long": "take_profit_long", "sl_short": "stop_loss_short",
+             "tp_short": "take_profit_short"}
+    eventos, saldo, contagem = executar_arrays(close, high, low, sinais, initial_balance, tamanho, jit=jit,
+                                               **{nomes.get(nome, nome): valor for nome, valor in regras.items()})
+    ev_codigo, ev_preco, ev_indice, n_ev = eventos
+    assert ev_codigo[:n_ev].tolist() == [codigo for codigo, _, _ in esperado]
+    assert ev_indice[:n_ev].tolist() == [indice for _, _, indice in esperado]
+    np.testing.assert_allclose(ev_preco[:n_ev], [preco for _, preco, _ in esperado], rtol=1e-12)
+    assert saldo == pytest.approx(saldo_esperado, rel=1e-12)
+    assert contagem == contagem_esperada
+    return esperado
+
+
+def _candles(semente, n=5000, amplitude=0.012):
+    rng = np.random.default_rng(semente)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    high = close * (1 + rng.random(n) * amplitude)
+    low = close * (1 - rng.random(n) * amplitude)
+    sinais = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=n, p=[0.05, 0.9, 0.05])
+    return close, high, low, sinais
+
+
+@pytest.mark.parametrize("jit", CAMINHOS)
+@pytest.mark.parametrize("saida_reversa", [False, True])
+@pytest.mark.parametrize("semente", range(4))
+def test_paridade_com_loop_de_referencia(semente, saida_reversa, jit):
+    eventos = _comparar(*_candles(semente), jit, saida_reversa=saida_reversa,
+                        fechamento_forcado=bool(semente % 2))
+    codigos = {codigo for codigo, _, _ in eventos}
+    assert {EVENTO_WIN_TP, EVENTO_LOSS_SL} <= codigos
+    assert (EVENTO_WIN_REVERSE in codigos) == saida_reversa
+
+
+# 🔹 Candle de saída por sinal contrário que também toca o alvo: uma única saída, e a entrada oposta no mesmo candle
+@pytest.mark.parametrize("jit", CAMINHOS)
+def test_saida_reversa_nao_testa_tp_sl_no_mesmo_candle(jit):
+    close = np.array([100.0, 100.0, 100.5, 100.0])
+    high = np.array([100.0, 100.0, 102.0, 100.0])
+    low = np.array([100.0, 100.0, 100.0, 100.0])
+    sinais = np.array([0, 1, -1, 0], dtype=np.int8)
+    eventos = _comparar(close, high, low, sinais, jit, saida_reversa=True, fechamento_forcado=False)
+    assert [codigo for codigo, _, _ in eventos] == [EVENTO_BUY, EVENTO_WIN_REVERSE, EVENTO_SELL]
+
+
+# 🔹 Candle que toca alvo e stop ao mesmo tempo: o alvo vem primeiro, como nos scripts originais
+@pytest.mark.parametrize("jit", CAMINHOS)
+def test_tp_e_sl_no_mesmo_candle(jit):
+    close = np.array([100.0, 100.0, 100.0, 100.0, 100.0])
+    high = np.array([100.0, 100.0, 102.0, 100.0, 102.0])
+    low = np.array([100.0, 100.0, 98.0, 100.0, 98.0])
+    sinais = np.array([0, 1, 0, -1, 0], dtype=np.int8)
+    eventos = _comparar(close, high, low, sinais, jit)
+    assert [(codigo, preco) for codigo, preco, _ in eventos] == [
+        (EVENTO_BUY, 100.0), (EVENTO_WIN_TP, 101.0), (EVENTO_SELL, 100.0), (EVENTO_WIN_TP, 99.0)]
+
+
+# 🔹 Short que estoura o saldo e depois um sinal de compra: com `exigir_saldo` a compra não abre
+@pytest.mark.parametrize("jit", CAMINHOS)
+def test_exigir_saldo(jit):
+    close = np.array([100.0, 100.0, 100.0, 200.0, 200.0, 210.0, 220.0])
+    sinais = np.array([0, -1, 0, 0, 1, 0, 0], dtype=np.int8)
+    livre = _comparar(close, close, close, sinais, jit, initial_balance=10, tamanho=1.0, sl_short=1.5)
+    guardado = _comparar(close, close, close, sinais, jit, initial_balance=10, tamanho=1.0, sl_short=1.5,
+                         exigir_saldo=True)
+    assert [codigo for codigo, _, _ in livre] == [EVENTO_SELL, EVENTO_LOSS_SL, EVENTO_BUY, EVENTO_WIN_TP]
+    assert [codigo for codigo, _, _ in guardado] == [EVENTO_SELL, EVENTO_LOSS_SL]
+
+
+# 🔹 Short aberto num trecho e liquidado no seguinte com outro `tamanho_ordem` (como entre janelas do
+# walk-forward): a liquidação e a curva usam o tamanho da entrada
+@pytest.mark.parametrize("jit", CAMINHOS)
+def test_short_usa_o_tamanho_da_entrada(jit):
+    close = np.array([100.0, 100.0, 100.0, 98.0, 97.0, 97.0])
+    sinais = np.array([0, -1, 0, 0, 0, 0], dtype=np.int8)
+    estado, contadores = novo_estado(1000)
+    eventos = processar_candles(close, close, close, sinais, estado, contadores, 1.0, inicio=1, fim=3,
+                                take_profit_short=0.975, jit=jit)
+    eventos = processar_candles(close, close, close, sinais, estado, contadores, 5.0, inicio=3, fim=6,
+                                eventos=eventos, take_profit_short=0.975, jit=jit)
+    assert eventos[0][:eventos[3]].tolist() == [EVENTO_SELL, EVENTO_WIN_TP]
+    assert estado[USD] == pytest.approx(1002.5)
+    tamanhos = np.array([1.0, 1.0, 1.0, 5.0, 5.0, 5.0])
+    curva = curva_patrimonio(close, eventos, 1000, tamanhos)
+    np.testing.assert_allclose(curva, [1000, 1000, 1000, 1002, 1002.5, 1002.5])
+    np.testing.assert_allclose(calcular_metricas(close, eventos, 1000, tamanhos, jit=jit)["patrimonio"], curva)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting_core.estrategias import estrategia_expressoes, estrategia_mme_adx_obv
+from backtesting_core.expressoes import analisar, compilar
+from backtesting_core.sinais import gerar_sinais
+
+
+def _candles(n=3000):
+    rng = np.random.default_rng(7)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    df = pd.DataFrame({"close": close, "ADX": rng.uniform(5, 40, n), "OBV": np.cumsum(rng.normal(0, 1, n))})
+    df["MME9"] = df["close"].ewm(span=9, adjust=False).mean()
+    df["MME21"] = df["close"].ewm(span=21, adjust=False).mean()
+    return df
+
+
+# 🔹 & e | ligam mais fraco que as comparações (e & mais forte que |)
+def test_precedencia():
+    assert analisar("a > 1 & b < 2") == analisar("(a > 1) & (b < 2)")
+    assert analisar("a > 1 | b < 2 & c > 0") == analisar("(a > 1) | ((b < 2) & (c > 0))")
+    df = pd.DataFrame({"a": [0.0, 2.0, 2.0, 0.0], "b": [0.0, 3.0, 0.0, 0.0], "c": [1.0, 1.0, 1.0, -1.0]})
+    mascara = compilar({"r": "a > 1 | b < 2 & c > 0"}).avaliar(df)["r"]
+    assert mascara.tolist() == [True, True, True, False]
+
+
+# 🔹 cruza_acima/cruza_abaixo reproduzem o cruzamento MME9/MME21 do backtesting_v03.py
+def test_cruzamento_igual_ao_v03():
+    df = _candles()
+    mme9, mme21 = df["MME9"].to_numpy(), df["MME21"].to_numpy()
+    mascaras = compilar({"acima": "MME9 cruza_acima MME21", "abaixo": "MME9 cruza_abaixo MME21"}).avaliar(df)
+    esperado = (np.r_[np.nan, mme9[:-1]] < np.r_[np.nan, mme21[:-1]]) & (mme9 > mme21)
+    np.testing.assert_array_equal(mascaras["acima"], esperado)
+    assert mascaras["acima"].any() and mascaras["abaixo"].any()
+
+    compra = "MME9 cruza_acima MME21 & ADX > adx_minimo & OBV > anterior(OBV)"
+    venda = "MME9 cruza_abaixo MME21 & ADX > adx_minimo & OBV < anterior(OBV)"
+    sinais = gerar_sinais(df, estrategia_expressoes, compra=compra, venda=venda, adx_minimo=15)
+    np.testing.assert_array_equal(sinais, gerar_sinais(df, estrategia_mme_adx_obv, adx_minimo=15))
+
+
+# 🔹 anterior(x, n): valor de n candles atrás, NaN nos n primeiros (NaN != NaN marca as posições sem valor)
+def test_anterior_com_nan_no_inicio():
+    df = pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0, 5.0]})
+    mascaras = compilar({"vazio": "anterior(x, 2) != anterior(x, 2)", "igual": "anterior(x, 2) == x - 2"}).avaliar(df)
+    assert mascaras["vazio"].tolist() == [True, True, False, False, False]
+    assert mascaras["igual"].tolist() == [False, False, True, True, True]
+
+
+# 🔹 Formas equivalentes da mesma comparação viram um só nó no lote
+def test_comparacoes_equivalentes_compartilham_no():
+    programa = compilar({"a": "x > 5", "b": "5 < x"})
+    assert programa.raizes["a"] == programa.raizes["b"]
+    assert len(programa) == 3  # a constante, a coluna e a comparação
+
+
+@pytest.mark.parametrize("texto, posicao", [("a >", 3), ("a & 1", 0), ("anterior(a, 0)", 12)])
+def test_posicao_do_erro(texto, posicao):
+    with pytest.raises(ValueError, match=f"posição {posicao}:"):
+        analisar(texto)
@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting_core import indicadores
+from backtesting_core.indicadores import VARIANTES_ADX, calcular_indicadores
+from backtesting_core.incrementais import IndicadoresIncrementais
+
+CAMINHOS = [False] + ([True] if indicadores.njit is not None else [])
+
+
+def _candles(n=1500):
+    rng = np.random.default_rng(11)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    return pd.DataFrame({"high": close * (1 + rng.random(n) * 0.004), "low": close * (1 - rng.random(n) * 0.004),
+                         "close": close, "volume": rng.uniform(1, 10, n)})
+
+
+# 🔹 Candle a candle, com o estado salvo em JSON e restaurado no meio, os valores batem com a versão em lote
+@pytest.mark.parametrize("jit", CAMINHOS)
+@pytest.mark.parametrize("variante", VARIANTES_ADX)
+def test_paridade_com_versao_em_lote(variante, jit):
+    especificacao = [("mme", {"periodo": 9}), ("mme", {"periodo": 21}), ("trix", {"periodo": 9}),
+                     ("adx", {"periodo": 14, "variante": variante}), ("estocastico", {}), ("sma", {"periodo": 20}),
+                     ("rsi", {}), ("obv", {})]
+    df = _candles()
+    lote = calcular_indicadores(df.copy(), especificacao, jit=jit)
+
+    incrementais = IndicadoresIncrementais(especificacao)
+    linhas = []
+    for i, (high, low, close, volume) in enumerate(df[["high", "low", "close", "volume"]].itertuples(index=False)):
+        if i == len(df) // 2:
+            incrementais = IndicadoresIncrementais.restaurar(json.loads(json.dumps(incrementais.estado())))
+        linhas.append(incrementais.atualizar(high, low, close, volume))
+    candle_a_candle = pd.DataFrame(linhas)
+
+    for coluna in candle_a_candle.columns:
+        np.testing.assert_allclose(candle_a_candle[coluna].to_numpy(), lote[coluna].to_numpy(), rtol=1e-12,
+                                   atol=1e-9, err_msg=coluna)
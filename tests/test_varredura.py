@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting_core import varredura
+from backtesting_core.cache_indicadores import CACHE_PADRAO
+from backtesting_core.estrategias import estrategia_trix
+from backtesting_core.indicadores import calcular_trix
+
+
+def _preparar(df, periodo=14):
+    return calcular_trix(df.copy(), periodo)
+
+
+def _candles(n=3000):
+    rng = np.random.default_rng(5)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    return pd.DataFrame({"timestamp": np.arange(n, dtype=np.int64) * 60_000, "open": close,
+                         "high": close * (1 + rng.random(n) * 0.004), "low": close * (1 - rng.random(n) * 0.004),
+                         "close": close, "volume": np.ones(n)})
+
+
+# 🔹 No próprio processo a varredura não deixa dados nem a pasta do cache trocados no módulo
+def test_varrer_em_um_processo_nao_altera_o_modulo(tmp_path):
+    pasta = CACHE_PADRAO.pasta
+    tabela = varredura.varrer(_candles(), estrategia_trix, {"periodo": [9, 14], "saida_reversa": [False, True]},
+                              _preparar, processos=1, pasta_cache_indicadores=str(tmp_path))
+    assert len(tabela) == 4
+    assert varredura._DADOS == {}
+    assert CACHE_PADRAO.pasta == pasta
+
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_grade_vazia(processos):
+    with pytest.raises(ValueError, match="nenhuma combinação"):
+        varredura.varrer(_candles(), estrategia_trix, {"periodo": []}, _preparar, processos=processos)